@@ -0,0 +1,205 @@
+"""
+Compile an ETL spec straight into a Polars LazyFrame, in this process.
+
+The plan matches the script from `tools.generate_polars_code` (scan ->
+select -> filter -> join -> filter on joined columns -> group_by/aggs ->
+top_k or sort -> select -> limit), but it is built from expressions rather
+than rendered source, so spec values never become code. Generated scripts
+stay available as an export for the sandbox.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+import polars as pl
+
+from ..ingestion.cache import source_fingerprint
+from ..ingestion.reader import scan_file
+from ..ingestion.validator import validate_columns
+from ..ingestion.writer import write_frame
+from .prestage import filter_expr
+from .spans import Span, span
+from .tools import (
+    DEFAULT_OUTPUT_PATH,
+    agg_specs,
+    input_columns,
+    join_specs,
+    output_columns,
+    sort_keys,
+    split_filters,
+    top_k_spec,
+)
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE_SIZE = 64
+
+
+def normalize_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Only the fields that shape the plan, in canonical form."""
+    if not spec.get("input_path"):
+        raise ValueError("Spec has no input_path.")
+    limit = spec.get("limit")
+    filters, joined_filters = split_filters(spec)
+    return {
+        "input_path": str(spec["input_path"]),
+        "columns": input_columns(spec),
+        "filters": filters,
+        "joined_filters": joined_filters,
+        "joins": [
+            {k: j[k] for k in ("path", "on", "how", "columns", "prefilter")}
+            for j in join_specs(spec)
+        ],
+        "group_by": list(spec.get("group_by") or []),
+        "aggs": agg_specs(spec),
+        "sort": sort_keys(spec),
+        "top_k": top_k_spec(spec),
+        "output": output_columns(spec),
+        "limit": int(limit) if limit else None,
+    }
+
+
+def _require(frame: pl.LazyFrame, names: Iterable[str]) -> None:
+    """Fail early, with the ingestion error types, on columns the source lacks."""
+    schema = frame.collect_schema()
+    validate_columns(frame, {n: schema.get(n, pl.Null) for n in names})
+
+
+def _agg_expr(agg: Dict[str, Any]) -> pl.Expr:
+    if agg["column"] is None:
+        return pl.len().alias(agg["alias"])
+    return getattr(pl.col(agg["column"]), agg["op"])().alias(agg["alias"])
+
+
+def _source_key(paths: Iterable[str]) -> tuple[Any, ...]:
+    return tuple(
+        (
+            p,
+            tuple(
+                (name, str(dtype))
+                for name, dtype in scan_file(p).collect_schema().items()
+            ),
+            tuple(sorted(source_fingerprint(p).items())),
+        )
+        for p in paths
+    )
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile(spec_json: str, source_key: tuple[Any, ...]) -> pl.LazyFrame:
+    # source_key is only part of the cache key. A changed schema must produce
+    # a fresh (re-validated) plan, and a rewritten file must too: eager
+    # sources (.json, the pandas CSV fallback) carry their rows in the plan.
+    spec = json.loads(spec_json)
+    lf = scan_file(spec["input_path"])
+    filter_columns = [f["column"] for f in spec["filters"] if f.get("column")]
+    _require(lf, spec["columns"] + filter_columns)
+
+    if spec["columns"]:
+        lf = lf.select([pl.col(name) for name in spec["columns"]])
+    for fspec in spec["filters"]:
+        lf = lf.filter(filter_expr(fspec))
+
+    for join in spec["joins"]:
+        on = join["on"]
+        right = scan_file(join["path"])
+        _require(right, on + join["columns"])
+        if join["how"] in {"semi", "anti"}:
+            right = right.select(on).unique()
+        elif join["columns"]:
+            right = right.select(on + [c for c in join["columns"] if c not in on])
+        if join["prefilter"]:
+            # Cached so the key prefilter and the join share one scan.
+            lf = lf.cache()
+            right = right.join(lf.select(on).unique(), on=on, how="semi")
+        # Small tables are not collected here: the plan is cached, their data
+        # is not, and the streaming engine builds the small side in memory.
+        lf = lf.join(right, on=on, how=join["how"])
+    for fspec in spec["joined_filters"]:
+        lf = lf.filter(filter_expr(fspec))
+
+    aggs = [_agg_expr(a) for a in spec["aggs"]]
+    if spec["group_by"]:
+        lf = lf.group_by(spec["group_by"]).agg(aggs)
+    elif aggs:
+        lf = lf.select(aggs)
+
+    top = spec["top_k"]
+    if top:
+        ranked = lf.top_k if top["descending"] else lf.bottom_k
+        lf = ranked(top["k"], by=top["by"]).sort(
+            top["by"], descending=bool(top["descending"])
+        )
+    elif spec["sort"]:
+        lf = lf.sort(
+            [c for c, _ in spec["sort"]],
+            descending=[d for _, d in spec["sort"]],
+            nulls_last=True,
+        )
+
+    if spec["output"]:
+        lf = lf.select([pl.col(name) for name in spec["output"]])
+    if spec["limit"]:
+        lf = lf.head(spec["limit"])
+    return lf
+
+
+def compile_spec(spec: Dict[str, Any]) -> pl.LazyFrame:
+    """
+    LazyFrame for `spec`, memoized on the normalized spec plus the size,
+    mtime and schema of every source it reads. Raises InvalidSchemaError for
+    unknown columns.
+    """
+    normalized = normalize_spec(spec)
+    sources = [normalized["input_path"]] + [j["path"] for j in normalized["joins"]]
+    spec_json = json.dumps(normalized, sort_keys=True, default=str)
+    return _compile(spec_json, _source_key(sources))
+
+
+def run_spec(
+    spec: Dict[str, Any],
+    *,
+    output_path: str | None = None,
+    profile: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Compile and sink `spec` locally. Returns an execution dict shaped like
+    `execute_in_e2b`'s (exit_code, stdout, stderr, artifact paths, spans).
+    """
+    target = Path(output_path or spec.get("output_path") or DEFAULT_OUTPUT_PATH)
+    spans: list[Span] = []
+    try:
+        with span("compile", spans, kind="local") as record:
+            hits = _compile.cache_info().hits
+            lf = compile_spec(spec)
+            record["cache_hit"] = _compile.cache_info().hits > hits
+        with span("write", spans, kind="local") as record:
+            write_frame(lf, target, streaming=True, profile=profile)
+            rows = scan_file(target).select(pl.len()).collect().item()
+            record["bytes"] = target.stat().st_size
+    except Exception as exc:
+        logger.error({"stage": "local_run", "error": str(exc)})
+        return {
+            "exit_code": 1,
+            "stdout": "",
+            "stderr": f"{type(exc).__name__}: {exc}",
+            "artifact_path": str(target),
+            "artifact_local_path": None,
+            "spans": spans,
+        }
+
+    logger.info({"stage": "local_run", "output": str(target), "rows": rows})
+    return {
+        "exit_code": 0,
+        "stdout": f"Wrote {rows} rows to {target}\n",
+        "stderr": "",
+        "artifact_path": str(target),
+        "artifact_local_path": str(target),
+        "rows": rows,
+        "spans": spans,
+    }
@@ -2,21 +2,31 @@ from __future__ import annotations
 
 import json
 import os
+from functools import lru_cache
 from typing import Any, TypedDict, cast
 
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, StateGraph
 from openai import OpenAI
 from openai.types.chat import ChatCompletionMessageParam
 
 from . import prompts
+from .compiler import run_spec
+from .prestage import prestage_input, staged_spec
+from .spans import Span, add_usage, span
 from .tools import (
     DEFAULT_OUTPUT_PATH,
     execute_in_e2b,
     generate_polars_code,
+    join_specs,
     parse_etl_instruction,
 )
 
-client = OpenAI()
+
+@lru_cache(maxsize=1)
+def get_client() -> OpenAI:
+    """OpenAI client built on first use, after the CLI has loaded .env."""
+    return OpenAI()
 
 
 class AgentState(TypedDict, total=False):
@@ -27,19 +37,26 @@ class AgentState(TypedDict, total=False):
     plan: str
     code: str
     execution: dict[str, Any]
+    prestage: bool
+    local: bool
+    staged_input: dict[str, Any] | None
+    spans: list[Span]
 
 
 def _chat(
     messages: list[ChatCompletionMessageParam],
     *,
     response_format: dict[str, Any] | None = None,
+    record: Span | None = None,
 ) -> str:
-    resp = client.chat.completions.create(
+    resp = get_client().chat.completions.create(
         model=os.getenv("OPENAI_MODEL", "gpt-4.1"),
         messages=messages,
         temperature=0,
         response_format=cast(Any, response_format),
     )
+    if record is not None:
+        add_usage(record, getattr(resp, "usage", None))
     return resp.choices[0].message.content or ""
 
 
@@ -65,7 +82,11 @@ def node_parse(state: AgentState) -> AgentState:
         },
     ]
 
-    parsed_content = _chat(messages, response_format={"type": "json_object"})
+    spans = list(state.get("spans") or [])
+    with span("parse", spans) as record:
+        parsed_content = _chat(
+            messages, response_format={"type": "json_object"}, record=record
+        )
     parsed_json = _safe_parse_json(parsed_content, base_spec)
     merged_spec = {**base_spec, **parsed_json}
 
@@ -77,6 +98,7 @@ def node_parse(state: AgentState) -> AgentState:
         **state,
         "base_spec": base_spec,
         "etl_spec": merged_spec,
+        "spans": spans,
     }
 
 
@@ -87,26 +109,58 @@ def node_plan(state: AgentState) -> AgentState:
         {"role": "user", "content": prompts.PLAN_PROMPT},
         {"role": "user", "content": json.dumps(spec, indent=2)},
     ]
-    plan_text = _chat(messages)
-    return {**state, "plan": plan_text}
+    spans = list(state.get("spans") or [])
+    with span("plan", spans) as record:
+        plan_text = _chat(messages, record=record)
+    return {**state, "plan": plan_text, "spans": spans}
 
 
 def node_code(state: AgentState) -> AgentState:
     spec = state.get("etl_spec") or {"output_path": DEFAULT_OUTPUT_PATH}
-    code = generate_polars_code(spec)
-    return {**state, "code": code}
+    spans = list(state.get("spans") or [])
+    staged: dict[str, Any] | None = None
+    with span("code", spans) as record:
+        # A local run reads the source directly; staging would only add a copy.
+        if state.get("prestage") and not state.get("local"):
+            try:
+                staged = prestage_input(spec)
+            except Exception as exc:
+                # Pruning is an optimization: fall back to shipping the raw input.
+                staged = {"error": str(exc)}
+        if staged and staged.get("path"):
+            record.update(bytes=staged["bytes_out"], cache_hit=staged["reused"])
+            code = generate_polars_code(staged_spec(spec, staged))
+        else:
+            code = generate_polars_code(spec)
+    return {**state, "code": code, "staged_input": staged, "spans": spans}
 
 
 def node_execute(state: AgentState) -> AgentState:
     spec = state.get("etl_spec") or {}
+    spans = list(state.get("spans") or [])
+    if state.get("local"):
+        # Compiled in-process: no sandbox, no interpreter start, no codegen.
+        with span("execute", spans, mode="local"):
+            result = run_spec(spec)
+            spans.extend({**p, "parent": "execute"} for p in result["spans"])
+        return {**state, "execution": result, "spans": spans}
+
     output_path = spec.get("output_path")
-    input_path = spec.get("input_path")
-    result = execute_in_e2b(
-        state.get("code", ""),
-        output_path=output_path,
-        input_path=input_path,
-    )
-    return {**state, "execution": result}
+    staged = state.get("staged_input") or {}
+    input_path = staged.get("path") or spec.get("input_path")
+    # Forward sandbox output to graph.stream(..., stream_mode="custom") consumers.
+    writer = get_stream_writer()
+    with span("execute", spans):
+        result = execute_in_e2b(
+            state.get("code", ""),
+            output_path=output_path,
+            input_path=input_path,
+            extra_inputs=[j["path"] for j in join_specs(spec)],
+            on_output=lambda stream, text: writer({"stream": stream, "text": text}),
+        )
+        # Bytes live on the phases, so totals do not count them twice.
+        spans.extend({**p, "parent": "execute"} for p in result.get("spans", []))
+    return {**state, "execution": result, "spans": spans}
 
 
 def build_graph() -> Any:
@@ -125,4 +179,15 @@ def build_graph() -> Any:
     return graph.compile()
 
 
-graph = build_graph()
+@lru_cache(maxsize=1)
+def get_graph() -> Any:
+    """Compiled agent graph, built once per process on first use."""
+    return build_graph()
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `from polarspipe.agent.graph import graph` working without compiling
+    # the graph at import time.
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,150 @@
+"""
+In-process stand-in for the E2B sandbox API surface used by polarspipe.
+
+Files live under a temporary directory that doubles as the sandbox workdir and
+commands run locally with this interpreter first on PATH. Meant for tests and
+offline load tests, not isolation.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess  # nosec B404 - local stand-in executes its own commands
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import IO, Any, Callable, Iterator
+
+
+class LocalCommandExit(Exception):
+    """Mirrors e2b's CommandExitException for non-zero exits."""
+
+    def __init__(self, exit_code: int, stdout: str, stderr: str) -> None:
+        super().__init__(f"Command exited with code {exit_code}: {stderr[-500:]}")
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class _CommandResult:
+    def __init__(self, exit_code: int, stdout: str, stderr: str) -> None:
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class _Files:
+    def __init__(self, sandbox: LocalSandbox) -> None:
+        self._sandbox = sandbox
+
+    def write(self, path: str, data: str | bytes | IO[Any]) -> None:
+        target = self._sandbox.resolve(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, str):
+            target.write_text(data, encoding="utf-8")
+        elif isinstance(data, (bytes, bytearray)):
+            target.write_bytes(data)
+        else:
+            with target.open("wb") as fh:
+                shutil.copyfileobj(data, fh)
+
+    def read(self, path: str, format: str = "text") -> Any:
+        target = self._sandbox.resolve(path)
+        if format == "bytes":
+            return bytearray(target.read_bytes())
+        if format == "stream":
+            return self._iter_chunks(target)
+        return target.read_text(encoding="utf-8")
+
+    @staticmethod
+    def _iter_chunks(target: Path, size: int = 1024 * 1024) -> Iterator[bytes]:
+        with target.open("rb") as fh:
+            while chunk := fh.read(size):
+                yield chunk
+
+    def exists(self, path: str) -> bool:
+        return self._sandbox.resolve(path).exists()
+
+    def remove(self, path: str) -> None:
+        target = self._sandbox.resolve(path)
+        if target.is_dir():
+            shutil.rmtree(target)
+        elif target.exists():
+            target.unlink()
+
+
+class _Commands:
+    def __init__(self, sandbox: LocalSandbox) -> None:
+        self._sandbox = sandbox
+
+    def run(
+        self,
+        cmd: str,
+        cwd: str | None = None,
+        on_stdout: Callable[[str], None] | None = None,
+        on_stderr: Callable[[str], None] | None = None,
+        **_: Any,
+    ) -> _CommandResult:
+        env = {
+            **os.environ,
+            "PATH": os.path.dirname(sys.executable) + os.pathsep + os.environ["PATH"],
+        }
+        proc = subprocess.Popen(  # nosec B602 - trusted commands, local stand-in
+            cmd,
+            shell=True,
+            cwd=self._sandbox.resolve(cwd) if cwd else self._sandbox.root,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        out: list[str] = []
+        err: list[str] = []
+
+        def _pump(stream: IO[str], sink: list[str], cb: Any) -> None:
+            for line in stream:
+                sink.append(line)
+                if cb is not None:
+                    cb(line)
+
+        if proc.stdout is None or proc.stderr is None:  # pragma: no cover
+            raise RuntimeError("subprocess pipes were not created")
+        pump_err = threading.Thread(
+            target=_pump, args=(proc.stderr, err, on_stderr), daemon=True
+        )
+        pump_err.start()
+        _pump(proc.stdout, out, on_stdout)
+        pump_err.join()
+        code = proc.wait()
+
+        stdout, stderr = "".join(out), "".join(err)
+        if code != 0:
+            raise LocalCommandExit(code, stdout, stderr)
+        return _CommandResult(code, stdout, stderr)
+
+
+class LocalSandbox:
+    """Drop-in for `e2b.Sandbox` covering files.read/write, commands.run, kill."""
+
+    def __init__(self, root: str | Path | None = None) -> None:
+        self._owns_root = root is None
+        self.root = Path(root or tempfile.mkdtemp(prefix="polarspipe-sandbox-"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.workdir = str(self.root)
+        self.sandbox_id = f"local-{self.root.name}"
+        self.files = _Files(self)
+        self.commands = _Commands(self)
+
+    @classmethod
+    def create(cls, **_: Any) -> LocalSandbox:
+        return cls()
+
+    def resolve(self, path: str) -> Path:
+        p = Path(path)
+        return p if p.is_absolute() else self.root / p
+
+    def kill(self) -> None:
+        if self._owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
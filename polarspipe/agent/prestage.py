@@ -0,0 +1,117 @@
+"""Shrink an ETL spec's input locally before it is uploaded to the sandbox."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import polars as pl
+
+from ..ingestion.reader import scan_file
+from .tools import filter_call, input_columns, reduces_rows, split_filters
+
+logger = logging.getLogger(__name__)
+
+# Relative on purpose: the sandbox mirrors relative input paths under its workdir,
+# so the rewritten script can read the staged file by the same path.
+STAGING_DIR = Path(".polarspipe/staging")
+
+
+def filter_expr(filter_spec: Dict[str, Any]) -> pl.Expr:
+    """pl.Expr for one filter, from the same op table as the rendered script."""
+    call = filter_call(filter_spec)
+    if call is None:
+        return pl.lit(True)
+    column, method, negated, value, kwargs = call
+    target: Any = pl.col(column)
+    for name in method.split("."):
+        target = getattr(target, name)
+    expr: pl.Expr = target(value, **kwargs)
+    return ~expr if negated else expr
+
+
+def _row_limit(spec: Dict[str, Any]) -> int | None:
+    # A limit after group_by/sort/top_k caps the result, not the input rows.
+    return None if reduces_rows(spec) or not spec.get("limit") else int(spec["limit"])
+
+
+def _staging_key(source: Path, spec: Dict[str, Any]) -> str:
+    stat = source.stat()
+    payload = {
+        "source": str(source.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "columns": input_columns(spec),
+        "filters": split_filters(spec)[0],
+        "limit": _row_limit(spec),
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def prestage_input(
+    spec: Dict[str, Any], staging_dir: Path = STAGING_DIR
+) -> Dict[str, Any] | None:
+    """
+    Apply the spec's projection, pre-join filters and limit to the local
+    input with a lazy scan and sink only the surviving rows to zstd Parquet.
+    Grouping and ordering stay in the sandbox script, so the limit is only
+    applied here when the spec has neither.
+
+    Returns {"path", "source", "bytes_in", "bytes_out", "reused", "duration_ms"}
+    or None when the input is not a readable local file. Staged files are
+    reused while the source and the pruning parts of the spec are unchanged.
+    """
+    input_path = spec.get("input_path")
+    if not input_path or not Path(input_path).is_file():
+        return None
+
+    source = Path(input_path)
+    target = staging_dir / f"{_staging_key(source, spec)}.parquet"
+    t0 = time.perf_counter()
+    reused = target.exists()
+
+    if not reused:
+        # Same order as the generated script: select, then filter, then limit.
+        lf = scan_file(source)
+        columns = input_columns(spec)
+        if columns:
+            lf = lf.select([pl.col(name) for name in columns])
+        for fspec in split_filters(spec)[0]:
+            lf = lf.filter(filter_expr(fspec))
+        limit = _row_limit(spec)
+        if limit:
+            lf = lf.limit(limit)
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_suffix(".parquet.part")
+        lf.sink_parquet(partial, compression="zstd")
+        partial.replace(target)
+
+    staged = {
+        "path": target.as_posix(),
+        "source": str(source),
+        "bytes_in": source.stat().st_size,
+        "bytes_out": target.stat().st_size,
+        "reused": reused,
+        "duration_ms": (time.perf_counter() - t0) * 1000,
+    }
+    logger.info({"stage": "prestage", **staged})
+    return staged
+
+
+def staged_spec(spec: Dict[str, Any], staged: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Spec rewritten to read the staged Parquet. The pre-join filters, and the
+    limit when prestaging applied it, are already in the staged rows and are
+    dropped; filters on joined columns stay in the script.
+    """
+    rewritten = {**spec, "input_path": staged["path"], "format": "parquet"}
+    rewritten["filters"] = split_filters(spec)[1]
+    if _row_limit(spec):
+        rewritten["limit"] = None
+    return rewritten
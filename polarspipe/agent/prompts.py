@@ -15,7 +15,19 @@ PARSE_PROMPT = (
     "- filters: array of filters as objects {column, op, value} where op is one of\n"
     "  ['==','!=','>','>=','<','<=','in',\n"
     "   'not in','contains','startswith','endswith'].\n"
-    "- limit: optional integer row cap.\n"
+    "- joins: array of {path, on, how, columns} enriching the input with other\n"
+    "  files; on is a key column or list of keys, how is one of\n"
+    "  ['inner','left','semi','anti'], columns lists the columns to take from\n"
+    "  the joined file (ignored for semi/anti).\n"
+    "- group_by: array of column names to group on (empty list: no grouping).\n"
+    "- aggs: array of aggregations as objects {column, op, alias} where op is one\n"
+    "  of ['sum','mean','min','max','median','std','count','n_unique','first',\n"
+    "  'last']; use {op:'count'} without column to count rows. With group_by\n"
+    "  and no aggs, rows per group are counted into 'count'.\n"
+    "- sort: array of {column, descending} applied after aggregation.\n"
+    "- top_k: optional {k, by, descending} for 'top/bottom N by X' requests;\n"
+    "  descending=true keeps the largest. Prefer it over sort + limit.\n"
+    "- limit: optional integer row cap, applied last.\n"
     "- format: one of ['auto','csv','json','ndjson','parquet']\n"
     "  (auto infers from extension).\n"
     "Preserve literal column names and numeric thresholds. "
@@ -26,6 +38,6 @@ PARSE_PROMPT = (
 PLAN_PROMPT = (
     "Draft a concise execution plan (3-6 bullet steps) for the ETL spec below. "
     "Each step should be an imperative action referencing Polars operations "
-    "(read, select, filter, write). "
+    "(scan, select, filter, join, group_by/agg, sort/top_k, sink). "
     "Stay terse; no markdown fences or explanations."
 )
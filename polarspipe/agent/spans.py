@@ -0,0 +1,130 @@
+"""
+Structured timing spans for the agent pipeline.
+
+A span is a plain dict so it survives the LangGraph state and JSON export
+unchanged: {"name", "kind", "parent", "start", "duration_ms", "status", ...}
+plus optional counters such as bytes, prompt/completion/cached tokens and
+`cache_hit`.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Sequence
+
+Span = Dict[str, Any]
+
+_TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+@contextmanager
+def span(
+    name: str,
+    sink: list[Span],
+    *,
+    kind: str = "node",
+    parent: str | None = None,
+    **attrs: Any,
+) -> Iterator[Span]:
+    """
+    Time the block and append its span to `sink` on exit, errors included.
+    The yielded dict can be annotated while the block runs.
+    """
+    record: Span = {
+        "name": name,
+        "kind": kind,
+        "parent": parent,
+        "start": time.time(),
+        **attrs,
+    }
+    t0 = time.perf_counter()
+    try:
+        yield record
+        record.setdefault("status", "ok")
+    except Exception as exc:
+        record["status"] = "error"
+        record["error"] = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        record["duration_ms"] = (time.perf_counter() - t0) * 1000
+        sink.append(record)
+
+
+def add_usage(record: Span, usage: Any) -> None:
+    """Accumulate an OpenAI `usage` object (may be None) into a span."""
+    record["llm_calls"] = record.get("llm_calls", 0) + 1
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    counts = {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+    }
+    for key, value in counts.items():
+        record[key] = record.get(key, 0) + value
+    if counts["cached_tokens"]:
+        record["cache_hit"] = True
+
+
+def totals(spans: Sequence[Span]) -> dict[str, Any]:
+    """Totals over top-level spans for time and over all spans for counters."""
+    out: dict[str, Any] = {
+        "duration_ms": sum(s["duration_ms"] for s in spans if not s.get("parent")),
+        "bytes": sum(s.get("bytes", 0) for s in spans),
+    }
+    for key in _TOKEN_FIELDS:
+        out[key] = sum(s.get(key, 0) for s in spans)
+    return out
+
+
+def summary_table(spans: Sequence[Span]) -> str:
+    """Fixed-width table in start order; sandbox phases indented under their node."""
+    header = ("span", "ms", "bytes", "tokens in/out", "cached", "hit", "status")
+    rows = [header]
+    for s in sorted(spans, key=lambda s: s["start"]):
+        name = f"  {s['name']}" if s.get("parent") else s["name"]
+        tokens = (
+            f"{s['prompt_tokens']}/{s['completion_tokens']}"
+            if "prompt_tokens" in s
+            else ""
+        )
+        rows.append(
+            (
+                name,
+                f"{s['duration_ms']:.1f}",
+                str(s["bytes"]) if "bytes" in s else "",
+                tokens,
+                str(s["cached_tokens"]) if "cached_tokens" in s else "",
+                "yes" if s.get("cache_hit") else "",
+                s.get("status", ""),
+            )
+        )
+    total = totals(spans)
+    rows.append(
+        (
+            "total",
+            f"{total['duration_ms']:.1f}",
+            str(total["bytes"]),
+            f"{total['prompt_tokens']}/{total['completion_tokens']}",
+            str(total["cached_tokens"]),
+            "",
+            "",
+        )
+    )
+
+    widths = [max(len(r[i]) for r in rows) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.ljust(w) for cell, w in zip(r, widths)).rstrip() for r in rows
+    )
+
+
+def write_spans_json(spans: Sequence[Span], path: str | Path) -> Path:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"spans": list(spans), "totals": totals(spans)}
+    target.write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
+    return target
@@ -1,12 +1,35 @@
 from __future__ import annotations
 
 import re
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
-
-from e2b import Sandbox
+from typing import Any, Callable, Dict, List, Sequence
 
 DEFAULT_OUTPUT_PATH = "outputs/output.parquet"
+MAX_LOG_CHARS = 64 * 1024  # per stream; older output is dropped, not buffered
+
+# Receives (stream, text) as output arrives: stream is "trace", "stdout" or "stderr".
+OutputCallback = Callable[[str, str], None]
+
+
+class _Tail:
+    """Keeps only the last `limit` characters written to a stream."""
+
+    def __init__(self, limit: int = MAX_LOG_CHARS) -> None:
+        self.limit = limit
+        self.chunks: deque[str] = deque()
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        self.chunks.append(text)
+        self.size += len(text)
+        # Drop whole chunks only while the rest still covers the limit.
+        while len(self.chunks) > 1 and self.size - len(self.chunks[0]) >= self.limit:
+            self.size -= len(self.chunks.popleft())
+
+    def text(self) -> str:
+        return "".join(self.chunks)[-self.limit :]
 
 
 def parse_etl_instruction(instruction: str) -> Dict[str, Any]:
@@ -21,6 +44,10 @@ def parse_etl_instruction(instruction: str) -> Dict[str, Any]:
         "columns": [],
         "filters": [],
         "filters_raw": None,
+        "group_by": [],
+        "aggs": [],
+        "sort": [],
+        "top_k": None,
     }
 
     path_match = re.search(r"`([^`]+)`", instruction)
@@ -57,45 +84,331 @@ def parse_etl_instruction(instruction: str) -> Dict[str, Any]:
     return base
 
 
-def _render_filter(filter_spec: Dict[str, Any]) -> str:
+# op -> (expression method, negated, keyword arguments). Both the rendered
+# script (_render_filter) and the compiled plan (prestage.filter_expr) are
+# built from this table, so sandbox and local runs keep the same rows.
+FILTER_OPS: Dict[str, tuple[str, bool, Dict[str, Any]]] = {
+    "==": ("eq", False, {}),
+    "!=": ("ne", False, {}),
+    ">": ("gt", False, {}),
+    ">=": ("ge", False, {}),
+    "<": ("lt", False, {}),
+    "<=": ("le", False, {}),
+    "in": ("is_in", False, {}),
+    "not in": ("is_in", True, {}),
+    "contains": ("str.contains", False, {"literal": True}),
+    "startswith": ("str.starts_with", False, {}),
+    "endswith": ("str.ends_with", False, {}),
+}
+
+
+def filter_call(
+    filter_spec: Dict[str, Any],
+) -> tuple[str, str, bool, Any, Dict[str, Any]] | None:
+    """
+    (column, method, negated, value, kwargs) for a filter, with the value
+    normalized for its method; None (keep every row) without a column or
+    for an unknown op.
+    """
     column = filter_spec.get("column")
-    op = filter_spec.get("op", "==")
+    op = FILTER_OPS.get(str(filter_spec.get("op", "==")).lower())
+    if column is None or op is None:
+        return None
+    method, negated, kwargs = op
     value = filter_spec.get("value")
+    if method == "is_in":
+        value = list(value) if isinstance(value, (list, tuple, set)) else [value]
+    elif method.startswith("str."):
+        value = str(value)
+    return column, method, negated, value, kwargs
 
-    if column is None:
+
+def _render_filter(filter_spec: Dict[str, Any]) -> str:
+    call = filter_call(filter_spec)
+    if call is None:
         return "pl.lit(True)"
+    column, method, negated, value, kwargs = call
+    args = "".join([repr(value)] + [f", {k}={v!r}" for k, v in kwargs.items()])
+    return f"{'~' if negated else ''}pl.col({column!r}).{method}({args})"
+
+
+JOIN_TYPES = frozenset({"inner", "left", "semi", "anti"})
+BROADCAST_BYTES = 64 * 1024 * 1024  # join tables up to this size are collected once
+AGG_OPS = frozenset(
+    {"sum", "mean", "min", "max", "median", "std", "count", "n_unique", "first", "last"}
+)
+
+
+def agg_specs(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Normalized `aggs` as [{column, op, alias}]. A group_by without aggs counts
+    rows; a count without a column counts rows too. Unknown ops (and entries
+    that are not dicts) are dropped.
+    """
+    raw = spec.get("aggs") or []
+    if not raw and spec.get("group_by"):
+        raw = [{"op": "count"}]
+    out: List[Dict[str, Any]] = []
+    for agg in raw:
+        op = str(agg.get("op", "")).lower() if isinstance(agg, dict) else ""
+        if op not in AGG_OPS:
+            continue
+        column = agg.get("column")
+        column = None if column in (None, "", "*") else column
+        if column is None and op != "count":
+            continue
+        alias = agg.get("alias") or (f"{column}_{op}" if column else "count")
+        out.append({"column": column, "op": op, "alias": alias})
+    return out
+
+
+def sort_keys(spec: Dict[str, Any]) -> List[tuple[str, bool]]:
+    """
+    `sort` as [(column, descending)]; bare strings sort ascending. Entries
+    that are neither a string nor a dict with a column are dropped.
+    """
+    keys: List[tuple[str, bool]] = []
+    for item in spec.get("sort") or []:
+        if isinstance(item, str):
+            keys.append((item, False))
+        elif isinstance(item, dict) and item.get("column"):
+            keys.append((item["column"], bool(item.get("descending", False))))
+    return keys
+
+
+def top_k_spec(spec: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    `top_k` as {k, by: [cols], descending}; descending=True keeps the largest.
+    None unless it is a dict with both `k` and `by`.
+    """
+    top = spec.get("top_k")
+    if not isinstance(top, dict) or not top.get("k") or not top.get("by"):
+        return None
+    by = top["by"] if isinstance(top["by"], list) else [top["by"]]
+    return {"k": int(top["k"]), "by": by, "descending": top.get("descending", True)}
 
-    op_normalized = str(op).lower()
-    allowed_binary = {"==", "!=", ">", ">=", "<", "<=", "in", "not in"}
-    allowed_string = {"contains", "startswith", "endswith"}
 
-    if op_normalized in allowed_binary:
-        if op_normalized in {"in", "not in"}:
-            if isinstance(value, (list, tuple, set)):
-                return f"pl.col({column!r}).is_in({list(value)!r})"
-            return f"pl.col({column!r}).is_in([{value!r}])"
-        return f"pl.col({column!r}) {op} {value!r}"
+def join_specs(
+    spec: Dict[str, Any], *, broadcast_bytes: int | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Normalized `joins` as [{path, on, how, columns, strategy, prefilter}].
+
+    Tables up to `broadcast_bytes` (default BROADCAST_BYTES) on local disk
+    are "broadcast": collected once in the script and probed by the streaming
+    main input. Larger (or unknown-size) tables are "stream"ed; for inner/left
+    joins they are first semi-joined against the main input's keys so only
+    matching rows reach the join. Entries that are not dicts, lack a path or
+    keys, or have an unknown `how` are dropped.
+    """
+    limit = BROADCAST_BYTES if broadcast_bytes is None else broadcast_bytes
+    out: List[Dict[str, Any]] = []
+    for join in spec.get("joins") or []:
+        if not isinstance(join, dict):
+            continue
+        on = join.get("on")
+        on = [on] if isinstance(on, str) else list(on or [])
+        how = str(join.get("how", "inner")).lower()
+        if not join.get("path") or not on or how not in JOIN_TYPES:
+            continue
+        path = Path(join["path"])
+        size = path.stat().st_size if path.is_file() else None
+        strategy = "broadcast" if size is not None and size <= limit else "stream"
+        out.append(
+            {
+                "path": join["path"],
+                "on": on,
+                "how": how,
+                # semi/anti only test key membership
+                "columns": [] if how in {"semi", "anti"} else join.get("columns") or [],
+                "strategy": strategy,
+                "prefilter": strategy == "stream" and how in {"inner", "left"},
+            }
+        )
+    return out
+
+
+@lru_cache(maxsize=64)
+def _schema_names(path: str, size: int, mtime_ns: int) -> tuple[str, ...] | None:
+    # size and mtime only key the cache: a rewritten file is read again.
+    import polars as pl
+
+    from ..ingestion.exceptions import IngestionError
+    from ..ingestion.reader import scan_file
+
+    try:
+        return tuple(scan_file(path).collect_schema().names())
+    except (IngestionError, pl.exceptions.PolarsError, OSError):
+        return None
+
+
+def _source_columns(path: str | None) -> tuple[str, ...]:
+    """Column names of a local source; empty when it cannot be read here."""
+    source = Path(path) if path else None
+    if source is None or not source.is_file():
+        return ()
+    stat = source.stat()
+    names = _schema_names(str(source.resolve()), stat.st_size, stat.st_mtime_ns)
+    return names or ()
+
+
+def joined_columns(spec: Dict[str, Any]) -> set[str]:
+    """
+    Columns that come from a join table rather than the main input: the
+    `columns` a join lists, or, for a join that lists none, every non-key
+    column of its table that the main input lacks.
+    """
+    joined: set[str] = set()
+    main: set[str] | None = None
+    for j in join_specs(spec):
+        if j["columns"]:
+            joined.update(c for c in j["columns"] if c not in j["on"])
+        elif j["how"] in {"inner", "left"}:
+            if main is None:
+                main = set(_source_columns(spec.get("input_path")))
+            table = _source_columns(j["path"])
+            joined.update(c for c in table if c not in j["on"] and c not in main)
+    return joined
+
+
+def split_filters(
+    spec: Dict[str, Any],
+) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    `filters` as (pre-join, post-join): a filter on a column that a join table
+    provides can only run once the joins are done; the rest filter the main
+    input before it is joined.
+    """
+    joined = joined_columns(spec)
+    pre: List[Dict[str, Any]] = []
+    post: List[Dict[str, Any]] = []
+    for fspec in spec.get("filters") or []:
+        (post if fspec.get("column") in joined else pre).append(fspec)
+    return pre, post
+
+
+def reduces_rows(spec: Dict[str, Any]) -> bool:
+    """True when rows are joined, aggregated or reordered: `limit` comes last."""
+    return bool(
+        spec.get("joins") or agg_specs(spec) or sort_keys(spec) or top_k_spec(spec)
+    )
 
-    if op_normalized in allowed_string:
-        return f"pl.col({column!r}).str.{op_normalized}({value!r})"
 
-    return "pl.lit(True)"
+def input_columns(spec: Dict[str, Any]) -> List[str]:
+    """
+    Projection applied right after the scan: `columns` plus the join keys and
+    anything the grouping, aggregation and ordering need, minus columns that
+    join tables provide (see `joined_columns`). Empty keeps every column.
+    """
+    columns: List[str] = list(spec.get("columns") or [])
+    if not columns:
+        return []
+    joined = joined_columns(spec)
+    columns = [c for c in columns if c not in joined]
+    needed = [k for j in join_specs(spec) for k in j["on"]]
+    needed += list(spec.get("group_by") or [])
+    needed += [a["column"] for a in agg_specs(spec) if a["column"]]
+    if not agg_specs(spec):
+        needed += [c for c, _ in sort_keys(spec)]
+        top = top_k_spec(spec)
+        needed += top["by"] if top else []
+    needed = [c for c in needed if c not in joined]
+    return columns + [c for c in dict.fromkeys(needed) if c not in columns]
+
+
+def output_columns(spec: Dict[str, Any]) -> List[str]:
+    """
+    Projection applied last: `columns` plus the columns joins were asked for,
+    dropping the keys that were only read to join, sort or rank. Empty when
+    grouping or aggregating decides the output, or nothing was requested.
+    """
+    columns: List[str] = list(spec.get("columns") or [])
+    if not columns or spec.get("group_by") or agg_specs(spec):
+        return []
+    extra = [c for j in join_specs(spec) for c in j["columns"] if c not in j["on"]]
+    return columns + [c for c in dict.fromkeys(extra) if c not in columns]
+
+
+def _render_joins(spec: Dict[str, Any]) -> str:
+    """Source lines joining each table onto the filtered main input."""
+    lines: List[str] = []
+    for j in join_specs(spec):
+        on = j["on"]
+        lines.append(f"    right = _scan_frame({j['path']!r}, 'auto')")
+        if j["how"] in {"semi", "anti"}:
+            lines.append(f"    right = right.select({on!r}).unique()")
+        elif j["columns"]:
+            keep = on + [c for c in j["columns"] if c not in on]
+            lines.append(f"    right = right.select({keep!r})")
+        if j["prefilter"]:
+            # Cached so the key prefilter and the join share one scan.
+            lines.append("    lf = lf.cache()")
+            lines.append(
+                f"    right = right.join(lf.select({on!r}).unique(), "
+                f"on={on!r}, how='semi')"
+            )
+        if j["strategy"] == "broadcast":
+            lines.append("    right = right.collect().lazy()  # small: build once")
+        lines.append(f"    lf = lf.join(right, on={on!r}, how={j['how']!r})")
+        lines.append(f"    _progress('join_planned', table={j['path']!r})")
+    return "\n".join(lines)
+
+
+def _render_agg(agg: Dict[str, Any]) -> str:
+    if agg["column"] is None:
+        return f"pl.len().alias({agg['alias']!r})"
+    return f"pl.col({agg['column']!r}).{agg['op']}().alias({agg['alias']!r})"
+
+
+def _render_reductions(spec: Dict[str, Any]) -> str:
+    """Source lines for the grouping/ordering part of the generated plan."""
+    lines: List[str] = []
+    aggs = ", ".join(_render_agg(a) for a in agg_specs(spec))
+    group_by = spec.get("group_by") or []
+    if group_by:
+        lines.append(f"    lf = lf.group_by({list(group_by)!r}).agg([{aggs}])")
+    elif aggs:
+        lines.append(f"    lf = lf.select([{aggs}])")
+
+    top = top_k_spec(spec)
+    keys = sort_keys(spec)
+    if top:
+        # Keeps k rows per batch instead of sorting everything.
+        method = "top_k" if top["descending"] else "bottom_k"
+        lines.append(
+            f"    lf = lf.{method}({top['k']}, by={top['by']!r})"
+            f".sort({top['by']!r}, descending={bool(top['descending'])!r})"
+        )
+    elif keys:
+        # Polars fuses a sort followed by a limit into a partial (top-k) sort.
+        lines.append(
+            f"    lf = lf.sort({[c for c, _ in keys]!r}, "
+            f"descending={[d for _, d in keys]!r}, nulls_last=True)"
+        )
+    return "\n".join(lines)
 
 
 def generate_polars_code(spec: Dict[str, Any]) -> str:
     input_path = spec.get("input_path") or "data.json"
     output_path = spec.get("output_path") or DEFAULT_OUTPUT_PATH
-    columns: List[str] = spec.get("columns") or []
-    filters: List[Dict[str, Any]] = spec.get("filters") or []
+    columns = input_columns(spec)
+    output_cols = output_columns(spec)
+    filters, joined_filters = split_filters(spec)
     limit = spec.get("limit")
     fmt = (spec.get("format") or "auto").lower()
 
     filter_lines = "\n".join(
         [f"    exprs.append({_render_filter(fspec)})" for fspec in filters]
     )
+    joined_filter_lines = "\n".join(
+        [f"    exprs.append({_render_filter(fspec)})" for fspec in joined_filters]
+    )
+    join_lines = _render_joins(spec)
+    reduction_lines = _render_reductions(spec)
 
     code = f"""
 import json
+import time
 from pathlib import Path
 
 import polars as pl
@@ -103,24 +416,32 @@ import polars as pl
 INPUT_PATH = {input_path!r}
 OUTPUT_PATH = {output_path!r}
 COLUMNS = {columns!r}
+OUTPUT_COLUMNS = {output_cols!r}
 LIMIT = {limit if limit is not None else 'None'}
 FILE_FORMAT = {fmt!r}
+_T0 = time.perf_counter()
+
+
+def _progress(stage: str, **fields: object) -> None:
+    elapsed = time.perf_counter() - _T0
+    extra = " ".join(f"{{k}}={{v}}" for k, v in fields.items())
+    print(f"[progress] {{elapsed:7.2f}}s {{stage}} {{extra}}".rstrip(), flush=True)
 
 
-def _read_frame(path: str, file_format: str) -> pl.DataFrame:
+def _scan_frame(path: str, file_format: str) -> pl.LazyFrame:
     target = Path(path)
     fmt = (file_format or target.suffix.lstrip('.')).lower()
     if fmt == 'auto':
         fmt = target.suffix.lstrip('.').lower()
     if fmt in ('csv',):
-        return pl.read_csv(target)
+        return pl.scan_csv(target)
     if fmt in ('ndjson', 'jsonl'):
-        return pl.read_ndjson(target)
+        return pl.scan_ndjson(target)
     if fmt in ('json',):
-        return pl.read_json(target)
+        return pl.read_json(target).lazy()
     if fmt in ('parquet',):
-        return pl.read_parquet(target)
-    return pl.read_csv(target)
+        return pl.scan_parquet(target)
+    return pl.scan_csv(target)
 
 
 def _build_filter_exprs() -> list[pl.Expr]:
@@ -129,28 +450,47 @@ def _build_filter_exprs() -> list[pl.Expr]:
     return exprs
 
 
-def run() -> None:
-    df = _read_frame(INPUT_PATH, FILE_FORMAT)
-    if COLUMNS:
-        df = df.select([pl.col(name) for name in COLUMNS])
+def _build_joined_filter_exprs() -> list[pl.Expr]:
+    exprs: list[pl.Expr] = []
+{joined_filter_lines}
+    return exprs
 
-    filter_exprs = [expr for expr in _build_filter_exprs() if expr is not None]
-    for expr in filter_exprs:
-        df = df.filter(expr)
 
+def _build_plan() -> pl.LazyFrame:
+    lf = _scan_frame(INPUT_PATH, FILE_FORMAT)
+    if COLUMNS:
+        lf = lf.select([pl.col(name) for name in COLUMNS])
+    for expr in _build_filter_exprs():
+        lf = lf.filter(expr)
+{join_lines}
+    for expr in _build_joined_filter_exprs():
+        lf = lf.filter(expr)
+{reduction_lines}
+    if OUTPUT_COLUMNS:
+        lf = lf.select([pl.col(name) for name in OUTPUT_COLUMNS])
     if LIMIT:
-        df = df.head(int(LIMIT))
+        lf = lf.head(int(LIMIT))
+    return lf
+
 
+def run() -> None:
+    _progress("read_start", path=INPUT_PATH)
+    lf = _build_plan()
     out_target = Path(OUTPUT_PATH)
     out_target.parent.mkdir(parents=True, exist_ok=True)
-    if out_target.suffix.lower() in ('.parquet',):
-        df.write_parquet(out_target)
-    elif out_target.suffix.lower() in ('.json', '.ndjson', '.jsonl'):
-        df.write_ndjson(out_target)
+    suffix = out_target.suffix.lower()
+    if suffix in ('.parquet',):
+        lf.sink_parquet(out_target, engine="streaming")
+        rows = pl.scan_parquet(out_target).select(pl.len()).collect().item()
+    elif suffix in ('.json', '.ndjson', '.jsonl'):
+        lf.sink_ndjson(out_target, engine="streaming")
+        rows = pl.scan_ndjson(out_target).select(pl.len()).collect().item()
     else:
-        df.write_csv(out_target)
+        lf.sink_csv(out_target, engine="streaming")
+        rows = pl.scan_csv(out_target).select(pl.len()).collect().item()
 
-    print(f"Wrote {{len(df)}} rows to {{out_target}}")
+    _progress("write_done", rows=rows)
+    print(f"Wrote {{rows}} rows to {{out_target}}")
 
 
 if __name__ == "__main__":
@@ -159,67 +499,144 @@ if __name__ == "__main__":
     return code
 
 
+def _create_sandbox() -> Any:
+    # Always a real E2B sandbox. Tests and scripts/load_test.py replace this
+    # function with LocalSandbox.create; nothing in the environment can make
+    # production code run generated scripts on the host.
+    # e2b is imported on first execution, not when the CLI starts.
+    from e2b import Sandbox
+
+    return Sandbox.create()
+
+
 def execute_in_e2b(
     code: str,
     *,
     output_path: str | None = None,
     input_path: str | None = None,
+    on_output: OutputCallback | None = None,
+    local_output: str | None = None,
+    sandbox: Any | None = None,
+    extra_inputs: Sequence[str] = (),
 ) -> Dict[str, Any]:
+    """
+    Run `code` in an E2B sandbox and stream the artifact to `local_output`
+    (defaults to `output_path`, relative to the current directory).
+
+    Command output is forwarded to `on_output` as it arrives; only the last
+    MAX_LOG_CHARS of each stream are kept in the returned logs. Input and
+    artifact move through `transfer` in compressed chunks. Pass a live
+    `sandbox` to reuse it: it is not killed here, and unchanged inputs are
+    not uploaded again.
+    """
+    from .spans import Span, span
+    from .transfer import forget, transfer_for
+
     trace: list[str] = []
-    sandbox = Sandbox.create()
-    workdir = "/home/sandbox"
+    spans: list[Span] = []
+    owns_sandbox = sandbox is None
+    with span("create", spans, kind="sandbox", cache_hit=not owns_sandbox):
+        if sandbox is None:
+            sandbox = _create_sandbox()
+    workdir = getattr(sandbox, "workdir", "/home/sandbox")
+    transfer = transfer_for(sandbox, workdir)
+    transfers: Dict[str, Any] = {}
     remote_code_path = f"{workdir}/code.py"
     install_log: Dict[str, Any] = {}
     exec_log: Dict[str, Any] = {"stdout": "", "stderr": "", "exit_code": -1}
-    artifact_bytes = None
+    artifact_local_path = None
     remote_output = output_path
 
+    def _emit(stream: str, text: str) -> None:
+        if on_output is not None:
+            on_output(stream, text)
+
+    def _trace(line: str) -> None:
+        trace.append(line)
+        _emit("trace", line)
+
     def _run(cmd: str) -> Dict[str, Any]:
-        trace.append(f"$ {cmd}")
+        _trace(f"$ {cmd}")
+        out, err = _Tail(), _Tail()
+
+        def _on_stdout(text: str) -> None:
+            out.write(text)
+            _emit("stdout", text)
+
+        def _on_stderr(text: str) -> None:
+            err.write(text)
+            _emit("stderr", text)
+
         try:
-            res = sandbox.commands.run(cmd, cwd=workdir)
+            res = sandbox.commands.run(
+                cmd, cwd=workdir, on_stdout=_on_stdout, on_stderr=_on_stderr
+            )
             return {
-                "stdout": getattr(res, "stdout", ""),
-                "stderr": getattr(res, "stderr", ""),
+                "stdout": out.text(),
+                "stderr": err.text(),
                 "exit_code": getattr(res, "exit_code", 0),
             }
         except Exception as exc:
-            return {"stdout": "", "stderr": str(exc), "exit_code": -1}
+            err.write(str(exc))
+            return {
+                "stdout": out.text(),
+                "stderr": err.text(),
+                "exit_code": getattr(exc, "exit_code", -1),
+            }
 
     try:
+        # The helper scripts in `transfer` need pyarrow, so install first.
+        with span("install", spans, kind="sandbox") as record:
+            install_log = _run("python -c 'import polars, pyarrow'")
+            record["cache_hit"] = install_log["exit_code"] == 0
+            if not record["cache_hit"]:
+                install_log = _run("pip install --quiet polars pyarrow")
+
         # Upload input data if available
-        remote_input = None
-        if input_path:
-            local_input = Path(input_path)
-            if local_input.exists() and local_input.is_file():
-                remote_input = f"{workdir}/{local_input.as_posix()}"
-                parent = Path(remote_input).parent.as_posix()
-                if parent:
-                    _run(f"mkdir -p {parent}")
-                sandbox.files.write(remote_input, local_input.read_bytes())
-                trace.append(f"Uploaded input -> {remote_input}")
+        for path in dict.fromkeys(p for p in (input_path, *extra_inputs) if p):
+            local_input = Path(path)
+            if not local_input.is_file():
+                continue
+            try:
+                remote_input = local_input.as_posix().lstrip("/")
+                with span("upload", spans, kind="sandbox", path=path) as record:
+                    up = transfer.upload(local_input, remote_input)
+                    record.update(bytes=up["bytes_sent"], cache_hit=up["skipped"])
+                transfers.setdefault("uploads", []).append(up)
+                verb = "Reused" if up["skipped"] else "Uploaded"
+                _trace(f"{verb} input -> {up['remote']}")
+            except Exception as exc:
+                _trace(f"Input upload failed: {exc}")
 
         sandbox.files.write(remote_code_path, code)
-        trace.append(f"Wrote code -> {remote_code_path}")
+        _trace(f"Wrote code -> {remote_code_path}")
 
-        install_log = _run("pip install --quiet polars pyarrow")
-        exec_log = _run(f"python {remote_code_path}")
+        with span("run", spans, kind="sandbox") as record:
+            exec_log = _run(f"python -u {remote_code_path}")
+            if exec_log["exit_code"] != 0:
+                record.update(status="error", exit_code=exec_log["exit_code"])
 
         if output_path:
             remote_output = output_path
             if not output_path.startswith("/"):
                 remote_output = f"{workdir}/{output_path}"
             try:
-                artifact_bytes = sandbox.files.read(remote_output, format="bytes")
-                trace.append(f"Downloaded artifact <- {remote_output}")
+                with span("download", spans, kind="sandbox") as record:
+                    down = transfer.download(remote_output, local_output or output_path)
+                    record["bytes"] = down["bytes_received"]
+                transfers["download"] = down
+                artifact_local_path = down["local"]
+                _trace(f"Downloaded artifact <- {remote_output}")
             except Exception as exc:
-                trace.append(f"Artifact read failed: {exc}")
-                artifact_bytes = None
+                _trace(f"Artifact download failed: {exc}")
     finally:
-        try:
-            sandbox.kill()
-        except Exception:
-            trace.append("Sandbox cleanup failed")
+        if owns_sandbox:
+            forget(sandbox)
+            try:
+                with span("kill", spans, kind="sandbox"):
+                    sandbox.kill()
+            except Exception:
+                _trace("Sandbox cleanup failed")
 
     return {
         "install": install_log,
@@ -227,6 +644,8 @@ def execute_in_e2b(
         "stderr": exec_log.get("stderr", ""),
         "exit_code": exec_log.get("exit_code", 0),
         "artifact_path": remote_output or output_path,
-        "artifact_bytes": artifact_bytes,
+        "artifact_local_path": artifact_local_path,
+        "transfer": transfers,
+        "spans": spans,
         "trace": trace,
     }
@@ -1,46 +1,315 @@
+"""
+Run tracing that never blocks the CLI.
+
+start_run/finish_run only enqueue events; a daemon thread drains the bounded
+queue in batches and hands them to the configured backends (LangSmith when
+LANGSMITH_API_KEY is set, a JSONL file when POLARSPIPE_TRACE_FILE is set).
+When the queue is full events are dropped and counted. Pending events are
+flushed at interpreter exit.
+"""
+
 from __future__ import annotations
 
+import atexit
+import json
+import logging
 import os
-from typing import Any, Dict
+import queue
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Protocol, Sequence
 from uuid import uuid4
 
-try:
-    from langsmith import Client  # type: ignore
-except Exception:  # pragma: no cover - optional dependency guard
-    Client = None  # type: ignore
+logger = logging.getLogger(__name__)
 
+MAX_QUEUE = 1000
+BATCH_SIZE = 50
+FLUSH_INTERVAL_S = 1.0
+EXIT_FLUSH_TIMEOUT_S = 5.0
+MAX_PAYLOAD_BYTES = 256 * 1024
+MAX_STRING_CHARS = 16 * 1024
+# Large values that never belong in a trace, whatever their size.
+DROP_KEYS = frozenset({"artifact_bytes"})
 
-def start_run(name: str, inputs: Dict[str, Any]) -> str | None:
+Event = Dict[str, Any]
+
+
+class TraceBackend(Protocol):
+    def send(self, batch: Sequence[Event]) -> None: ...
+
+
+def _client_cls() -> Any:
     """
-    Start a LangSmith run if LANGSMITH_API_KEY is configured.
-    Returns run_id or None on failure/disabled.
+    Import langsmith on first use so untraced runs never pay for it.
+    Returns None when the optional dependency is missing.
     """
-    if Client is None or not os.getenv("LANGSMITH_API_KEY"):
-        return None
     try:
-        client = Client()
-        project = os.getenv("LANGSMITH_PROJECT", "polarspipe")
-        run_id = str(uuid4())
-        client.create_run(
-            name=name,
-            inputs=inputs,
-            project_name=project,
-            run_type="chain",
-            tags=["polarspipe", "cli"],
-            extra={"runtime": "cli"},
-            id=run_id,
+        from langsmith import Client
+    except Exception:  # pragma: no cover - optional dependency guard
+        return None
+    return Client
+
+
+class LangSmithBackend:
+    """One client for the process; each batch is a single ingest call."""
+
+    def __init__(self, project: str | None = None) -> None:
+        self.project = project or os.getenv("LANGSMITH_PROJECT", "polarspipe")
+        self._client: Any = None
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            Client = _client_cls()
+            if Client is None:
+                raise RuntimeError("langsmith is not installed")
+            self._client = Client()
+        return self._client
+
+    def send(self, batch: Sequence[Event]) -> None:
+        create: list[dict[str, Any]] = []
+        update: list[dict[str, Any]] = []
+        for event in batch:
+            run = {
+                "id": event["run_id"],
+                "trace_id": event["run_id"],
+                "dotted_order": event["dotted_order"],
+            }
+            if event["type"] == "start":
+                create.append(
+                    {
+                        **run,
+                        "name": event["name"],
+                        "inputs": event["payload"],
+                        "run_type": "chain",
+                        "start_time": event["time"],
+                        "session_name": self.project,
+                        "tags": ["polarspipe", "cli"],
+                        "extra": {"runtime": "cli"},
+                    }
+                )
+            else:
+                update.append(
+                    {**run, "outputs": event["payload"], "end_time": event["time"]}
+                )
+        self._get_client().batch_ingest_runs(create=create, update=update)
+
+
+class JsonlBackend:
+    """Appends one JSON line per event; a local stand-in for a tracing service."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def send(self, batch: Sequence[Event]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fh:
+            for event in batch:
+                fh.write(json.dumps(event, default=str) + "\n")
+
+
+def _shrink(value: Any, max_chars: int) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + f"...[+{len(value) - max_chars} chars]"
+    if isinstance(value, dict):
+        return {
+            k: _shrink(v, max_chars) for k, v in value.items() if k not in DROP_KEYS
+        }
+    if isinstance(value, (list, tuple)):
+        return [_shrink(v, max_chars) for v in value]
+    return value
+
+
+def sanitize_payload(
+    payload: Dict[str, Any],
+    *,
+    max_bytes: int = MAX_PAYLOAD_BYTES,
+    max_chars: int = MAX_STRING_CHARS,
+) -> tuple[Dict[str, Any], bool]:
+    """
+    Strip binary values and DROP_KEYS, clip long strings, and replace the
+    payload with a stub if it is still over `max_bytes`. Returns
+    (payload, truncated).
+    """
+    shrunk = _shrink(payload, max_chars)
+    size = len(json.dumps(shrunk, default=str))
+    if size <= max_bytes:
+        return shrunk, shrunk != payload
+    return {"truncated": True, "size": size, "keys": sorted(payload)}, True
+
+
+class TraceExporter:
+    """Bounded queue + daemon worker that flushes batches to the backends."""
+
+    def __init__(
+        self,
+        backends: Sequence[TraceBackend],
+        *,
+        max_queue: int = MAX_QUEUE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_S,
+        max_payload_bytes: int = MAX_PAYLOAD_BYTES,
+    ) -> None:
+        self.backends = list(backends)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_payload_bytes = max_payload_bytes
+        self.counters = {
+            "enqueued": 0,
+            "exported": 0,
+            "dropped": 0,
+            "failed": 0,
+            "truncated": 0,
+        }
+        self._queue: queue.Queue[Event] = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(
+            target=self._loop, name="polarspipe-trace-exporter", daemon=True
         )
-        return run_id
-    except Exception:
+        self._worker.start()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += n
+
+    def submit(self, event: Event) -> bool:
+        """Enqueue without blocking; False (and a dropped count) when full."""
+        payload, truncated = sanitize_payload(
+            event.get("payload") or {}, max_bytes=self.max_payload_bytes
+        )
+        if truncated:
+            self._count("truncated")
+        try:
+            self._queue.put_nowait({**event, "payload": payload})
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def _drain(self, first: Event) -> list[Event]:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: list[Event]) -> None:
+        ok = True
+        for backend in self.backends:
+            try:
+                backend.send(batch)
+            except Exception as exc:
+                ok = False
+                logger.debug({"stage": "trace_export", "error": str(exc)})
+        self._count("exported" if ok else "failed", len(batch))
+        for _ in batch:
+            self._queue.task_done()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._export(self._drain(first))
+
+    def flush(self, timeout: float = EXIT_FLUSH_TIMEOUT_S) -> bool:
+        """Wait up to `timeout` seconds for queued events to be exported."""
+        done = threading.Event()
+
+        def _join() -> None:
+            self._queue.join()
+            done.set()
+
+        threading.Thread(target=_join, daemon=True).start()
+        return done.wait(timeout)
+
+    def close(self, timeout: float = EXIT_FLUSH_TIMEOUT_S) -> None:
+        self.flush(timeout)
+        self._stop.set()
+        self._worker.join(timeout=self.flush_interval + 0.1)
+        logger.debug({"stage": "trace_exporter_closed", **self.stats()})
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self.counters, "queued": self._queue.qsize()}
+
+
+_exporter: TraceExporter | None = None
+_exporter_lock = threading.Lock()
+# run_id -> start event ordering key, needed again when the run is finished.
+_dotted_orders: dict[str, str] = {}
+
+
+def _backends_from_env() -> list[TraceBackend]:
+    backends: list[TraceBackend] = []
+    if os.getenv("LANGSMITH_API_KEY"):
+        backends.append(LangSmithBackend())
+    trace_file = os.getenv("POLARSPIPE_TRACE_FILE")
+    if trace_file:
+        backends.append(JsonlBackend(trace_file))
+    return backends
+
+
+def get_exporter() -> TraceExporter | None:
+    """Process-wide exporter built from the environment; None when disabled."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            backends = _backends_from_env()
+            if not backends:
+                return None
+            _exporter = TraceExporter(backends)
+            atexit.register(_exporter.close)
+        return _exporter
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def start_run(name: str, inputs: Dict[str, Any]) -> str | None:
+    """
+    Queue the start of a traced run. Returns its run_id, or None when no
+    backend is configured (LANGSMITH_API_KEY / POLARSPIPE_TRACE_FILE).
+    """
+    exporter = get_exporter()
+    if exporter is None:
         return None
+    run_id = str(uuid4())
+    started = _now()
+    dotted_order = f"{started:%Y%m%dT%H%M%S%fZ}{run_id}"
+    _dotted_orders[run_id] = dotted_order
+    exporter.submit(
+        {
+            "type": "start",
+            "run_id": run_id,
+            "dotted_order": dotted_order,
+            "name": name,
+            "time": started.isoformat(),
+            "payload": inputs,
+        }
+    )
+    return run_id
 
 
 def finish_run(run_id: str | None, outputs: Dict[str, Any]) -> None:
-    """Mark a LangSmith run as finished if enabled."""
-    if Client is None or not run_id:
-        return
-    try:
-        client = Client()
-        client.update_run(run_id, outputs=outputs)
-    except Exception:
+    """Queue the outputs of a run started with start_run."""
+    exporter = get_exporter()
+    if not run_id or exporter is None:
         return
+    exporter.submit(
+        {
+            "type": "finish",
+            "run_id": run_id,
+            "dotted_order": _dotted_orders.pop(run_id, run_id),
+            "time": _now().isoformat(),
+            "payload": outputs,
+        }
+    )
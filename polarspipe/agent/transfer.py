@@ -0,0 +1,263 @@
+"""
+Chunked, zstd-compressed file transfer between the client and a sandbox.
+
+Files move as a sequence of independently compressed parts plus a JSON
+manifest, so neither side holds more than one chunk in memory. A small helper
+script inside the sandbox joins (upload) or splits (download) the parts.
+Uploads are content-addressed: a file whose sha256 matches what the sandbox
+already holds at the same path is not sent again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import shlex
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 8 * 1024 * 1024  # raw bytes per part; bounds memory on both sides
+COMPRESSION_LEVEL = 3
+TRANSFER_DIR = ".transfer"
+HASH_SUFFIX = ".sha256"  # must match the marker written by the helper
+
+_HELPER = r"""
+import json
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+
+
+def unpack(manifest_path):
+    manifest = json.loads(Path(manifest_path).read_text())
+    codec = pa.Codec(manifest["codec"])
+    target = Path(manifest["target"])
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".part")
+    with partial.open("wb") as out:
+        for part in manifest["parts"]:
+            p = Path(part["path"])
+            out.write(
+                codec.decompress(
+                    p.read_bytes(), decompressed_size=part["raw_bytes"], asbytes=True
+                )
+            )
+            p.unlink()
+    partial.replace(target)
+    Path(str(target) + ".sha256").write_text(manifest["sha256"])
+    Path(manifest_path).unlink()
+
+
+def pack(source, out_dir, chunk_bytes, level):
+    codec = pa.Codec("zstd", compression_level=level)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    parts = []
+    with open(source, "rb") as fh:
+        while True:
+            chunk = fh.read(chunk_bytes)
+            if not chunk:
+                break
+            p = out / f"part-{len(parts):05d}.zst"
+            p.write_bytes(codec.compress(chunk, asbytes=True))
+            parts.append({"path": str(p), "raw_bytes": len(chunk)})
+    (out / "manifest.json").write_text(json.dumps({"codec": "zstd", "parts": parts}))
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "unpack":
+        unpack(sys.argv[2])
+    else:
+        pack(sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5]))
+"""
+
+
+def file_sha256(path: str | Path, chunk_bytes: int = CHUNK_BYTES) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as fh:
+        while chunk := fh.read(chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _command(*args: object) -> str:
+    """Shell command line with every argument quoted (paths come from specs)."""
+    return " ".join(shlex.quote(str(a)) for a in args)
+
+
+class SandboxTransfer:
+    """
+    Moves files in and out of one sandbox.
+
+    `uploaded` maps remote path -> sha256 of what this client last sent there;
+    together with the `<remote>.sha256` marker the helper leaves behind, it
+    lets a reused sandbox skip unchanged inputs.
+    """
+
+    def __init__(
+        self,
+        sandbox: Any,
+        workdir: str,
+        *,
+        chunk_bytes: int = CHUNK_BYTES,
+        level: int = COMPRESSION_LEVEL,
+    ) -> None:
+        self.sandbox = sandbox
+        self.workdir = workdir.rstrip("/")
+        self.chunk_bytes = chunk_bytes
+        self.level = level
+        self.uploaded: dict[str, str] = {}
+        self._codec = pa.Codec("zstd", compression_level=level)
+        self._helper: str | None = None
+
+    def _remote(self, path: str) -> str:
+        return path if path.startswith("/") else f"{self.workdir}/{path}"
+
+    def _run(self, cmd: str) -> Any:
+        return self.sandbox.commands.run(cmd, cwd=self.workdir)
+
+    def _ensure_helper(self) -> str:
+        if self._helper is None:
+            helper = f"{self.workdir}/{TRANSFER_DIR}/helper.py"
+            self.sandbox.files.write(helper, _HELPER)
+            self._helper = helper
+        return self._helper
+
+    def _remote_hash(self, remote: str) -> str | None:
+        try:
+            return str(self.sandbox.files.read(remote + HASH_SUFFIX)).strip()
+        except Exception:
+            return None
+
+    def upload(self, local: str | Path, remote: str) -> Dict[str, Any]:
+        """
+        Send `local` to `remote` (relative paths land under the workdir).
+
+        Returns {"remote", "sha256", "bytes_raw", "bytes_sent", "chunks",
+        "skipped", "duration_ms"}.
+        """
+        src = Path(local)
+        target = self._remote(remote)
+        t0 = time.perf_counter()
+        digest = file_sha256(src, self.chunk_bytes)
+        stats: Dict[str, Any] = {
+            "remote": target,
+            "sha256": digest,
+            "bytes_raw": src.stat().st_size,
+            "bytes_sent": 0,
+            "chunks": 0,
+            "skipped": False,
+        }
+
+        if self.uploaded.get(target) == digest or self._remote_hash(target) == digest:
+            stats["skipped"] = True
+        else:
+            helper = self._ensure_helper()
+            staging = f"{self.workdir}/{TRANSFER_DIR}/up-{uuid.uuid4().hex}"
+            parts: list[Dict[str, Any]] = []
+            with src.open("rb") as fh:
+                while chunk := fh.read(self.chunk_bytes):
+                    part = f"{staging}/part-{len(parts):05d}.zst"
+                    packed = self._codec.compress(chunk, asbytes=True)
+                    self.sandbox.files.write(part, packed)
+                    parts.append({"path": part, "raw_bytes": len(chunk)})
+                    stats["bytes_sent"] += len(packed)
+            manifest = f"{staging}/manifest.json"
+            self.sandbox.files.write(
+                manifest,
+                json.dumps(
+                    {
+                        "codec": "zstd",
+                        "target": target,
+                        "sha256": digest,
+                        "parts": parts,
+                    }
+                ),
+            )
+            self._run(_command("python", helper, "unpack", manifest))
+            stats["chunks"] = len(parts)
+
+        self.uploaded[target] = digest
+        stats["duration_ms"] = (time.perf_counter() - t0) * 1000
+        logger.info({"stage": "sandbox_upload", **stats})
+        return stats
+
+    def download(self, remote: str, local: str | Path) -> Dict[str, Any]:
+        """
+        Fetch `remote` into `local`, one compressed part at a time.
+
+        The file is assembled next to `local` and renamed into place, so a
+        failed transfer never leaves a truncated artifact behind.
+        """
+        source = self._remote(remote)
+        target = Path(local)
+        t0 = time.perf_counter()
+        helper = self._ensure_helper()
+        staging = f"{self.workdir}/{TRANSFER_DIR}/down-{uuid.uuid4().hex}"
+        self._run(
+            _command(
+                "python", helper, "pack", source, staging, self.chunk_bytes, self.level
+            )
+        )
+        manifest = json.loads(self.sandbox.files.read(f"{staging}/manifest.json"))
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + ".part")
+        received = 0
+        raw = 0
+        try:
+            with partial.open("wb") as out:
+                for part in manifest["parts"]:
+                    packed = bytes(
+                        self.sandbox.files.read(part["path"], format="bytes")
+                    )
+                    received += len(packed)
+                    raw += part["raw_bytes"]
+                    out.write(
+                        self._codec.decompress(
+                            packed, decompressed_size=part["raw_bytes"], asbytes=True
+                        )
+                    )
+            partial.replace(target)
+        finally:
+            partial.unlink(missing_ok=True)
+            try:
+                self._run(_command("rm", "-rf", staging))
+            except Exception:
+                logger.warning({"stage": "sandbox_download", "cleanup": staging})
+
+        stats = {
+            "remote": source,
+            "local": str(target),
+            "bytes_raw": raw,
+            "bytes_received": received,
+            "chunks": len(manifest["parts"]),
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+        logger.info({"stage": "sandbox_download", **stats})
+        return stats
+
+
+# sandbox_id -> transfer state, so a reused sandbox keeps its hash registry.
+_TRANSFERS: dict[str, SandboxTransfer] = {}
+
+
+def transfer_for(sandbox: Any, workdir: str, **kwargs: Any) -> SandboxTransfer:
+    key = str(getattr(sandbox, "sandbox_id", id(sandbox)))
+    transfer = _TRANSFERS.get(key)
+    if transfer is None or transfer.sandbox is not sandbox:
+        transfer = _TRANSFERS[key] = SandboxTransfer(sandbox, workdir, **kwargs)
+    return transfer
+
+
+def forget(sandbox: Any) -> None:
+    """Drop the registry for a sandbox that has been killed."""
+    _TRANSFERS.pop(str(getattr(sandbox, "sandbox_id", id(sandbox))), None)
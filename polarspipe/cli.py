@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
+import sys
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 import click
 from dotenv import load_dotenv
@@ -10,16 +13,44 @@ from dotenv import load_dotenv
 from .agent.tools import DEFAULT_OUTPUT_PATH
 from .agent.tracing import finish_run, start_run
 
+# Heavy modules (polars, the agent graph with openai/langgraph) are imported
+# inside the commands that need them, so `--help` and agent-free commands start
+# fast. The OpenAI client is created on first use, after .env is loaded.
 load_dotenv()
 
-from .agent.graph import graph  # noqa: E402  (load .env before initializing client)
-
 
 @click.group()
 def cli() -> None:
     """Agentic CLI for Polars-powered ETL."""
 
 
+def _echo_node_update(node: str, update: dict[str, Any]) -> None:
+    if node == "parse":
+        click.echo("[cli] Instruction parsed into ETL spec.")
+    elif node == "plan":
+        click.echo("--- ETL Plan ---")
+        click.echo(update.get("plan", ""))
+    elif node == "code":
+        staged = update.get("staged_input") or {}
+        if staged.get("path"):
+            click.echo(
+                f"[cli] Pre-staged input: {staged['bytes_in'] / 1e6:,.1f} MB -> "
+                f"{staged['bytes_out'] / 1e6:,.1f} MB ({staged['path']})"
+            )
+        elif staged.get("error"):
+            click.echo(f"[cli] Pre-stage skipped: {staged['error']}", err=True)
+        click.echo("\n--- Generated Polars script ---")
+        click.echo(update.get("code", ""))
+        click.echo("\n--- Sandbox (live) ---")
+
+
+def _echo_sandbox_output(event: dict[str, str]) -> None:
+    stream = event.get("stream", "stdout")
+    text = event.get("text", "").rstrip("\n")
+    if text:
+        click.echo(text, err=stream == "stderr")
+
+
 @cli.command()
 @click.argument("instruction", nargs=-1, required=True)
 @click.option(
@@ -27,57 +58,83 @@ def cli() -> None:
     "output_path",
     help="Local path to persist the resulting artifact.",
 )
-def run(instruction: tuple[str, ...], output_path: str | None) -> None:
+@click.option(
+    "--prestage/--no-prestage",
+    default=False,
+    show_default=True,
+    help="Prune the input locally (columns, filters, limit) and upload a compact "
+    "Parquet instead of the raw file.",
+)
+@click.option(
+    "--local",
+    is_flag=True,
+    default=False,
+    help="Compile the spec into a Polars plan and run it in this process "
+    "instead of generating a script for the E2B sandbox.",
+)
+@click.option(
+    "--spans-json",
+    type=click.Path(dir_okay=False),
+    help="Write per-node and per-sandbox-phase timing spans to this JSON file.",
+)
+def run(
+    instruction: tuple[str, ...],
+    output_path: str | None,
+    prestage: bool,
+    local: bool,
+    spans_json: str | None,
+) -> None:
     prompt = " ".join(instruction).strip()
     click.echo(f"[cli] Instruction: {prompt}")
-    state: dict[str, Any] = {"instruction": prompt}
+    state: dict[str, Any] = {
+        "instruction": prompt,
+        "prestage": prestage,
+        "local": local,
+    }
     if output_path:
         state["preferred_output_path"] = output_path
         click.echo(f"[cli] Preferred output override: {output_path}")
 
     run_id = start_run("polarspipe-cli", {"instruction": prompt, "output": output_path})
     if run_id:
-        click.echo(f"[cli] LangSmith tracing enabled (run_id={run_id})")
+        click.echo(f"[cli] Tracing enabled (run_id={run_id})")
+
+    from .agent.graph import get_graph
 
+    graph = get_graph()
     click.echo("[cli] Invoking agent graph...")
-    final_state = graph.invoke(state)
+    final_state: dict[str, Any] = dict(state)
+    # Print each node's result as it lands and sandbox output as it is produced.
+    for mode, chunk in graph.stream(state, stream_mode=["updates", "custom"]):
+        if mode == "custom":
+            _echo_sandbox_output(chunk)
+            continue
+        for node, update in chunk.items():
+            final_state.update(update)
+            _echo_node_update(node, update)
     click.echo("[cli] Agent completed.")
 
     spec = final_state.get("etl_spec", {})
     plan = final_state.get("plan", "")
     code = final_state.get("code", "")
     execution = final_state.get("execution", {})
-    install_log = execution.get("install", {})
-    trace = execution.get("trace", [])
-
-    click.echo("--- ETL Plan ---")
-    click.echo(plan)
-    click.echo("\n--- Generated Polars script ---")
-    click.echo(code)
-    if install_log:
-        click.echo("\n--- Sandbox setup ---")
-        if install_log.get("stdout"):
-            click.echo(install_log["stdout"])
-        if install_log.get("stderr"):
-            click.echo(install_log["stderr"], err=True)
-    if trace:
-        click.echo("\n--- Sandbox trace ---")
-        for line in trace:
-            click.echo(line)
-    click.echo("\n--- Sandbox execution ---")
-    click.echo(execution.get("stdout", ""))
-    if execution.get("stderr"):
-        click.echo(execution["stderr"], err=True)
-
-    artifact_bytes = execution.get("artifact_bytes")
+    if local:
+        # Nothing was streamed live; show the local run's result instead.
+        click.echo(execution.get("stdout", "").rstrip())
+        if execution.get("stderr"):
+            click.echo(execution["stderr"], err=True)
+        click.echo(f"[cli] Local exit code: {execution.get('exit_code')}")
+    else:
+        click.echo(f"[cli] Sandbox exit code: {execution.get('exit_code')}")
+
+    artifact = execution.get("artifact_local_path")
     target = Path(output_path or spec.get("output_path", DEFAULT_OUTPUT_PATH))
 
-    if artifact_bytes:
-        target.parent.mkdir(parents=True, exist_ok=True)
-        if isinstance(artifact_bytes, str):
-            target.write_text(artifact_bytes, encoding="utf-8")
-        else:
-            target.write_bytes(artifact_bytes)
+    if artifact:
+        # Already streamed to disk by the transfer layer; only move it if needed.
+        if Path(artifact).resolve() != target.resolve():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            Path(artifact).replace(target)
         click.echo(f"Saved artifact to {target}")
     elif execution.get("artifact_path"):
         click.echo(
@@ -88,6 +145,14 @@ def run(instruction: tuple[str, ...], output_path: str | None) -> None:
     click.echo("\n--- Final Spec ---")
     click.echo(json.dumps(spec, indent=2))
 
+    from .agent.spans import summary_table, write_spans_json
+
+    spans = final_state.get("spans", [])
+    click.echo("\n--- Spans ---")
+    click.echo(summary_table(spans))
+    if spans_json:
+        click.echo(f"[cli] Spans written to {write_spans_json(spans, spans_json)}")
+
     finish_run(
         run_id,
         {
@@ -95,9 +160,651 @@ def run(instruction: tuple[str, ...], output_path: str | None) -> None:
             "plan": plan,
             "code": code,
             "execution": execution,
+            "spans": spans,
         },
     )
 
 
+@cli.command(name="compact")
+@click.argument("source", type=click.Path(exists=True, file_okay=False))
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.option("--pattern", default="*.parquet", show_default=True)
+@click.option(
+    "--target-mb",
+    type=float,
+    help="Approximate on-disk size of each compacted file "
+    "(default: ingestion.compact.DEFAULT_TARGET_MB).",
+)
+@click.option(
+    "--profile",
+    default="default",
+    show_default=True,
+    help="Parquet layout profile (see WRITER_PROFILES) for the compacted output.",
+)
+def compact_cmd(
+    source: str, output_dir: str, pattern: str, target_mb: float | None, profile: str
+) -> None:
+    """Merge small part files in SOURCE into right-sized Parquet files."""
+    from .ingestion.compact import DEFAULT_TARGET_MB, compact
+    from .ingestion.writer import resolve_profile
+
+    try:
+        layout = resolve_profile(profile)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--profile") from e
+
+    written = compact(
+        source,
+        output_dir,
+        pattern=pattern,
+        target_mb=DEFAULT_TARGET_MB if target_mb is None else target_mb,
+        profile=layout,
+    )
+    click.echo(f"[cli] Compacted into {len(written)} file(s) under {output_dir}")
+
+
+@cli.command(name="index")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--column",
+    "columns",
+    multiple=True,
+    default=("id",),
+    show_default=True,
+    help="Key column to index (repeatable).",
+)
+def index_cmd(path: str, columns: tuple[str, ...]) -> None:
+    """Build a sidecar bloom/min-max index for point lookups on PATH."""
+    from .ingestion.index import build_index
+
+    target = build_index(path, columns)
+    click.echo(f"[cli] Wrote index {target}")
+
+
+@cli.group(name="cache")
+def cache_group() -> None:
+    """Inspect or purge the cache of cleaned datasets (load_clean(cache=True))."""
+
+
+_cache_dir = click.option(
+    "--dir",
+    "root",
+    type=click.Path(file_okay=False),
+    help="Cache directory (default: $POLARSPIPE_CACHE_DIR or .polarspipe/cache).",
+)
+
+
+@cache_group.command(name="ls")
+@_cache_dir
+def cache_ls(root: str | None) -> None:
+    """List entries, most recently used first, as JSON."""
+    from .ingestion.cache import CleanCache
+
+    store = CleanCache(root) if root else CleanCache()
+    entries = store.entries()
+    click.echo(
+        json.dumps(
+            {
+                "root": str(store.root),
+                "bytes": sum(e["bytes"] for e in entries),
+                "max_bytes": store.max_bytes,
+                "entries": entries,
+            },
+            indent=2,
+        )
+    )
+
+
+@cache_group.command(name="purge")
+@_cache_dir
+@click.option("--source", help="Only entries built from this source file.")
+@click.option(
+    "--max-mb", type=float, help="Instead, evict least recently used down to this."
+)
+def cache_purge(root: str | None, source: str | None, max_mb: float | None) -> None:
+    """Remove cached entries (all of them unless narrowed down)."""
+    from .ingestion.cache import CleanCache
+
+    base = CleanCache(root) if root else CleanCache()
+    if max_mb is not None:
+        removed = CleanCache(base.root, max_mb=max_mb).evict()
+    else:
+        removed = base.purge(source)
+    click.echo(
+        f"[cli] Removed {len(removed)} cache entr{'y' if len(removed) == 1 else 'ies'}"
+    )
+
+
+@cli.group(name="shard")
+def shard_group() -> None:
+    """Split one large NDJSON/CSV file into byte ranges cleaned in parallel."""
+
+
+@shard_group.command(name="plan")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False))
+@click.argument("out_dir", type=click.Path(file_okay=False))
+@click.option("--shards", type=int, help="Number of shards (default: by --shard-mb).")
+@click.option("--shard-mb", type=float, default=256.0, show_default=True)
+@click.option(
+    "--quote-aware/--no-quote-aware",
+    default=True,
+    show_default=True,
+    help="Track CSV quotes so multi-line fields are not cut (one extra read).",
+)
+@click.option("--profile", default=None, help="Parquet layout profile for parts.")
+def shard_plan(
+    source: str,
+    out_dir: str,
+    shards: int | None,
+    shard_mb: float,
+    quote_aware: bool,
+    profile: str | None,
+) -> None:
+    """Write OUT_DIR/manifest.json with newline-aligned ranges of SOURCE."""
+    from .ingestion.exceptions import UnsupportedFormatError
+    from .sharding import write_plan
+
+    try:
+        manifest = write_plan(
+            source,
+            out_dir,
+            shards=shards,
+            shard_mb=shard_mb,
+            quote_aware=quote_aware,
+            profile=profile,
+        )
+    except UnsupportedFormatError as e:
+        raise click.BadParameter(str(e), param_hint="SOURCE") from None
+    click.echo(
+        f"[shard] {len(manifest['shards'])} shards of "
+        f"{manifest['source']['size'] / (1024 * 1024):,.1f} MB -> {out_dir}"
+    )
+
+
+@shard_group.command(name="run")
+@click.argument("out_dir", type=click.Path(exists=True, file_okay=False))
+@click.option("--workers", type=int, help="Worker processes (default: CPU count).")
+@click.option(
+    "--node",
+    default="0/1",
+    show_default=True,
+    help="K/N: take shards with index % N == K (one value per machine).",
+)
+@click.option("--retries", type=int, default=1, show_default=True)
+def shard_run(out_dir: str, workers: int | None, node: str, retries: int) -> None:
+    """Clean this node's pending shards of OUT_DIR into part files."""
+    from .scheduler import summarize
+    from .sharding import run_shards
+
+    try:
+        k, n = (int(v) for v in node.split("/"))
+    except ValueError:
+        raise click.BadParameter("expected K/N, e.g. 2/8", param_hint="--node")
+
+    def _report(result: Any) -> None:
+        status = "ok" if result.ok else f"FAILED ({result.error})"
+        click.echo(f"[shard] {result.job.output}: {status}")
+
+    try:
+        results = run_shards(
+            out_dir,
+            workers=workers,
+            node=k,
+            nodes=n,
+            retries=retries,
+            on_result=_report,
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--node") from None
+    summary = summarize(results)
+    click.echo(json.dumps(summary))
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+@shard_group.command(name="merge")
+@click.argument("out_dir", type=click.Path(exists=True, file_okay=False))
+@click.option("--output", "-o", help="Also concatenate the parts into this file.")
+@click.option("--profile", default=None, help="Parquet layout profile for --output.")
+def shard_merge(out_dir: str, output: str | None, profile: str | None) -> None:
+    """Validate every part against the manifest (ranges, rows, checksums)."""
+    from .ingestion.exceptions import ShardManifestError
+    from .sharding import merge_shards
+
+    try:
+        manifest = merge_shards(out_dir, output=output, profile=profile)
+    except ShardManifestError as e:
+        raise click.ClickException(str(e)) from None
+    click.echo(
+        json.dumps(
+            {
+                "shards": len(manifest["parts"]),
+                "rows_in": manifest["rows_in"],
+                "rows": manifest["rows"],
+                "output": manifest.get("output"),
+            }
+        )
+    )
+
+
+@cli.command(name="profile")
+@click.argument(
+    "inputs", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False)
+)
+@click.option("--output", "-o", help="Save the (merged) sketches here as JSON.")
+@click.option("--clean", is_flag=True, help="Profile the cleaned rows (load_clean).")
+@click.option("--top", type=int, default=10, show_default=True)
+@click.option("--verbose", "-v", is_flag=True, help="Log pipeline stages.")
+def profile_cmd(
+    inputs: tuple[str, ...], output: str | None, clean: bool, top: int, verbose: bool
+) -> None:
+    """
+    Approximate per-column profile of INPUTS in one streaming pass each:
+    distinct counts, quantiles, top values, min/max and length histograms.
+    INPUTS ending in .json are saved profiles and are merged in as-is.
+    """
+    from .ingestion.reader import scan_file
+    from .ingestion.sketches import DatasetProfile, merge_profiles, profile_frame
+    from .pipeline import configure_logging, load_clean
+
+    if verbose:
+        configure_logging(logging.INFO)
+
+    def _profile(path: str) -> DatasetProfile:
+        if path.lower().endswith(".json"):
+            return DatasetProfile.load(path)
+        frame = load_clean(path) if clean else scan_file(path)
+        return profile_frame(frame, source=path)
+
+    try:
+        merged = merge_profiles(_profile(p) for p in inputs)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from None
+    if output:
+        merged.save(output)
+    click.echo(json.dumps(merged.summary(top), indent=2, default=str))
+
+
+def _render_progress(snap: dict[str, Any]) -> None:
+    rss = snap["rss_mb"] if snap["rss_mb"] is not None else snap["peak_rss_mb"]
+    click.echo(
+        f"\r[etl] {snap['rows']:>12,} rows  {snap['rows_per_s']:>10,.0f} rows/s  "
+        f"{snap['mb']:>9,.1f} MB  {snap['mb_per_s']:>7,.1f} MB/s  "
+        f"rss {rss or 0:,.0f} MB",
+        nl=False,
+        err=True,
+    )
+
+
+@cli.command()
+@click.argument(
+    "inputs", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False)
+)
+@click.option("--output", "-o", required=True, help="Clean output path.")
+@click.option("--quarantine", help="Also write rejected rows (with reasons) here.")
+@click.option("--profile", default="default", show_default=True)
+@click.option(
+    "--engine",
+    type=click.Choice(["streaming", "in-memory"]),
+    default="streaming",
+    show_default=True,
+)
+@click.option("--threads", type=int, help="POLARS_MAX_THREADS for this run.")
+@click.option("--chunk-size", type=int, help="Rows per streaming chunk.")
+@click.option(
+    "--stream-above-mb",
+    type=float,
+    help="Use the streaming engine when the inputs total more than this many MB, "
+    "even with --engine in-memory.",
+)
+@click.option(
+    "--ipc-compression",
+    type=click.Choice(["uncompressed", "lz4", "zstd"]),
+    default="uncompressed",
+    show_default=True,
+    help="Codec for .arrow/.ipc/.feather outputs; uncompressed files can be "
+    "memory-mapped on read.",
+)
+@click.option(
+    "--table", default="records", show_default=True, help="Table for .db/.duckdb."
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=50_000,
+    show_default=True,
+    help="Rows per insert batch for database outputs.",
+)
+@click.option(
+    "--upsert-key",
+    default="id",
+    show_default=True,
+    help="Replace rows with the same key in database outputs; '' to append.",
+)
+@click.option(
+    "--index", "indexes", multiple=True, help="Index to build after a DB load."
+)
+@click.option(
+    "--if-exists",
+    type=click.Choice(["append", "replace"]),
+    default="append",
+    show_default=True,
+    help="What to do with an existing database table.",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Cast string columns to cheaper dtypes (categorical, datetime, int) "
+    "inferred from a sample.",
+)
+@click.option(
+    "--compact-strict",
+    is_flag=True,
+    help="With --compact, fail on a value the sample did not anticipate instead "
+    "of nulling it (or quarantining its row).",
+)
+@click.option("--progress/--no-progress", default=True, show_default=True)
+@click.option("--verbose", "-v", is_flag=True, help="Log pipeline stages.")
+def etl(
+    inputs: tuple[str, ...],
+    output: str,
+    quarantine: str | None,
+    profile: str,
+    engine: str,
+    threads: int | None,
+    chunk_size: int | None,
+    stream_above_mb: float | None,
+    ipc_compression: Literal["uncompressed", "lz4", "zstd"],
+    table: str,
+    batch_size: int,
+    upsert_key: str,
+    indexes: tuple[str, ...],
+    if_exists: Literal["append", "replace"],
+    compact: bool,
+    compact_strict: bool,
+    progress: bool,
+    verbose: bool,
+) -> None:
+    """Clean INPUTS into --output without the agent (load_clean -> write_frame)."""
+    if threads:
+        if "polars" in sys.modules:
+            click.echo("[etl] polars already imported; --threads ignored", err=True)
+        # Must be set before polars initializes its thread pool.
+        os.environ["POLARS_MAX_THREADS"] = str(threads)
+
+    import polars as pl
+
+    from .ingestion.database import DatabaseSink, require_driver
+    from .ingestion.exceptions import UnsupportedFormatError
+    from .ingestion.writer import output_format, resolve_profile
+    from .pipeline import configure_logging, write_clean
+    from .progress import ProgressReporter, ThroughputMeter
+
+    for target in filter(None, (output, quarantine)):
+        try:
+            output_format(target)
+            require_driver(target)
+        except UnsupportedFormatError as e:
+            raise click.BadParameter(str(e)) from None
+    try:
+        resolve_profile(profile)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--profile") from None
+
+    if verbose:
+        configure_logging(logging.INFO)
+    if chunk_size:
+        pl.Config.set_streaming_chunk_size(chunk_size)
+
+    input_mb = sum(os.path.getsize(p) for p in inputs) / (1024 * 1024)
+    if engine == "in-memory" and stream_above_mb and input_mb > stream_above_mb:
+        click.echo(
+            f"[etl] inputs ({input_mb:,.0f} MB) exceed --stream-above-mb; "
+            "switching to the streaming engine",
+            err=True,
+        )
+        engine = "streaming"
+
+    meter = ThroughputMeter()
+    with ProgressReporter(meter, _render_progress if progress else lambda _: None):
+        written = write_clean(
+            list(inputs),
+            output,
+            quarantine=quarantine,
+            profile=profile,
+            streaming=engine == "streaming",
+            on_batch=meter.observe,
+            ipc_compression=ipc_compression,
+            database=DatabaseSink(
+                table=table,
+                batch_size=batch_size,
+                mode=if_exists,
+                upsert_key=upsert_key or None,
+                indexes=indexes,
+            ),
+            compact=compact,
+            compact_strict=compact_strict,
+        )
+    if progress:
+        click.echo("", err=True)
+
+    snap = meter.snapshot()
+    output_mb = sum(os.path.getsize(p) for p in written) / (1024 * 1024)
+    peak = snap["peak_rss_mb"]
+    click.echo(
+        json.dumps(
+            {
+                "outputs": [str(p) for p in written],
+                "rows": snap["rows"],
+                "duration_s": round(snap["elapsed_s"], 3),
+                "rows_per_s": round(snap["rows_per_s"]),
+                "input_mb": round(input_mb, 2),
+                "input_mb_per_s": round(input_mb / snap["elapsed_s"], 2),
+                "output_mb": round(output_mb, 2),
+                "peak_rss_mb": round(peak, 1) if peak is not None else None,
+                "engine": engine,
+                "threads": pl.thread_pool_size(),
+            }
+        )
+    )
+
+
+@cli.command()
+@click.argument(
+    "inputs", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False)
+)
+@click.option("--output-dir", required=True, type=click.Path(file_okay=False))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["parquet", "ndjson", "csv", "arrow"]),
+    default="parquet",
+    show_default=True,
+)
+@click.option("--quarantine", is_flag=True, help="Write <stem>.rejects.ndjson too.")
+@click.option("--profile", default=None, help="Parquet layout profile.")
+@click.option("--workers", type=int, help="Worker processes (default: CPU count).")
+@click.option("--retries", type=int, default=1, show_default=True)
+@click.option("--metrics-json", type=click.Path(dir_okay=False))
+def batch(
+    inputs: tuple[str, ...],
+    output_dir: str,
+    fmt: str,
+    quarantine: bool,
+    profile: str | None,
+    workers: int | None,
+    retries: int,
+    metrics_json: str | None,
+) -> None:
+    """Clean many INPUTS in parallel worker processes, largest first."""
+    from dataclasses import asdict
+
+    from .scheduler import jobs_for_inputs, run_jobs, summarize
+
+    try:
+        jobs = jobs_for_inputs(
+            inputs, output_dir, suffix=f".{fmt}", quarantine=quarantine, profile=profile
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="INPUTS") from e
+
+    def _report(result: Any) -> None:
+        status = "ok" if result.ok else f"FAILED ({result.error})"
+        click.echo(
+            f"[batch] {result.job.input} -> {result.job.output}: {status} "
+            f"in {result.duration_ms:,.0f} ms (attempts={result.attempts})"
+        )
+
+    results = run_jobs(jobs, workers=workers, retries=retries, on_result=_report)
+    summary = summarize(results)
+    click.echo(json.dumps(summary))
+
+    if metrics_json:
+        Path(metrics_json).write_text(
+            json.dumps(
+                {"summary": summary, "jobs": [asdict(r) for r in results]},
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+@cli.command()
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option("--output-dir", required=True, type=click.Path(file_okay=False))
+@click.option(
+    "--pattern",
+    "patterns",
+    multiple=True,
+    default=("*.ndjson", "*.jsonl", "*.csv", "*.parquet"),
+    show_default=True,
+    help="File name glob to pick up (repeatable).",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["parquet", "ndjson", "csv", "arrow"]),
+    default="parquet",
+    show_default=True,
+)
+@click.option("--quarantine", is_flag=True, help="Write <stem>.rejects.ndjson too.")
+@click.option("--profile", default=None, help="Parquet layout profile.")
+@click.option("--workers", type=int, default=2, show_default=True)
+@click.option(
+    "--max-in-flight",
+    type=int,
+    help="Jobs submitted at once; the rest wait on disk (default: 2 x workers).",
+)
+@click.option("--retries", type=int, default=1, show_default=True)
+@click.option(
+    "--settle",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Seconds a file must stay unchanged before it is picked up.",
+)
+@click.option("--poll", type=float, default=0.5, show_default=True)
+@click.option("--metrics-json", type=click.Path(dir_okay=False))
+def watch(
+    directory: str,
+    output_dir: str,
+    patterns: tuple[str, ...],
+    fmt: str,
+    quarantine: bool,
+    profile: str | None,
+    workers: int,
+    max_in_flight: int | None,
+    retries: int,
+    settle: float,
+    poll: float,
+    metrics_json: str | None,
+) -> None:
+    """Clean files as they land in DIRECTORY, on warm worker processes."""
+    import signal
+    import threading
+
+    from .watch import Watcher
+
+    def _report(result: Any) -> None:
+        status = "ok" if result.ok else f"FAILED ({result.error})"
+        click.echo(
+            f"[watch] {result.job.input} -> {result.job.output}: {status} "
+            f"in {result.duration_ms:,.0f} ms"
+        )
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        watcher = Watcher(
+            directory,
+            output_dir,
+            patterns=patterns,
+            suffix=f".{fmt}",
+            quarantine=quarantine,
+            profile=profile,
+            workers=workers,
+            max_in_flight=max_in_flight,
+            retries=retries,
+            settle_s=settle,
+            poll_s=poll,
+            on_result=_report,
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--output-dir") from None
+    click.echo(f"[watch] Watching {directory} (Ctrl-C to stop)", err=True)
+    try:
+        metrics = watcher.run(stop=stop, metrics_path=metrics_json)
+    except KeyboardInterrupt:
+        metrics = watcher.metrics
+    click.echo(json.dumps(metrics.snapshot()))
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8765, show_default=True)
+@click.option("--workers", type=int, default=4, show_default=True)
+@click.option(
+    "--max-queue",
+    type=int,
+    default=64,
+    show_default=True,
+    help="Waiting jobs before new submissions get 429.",
+)
+@click.option(
+    "--artifacts-dir",
+    default=".polarspipe/service",
+    show_default=True,
+    type=click.Path(file_okay=False),
+)
+@click.option("--verbose", "-v", is_flag=True, help="Log pipeline stages.")
+def serve(
+    host: str,
+    port: int,
+    workers: int,
+    max_queue: int,
+    artifacts_dir: str,
+    verbose: bool,
+) -> None:
+    """Serve specs and agent runs over HTTP from one warm process."""
+    from .pipeline import configure_logging
+    from .service import make_server
+
+    if verbose:
+        configure_logging(logging.INFO)
+    server = make_server(
+        host, port, workers=workers, max_queue=max_queue, artifacts_dir=artifacts_dir
+    )
+    click.echo(f"[serve] Listening on http://{host}:{server.server_port}", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
 if __name__ == "__main__":
     cli()
@@ -1 +1,5 @@
 # Make ingestion a package for import stability.
+from .batches import CleanBatches, iter_batches
+from .index import build_index, contains, lookup
+
+__all__ = ["CleanBatches", "build_index", "contains", "iter_batches", "lookup"]
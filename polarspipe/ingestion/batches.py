@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Sequence
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50_000
+_DONE = object()
+
+
+def _put(q: queue.Queue[Any], stop: threading.Event, item: Any) -> bool:
+    # Wait for room, but give up once the consumer has closed us.
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(
+    frame: pl.LazyFrame, batch_size: int, q: queue.Queue[Any], stop: threading.Event
+) -> None:
+    # Holds no reference to the CleanBatches, so dropping it can stop us.
+    try:
+        frame.sink_batches(
+            lambda batch: not _put(q, stop, batch),
+            chunk_size=batch_size,
+            lazy=False,
+        )
+        _put(q, stop, _DONE)
+    except BaseException as e:  # re-raised on the consumer side
+        _put(q, stop, e)
+
+
+class CleanBatches:
+    """
+    Iterator of cleaned batches with a resumable `position`.
+
+    `position` is the number of cleaned rows consumed so far, counting the
+    starting `offset`; pass it back as `offset` to continue after a restart.
+    Batches are produced on a daemon thread. With `prefetch` > 0 it starts
+    at once and keeps up to that many batches ready while the consumer works;
+    otherwise it starts on the first next() and hands over one at a time.
+    Memory stays bounded by (prefetch + 1) * batch_size rows plus the
+    engine's own buffers. The thread stops on close(), or once the iterator
+    is garbage collected. After an error every next() re-raises it; after
+    the end or close() it raises StopIteration.
+    """
+
+    def __init__(
+        self,
+        frame: pl.LazyFrame,
+        *,
+        batch_size: int,
+        offset: int = 0,
+        prefetch: int = 0,
+        as_arrow: bool = False,
+        source: str | None = None,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.batch_size = batch_size
+        self.position = offset
+        self.as_arrow = as_arrow
+        self.source = source
+        self._frame = frame
+        self._stop = threading.Event()
+        self._closer = weakref.finalize(self, self._stop.set)
+        self._t0 = time.perf_counter()
+        # sink_batches re-raises query errors; collect_batches would end the
+        # iteration quietly and hand back a truncated stream.
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max(prefetch, 1))
+        self._thread: threading.Thread | None = None
+        self._end: BaseException | None = None
+        if prefetch > 0:
+            self._start()
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=_produce,
+            args=(self._frame, self.batch_size, self._queue, self._stop),
+            name="polarspipe-prefetch",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _next_frame(self) -> pl.DataFrame:
+        # Once done, failed or closed, the queue gets nothing more: answer
+        # from the recorded end instead of blocking on it.
+        if self._end is None and self._stop.is_set():
+            self._end = StopIteration()
+        if self._end is not None:
+            raise self._end
+        self._start()
+        item = self._queue.get()
+        if item is _DONE:
+            self._end = StopIteration()
+            raise self._end
+        if isinstance(item, BaseException):
+            self._end = item
+            raise item
+        return item
+
+    def __iter__(self) -> CleanBatches:
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            df = self._next_frame()
+        except StopIteration:
+            logger.info(
+                {
+                    "stage": "iter_batches_done",
+                    "path": self.source,
+                    "position": self.position,
+                    "duration_ms": (time.perf_counter() - self._t0) * 1000,
+                }
+            )
+            raise
+        self.position += df.height
+        return df.to_arrow() if self.as_arrow else df
+
+    def close(self) -> None:
+        """Stop the prefetch thread; unread batches are discarded."""
+        self._closer()
+
+    def __enter__(self) -> CleanBatches:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def iter_batches(
+    path: str | Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    *,
+    columns: Sequence[str] | None = None,
+    prefetch: int = 0,
+    offset: int = 0,
+    as_arrow: bool = False,
+) -> CleanBatches:
+    """
+    Stream cleaned rows of `path` as DataFrames (or pyarrow Tables) of up to
+    `batch_size` rows, without materializing the dataset.
+
+    Parameters:
+        columns: project to these columns after cleaning.
+        prefetch: batches to prepare ahead on a background thread (0 = none).
+        offset: cleaned rows to skip, e.g. a previous iterator's `position`.
+        as_arrow: yield pyarrow Tables instead of Polars DataFrames.
+    """
+    # pipeline imports this package, so resolve it on call.
+    from ..pipeline import load_clean
+
+    lf = load_clean(path)
+    if columns:
+        lf = lf.select([pl.col(name) for name in columns])
+    if offset:
+        lf = lf.slice(offset)
+
+    logger.info(
+        {
+            "stage": "iter_batches",
+            "path": str(path),
+            "batch_size": batch_size,
+            "prefetch": prefetch,
+            "offset": offset,
+        }
+    )
+    return CleanBatches(
+        lf,
+        batch_size=batch_size,
+        offset=offset,
+        prefetch=prefetch,
+        as_arrow=as_arrow,
+        source=str(path),
+    )
@@ -0,0 +1,200 @@
+"""
+Materialized cache of cleaned datasets.
+
+An entry is the cleaned output of one source as zstd Parquet, stored under a
+key derived from the source fingerprint (resolved path, size and either the
+mtime or a content hash), the required schema and CLEAN_RULES_VERSION. Any
+change to those produces a new key, so stale entries are never served; they
+simply age out. Hits touch the entry, and eviction drops the least recently
+used entries until the cache fits `max_bytes`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Mapping
+from uuid import uuid4
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.getenv("POLARSPIPE_CACHE_DIR", ".polarspipe/cache"))
+DEFAULT_MAX_MB = float(os.getenv("POLARSPIPE_CACHE_MAX_MB", "4096"))
+DATA_SUFFIX = ".parquet"
+META_SUFFIX = ".json"
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def content_hash(path: str | Path, chunk_bytes: int = HASH_CHUNK_BYTES) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        while chunk := fh.read(chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(
+    path: str | Path, *, hash_content: bool = False
+) -> dict[str, Any]:
+    """
+    Resolved path, size and mtime of `path`. With `hash_content` a digest of
+    its bytes replaces the mtime, so touching or rewriting the file with the
+    same content keeps the key.
+    """
+    p = Path(path).resolve()
+    stat = p.stat()
+    fingerprint: dict[str, Any] = {"path": str(p), "size": stat.st_size}
+    if hash_content:
+        fingerprint["blake2b"] = content_hash(p)
+    else:
+        fingerprint["mtime_ns"] = stat.st_mtime_ns
+    return fingerprint
+
+
+def cache_key(
+    fingerprint: Mapping[str, Any],
+    schema: Mapping[str, Any],
+    rules_version: int | str,
+) -> str:
+    payload = {
+        "source": dict(fingerprint),
+        "schema": {name: str(dtype) for name, dtype in schema.items()},
+        "rules": str(rules_version),
+    }
+    raw = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:24]
+
+
+class CleanCache:
+    """Directory of cleaned Parquet entries with LRU eviction by total size."""
+
+    def __init__(
+        self, root: str | Path = CACHE_DIR, *, max_mb: float = DEFAULT_MAX_MB
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def _data(self, key: str) -> Path:
+        return self.root / f"{key}{DATA_SUFFIX}"
+
+    def _meta(self, key: str) -> Path:
+        return self.root / f"{key}{META_SUFFIX}"
+
+    def get(self, key: str) -> pl.LazyFrame | None:
+        """Scan of the entry for `key`, or None on a miss."""
+        data = self._data(key)
+        if not data.exists():
+            return None
+        os.utime(data)  # recency for eviction
+        return pl.scan_parquet(data)
+
+    def put(
+        self,
+        key: str,
+        frame: pl.LazyFrame,
+        *,
+        source: str | Path | None = None,
+    ) -> Path:
+        """Sink `frame` as the entry for `key` (atomically), then evict."""
+        t0 = time.perf_counter()
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = self._data(key)
+        # Unique per writer: concurrent builds of one key must not share it.
+        partial = data.with_name(f"{data.name}.{uuid4().hex}.part")
+        frame.sink_parquet(partial, compression="zstd")
+        partial.replace(data)
+
+        meta = {
+            "key": key,
+            "source": str(source) if source is not None else None,
+            "bytes": data.stat().st_size,
+            "rows": pl.scan_parquet(data).select(pl.len()).collect().item(),
+            "created": time.time(),
+        }
+        self._meta(key).write_text(json.dumps(meta), encoding="utf-8")
+        logger.info(
+            {
+                "stage": "cache_put",
+                **meta,
+                "duration_ms": (time.perf_counter() - t0) * 1000,
+            }
+        )
+        self.evict(keep=key)
+        return data
+
+    def get_or_build(
+        self,
+        key: str,
+        build: Callable[[], pl.LazyFrame],
+        *,
+        source: str | Path | None = None,
+    ) -> pl.LazyFrame:
+        cached = self.get(key)
+        logger.info(
+            {
+                "stage": "cache_lookup",
+                "key": key,
+                "source": str(source),
+                "hit": cached is not None,
+            }
+        )
+        if cached is not None:
+            return cached
+        return pl.scan_parquet(self.put(key, build(), source=source))
+
+    def entries(self) -> list[dict[str, Any]]:
+        """Entries, most recently used first."""
+        if not self.root.exists():
+            return []
+        out = []
+        for data in self.root.glob(f"*{DATA_SUFFIX}"):
+            key = data.name[: -len(DATA_SUFFIX)]
+            meta_path = self._meta(key)
+            meta = (
+                json.loads(meta_path.read_text(encoding="utf-8"))
+                if meta_path.exists()
+                else {"key": key, "source": None}
+            )
+            stat = data.stat()
+            out.append({**meta, "bytes": stat.st_size, "last_used": stat.st_mtime})
+        return sorted(out, key=lambda e: e["last_used"], reverse=True)
+
+    def total_bytes(self) -> int:
+        return sum(e["bytes"] for e in self.entries())
+
+    def remove(self, key: str) -> None:
+        for path in (self._data(key), self._meta(key)):
+            path.unlink(missing_ok=True)
+
+    def evict(self, *, keep: str | None = None) -> list[str]:
+        """Drop least recently used entries until the cache fits max_bytes."""
+        entries = self.entries()
+        total = sum(e["bytes"] for e in entries)
+        evicted: list[str] = []
+        for entry in reversed(entries):
+            if total <= self.max_bytes:
+                break
+            if entry["key"] == keep:
+                continue
+            self.remove(entry["key"])
+            total -= entry["bytes"]
+            evicted.append(entry["key"])
+        if evicted:
+            logger.info({"stage": "cache_evict", "keys": evicted, "bytes": total})
+        return evicted
+
+    def purge(self, source: str | Path | None = None) -> list[str]:
+        """Remove every entry, or only those built from `source`."""
+        wanted = str(Path(source).resolve()) if source is not None else None
+        removed = []
+        for entry in self.entries():
+            if wanted is None or entry.get("source") == wanted:
+                self.remove(entry["key"])
+                removed.append(entry["key"])
+        return removed
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Sequence
+
+import polars as pl
+
+from .exceptions import IngestionFileNotFound
+from .reader import scan_file
+from .writer import ParquetProfile, write_frame
+
+logger = logging.getLogger(__name__)
+DEFAULT_TARGET_MB = 128
+
+
+def plan_compaction(
+    files: Sequence[Path], target_mb: float = DEFAULT_TARGET_MB
+) -> list[list[Path]]:
+    """
+    Greedily group files (in the given order) into bins of ~target_mb on disk.
+    A single file larger than the target gets a bin of its own.
+    """
+    target_bytes = target_mb * 1024 * 1024
+    groups: list[list[Path]] = []
+    current: list[Path] = []
+    current_bytes = 0
+
+    for f in files:
+        size = os.path.getsize(f)
+        if current and current_bytes + size > target_bytes:
+            groups.append(current)
+            current, current_bytes = [], 0
+        current.append(f)
+        current_bytes += size
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+def compact(
+    source: str | Path,
+    output_dir: str | Path,
+    *,
+    pattern: str = "*.parquet",
+    target_mb: float = DEFAULT_TARGET_MB,
+    profile: str | ParquetProfile | None = None,
+) -> list[Path]:
+    """
+    Merge many small part files under `source` into right-sized Parquet files.
+
+    Each output is produced by a streaming scan -> sink, so memory stays bounded
+    by the engine's chunk size rather than the size of a bin.
+    """
+    src = Path(source)
+    out = Path(output_dir)
+    if not src.is_dir():
+        raise IngestionFileNotFound(f"Directory does not exist: {src}")
+    if out.resolve() == src.resolve():
+        raise ValueError("output_dir must differ from source to compact safely.")
+
+    files = sorted(p for p in src.glob(pattern) if p.is_file())
+    groups = plan_compaction(files, target_mb)
+    t0 = time.perf_counter()
+    logger.info(
+        {
+            "stage": "compact_plan",
+            "source": str(src),
+            "files_in": len(files),
+            "files_out": len(groups),
+            "target_mb": target_mb,
+        }
+    )
+
+    written: list[Path] = []
+    for i, group in enumerate(groups):
+        lf = pl.concat([scan_file(f) for f in group], how="vertical")
+        written.append(
+            write_frame(
+                lf, out / f"part-{i:05d}.parquet", streaming=True, profile=profile
+            )
+        )
+
+    logger.info(
+        {
+            "stage": "compact_done",
+            "output_dir": str(out),
+            "files_out": len(written),
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return written
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Literal
+
+import polars as pl
+
+from .exceptions import UnsupportedFormatError
+
+logger = logging.getLogger(__name__)
+
+DatabaseKind = Literal["sqlite", "duckdb"]
+LoadMode = Literal["append", "replace"]
+
+DATABASE_SUFFIXES: dict[str, DatabaseKind] = {
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+    ".duckdb": "duckdb",
+}
+
+
+@dataclass(frozen=True)
+class DatabaseSink:
+    """
+    How write_frame loads a frame into an embedded database file.
+
+    Rows stream in `batch_size` chunks inside a single transaction, so a
+    failed load leaves the table untouched. With `upsert_key`, rows replace
+    existing rows with the same key (last one wins within a load).
+    `indexes` are created after the data is in, when the table is new.
+    """
+
+    table: str = "records"
+    batch_size: int = 50_000
+    mode: LoadMode = "append"
+    upsert_key: str | None = "id"
+    indexes: tuple[str, ...] = ()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype: pl.DataType) -> str:
+    if dtype.is_integer() or dtype == pl.Boolean:
+        return "INTEGER"
+    if dtype.is_float() or dtype.is_decimal():
+        return "REAL"
+    if dtype == pl.Binary:
+        return "BLOB"
+    return "TEXT"
+
+
+def _bindable(frame: pl.LazyFrame, schema: pl.Schema) -> pl.LazyFrame:
+    """Cast what sqlite3 cannot bind (temporal, decimal, categorical) in-plan."""
+    casts = []
+    for name, dtype in schema.items():
+        if dtype.is_temporal() or dtype in (pl.Categorical, pl.Enum):
+            casts.append(pl.col(name).cast(pl.Utf8))
+        elif dtype.is_decimal():
+            casts.append(pl.col(name).cast(pl.Float64))
+    return frame.with_columns(casts) if casts else frame
+
+
+def _stream(
+    frame: pl.LazyFrame, batch_size: int, insert: Callable[[pl.DataFrame], Any]
+) -> int:
+    """
+    Feed the streaming query's batches to `insert`; returns the row count.
+
+    sink_batches (unlike collect_batches) re-raises query errors, so a failed
+    plan rolls the load back instead of committing a truncated table. The
+    callback runs on an engine thread, one batch at a time.
+    """
+    rows = 0
+
+    def _insert(batch: pl.DataFrame) -> None:
+        nonlocal rows
+        insert(batch)
+        rows += batch.height
+
+    frame.sink_batches(_insert, chunk_size=batch_size, lazy=False)
+    return rows
+
+
+def _index_sql(table: str, column: str, *, unique: bool = False) -> str:
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    name = _quote(f"ix_{table}_{column}")
+    return f"CREATE {kind} IF NOT EXISTS {name} ON {_quote(table)} ({_quote(column)})"
+
+
+def _upsert_sql(table: str, columns: list[str], key: str) -> str:
+    cols = ", ".join(_quote(c) for c in columns)
+    marks = ", ".join("?" for _ in columns)
+    updates = ", ".join(
+        f"{_quote(c)} = excluded.{_quote(c)}" for c in columns if c != key
+    )
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    return (
+        f"INSERT INTO {_quote(table)} ({cols}) VALUES ({marks}) "
+        f"ON CONFLICT ({_quote(key)}) {action}"
+    )
+
+
+def _finish_fresh(conn: Any, sink: DatabaseSink, *, optimistic: bool) -> None:
+    """
+    Fresh tables are bulk-inserted without indexes; dedupe on the key (last
+    row wins) and build the indexes once, after the data is in.
+
+    With `optimistic` the unique index is tried first and the dedupe scan is
+    only paid for when it finds duplicates. That needs a transaction that
+    survives a failed statement (SQLite; DuckDB aborts it).
+    """
+    if sink.upsert_key:
+        table = _quote(sink.table)
+        dedupe = (
+            f"DELETE FROM {table} WHERE rowid NOT IN (SELECT MAX(rowid) "
+            f"FROM {table} GROUP BY {_quote(sink.upsert_key)})"
+        )
+        unique = _index_sql(sink.table, sink.upsert_key, unique=True)
+        if not optimistic:
+            conn.execute(dedupe)
+            conn.execute(unique)
+        else:
+            try:
+                conn.execute(unique)
+            except sqlite3.IntegrityError:
+                conn.execute(dedupe)
+                conn.execute(unique)
+    for column in sink.indexes:
+        conn.execute(_index_sql(sink.table, column))
+
+
+def _load_sqlite(frame: pl.LazyFrame, path: Path, sink: DatabaseSink) -> int:
+    schema = frame.collect_schema()
+    columns = list(schema.names())
+    table = _quote(sink.table)
+    # Batches arrive on an engine thread, strictly one after another.
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("BEGIN")
+        if sink.mode == "replace":
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (sink.table,),
+        ).fetchone()
+
+        if exists and sink.upsert_key:
+            # Existing data: upsert needs the unique key index up front.
+            conn.execute(_index_sql(sink.table, sink.upsert_key, unique=True))
+            insert = _upsert_sql(sink.table, columns, sink.upsert_key)
+        else:
+            if not exists:
+                ddl = ", ".join(
+                    f"{_quote(n)} {_sql_type(d)}" for n, d in schema.items()
+                )
+                conn.execute(f"CREATE TABLE {table} ({ddl})")
+            insert = (
+                f"INSERT INTO {table} ({', '.join(_quote(c) for c in columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})"
+            )
+
+        rows = _stream(
+            _bindable(frame, schema),
+            sink.batch_size,
+            lambda batch: conn.executemany(insert, batch.iter_rows()),
+        )
+
+        if not exists:
+            _finish_fresh(conn, sink, optimistic=True)
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return rows
+
+
+def _duckdb() -> Any:
+    try:
+        import duckdb
+    except ImportError as e:
+        raise UnsupportedFormatError(
+            "DuckDB output needs the optional 'duckdb' package: "
+            "pip install 'polarspipe[duckdb]'."
+        ) from e
+    return duckdb
+
+
+def require_driver(path: str | Path) -> None:
+    """Raise UnsupportedFormatError now if `path` is a database we cannot load."""
+    if database_kind(path) == "duckdb":
+        _duckdb()
+
+
+def _load_duckdb(frame: pl.LazyFrame, path: Path, sink: DatabaseSink) -> int:
+    """Native Arrow ingestion: each batch is scanned by DuckDB without copies."""
+    duckdb = _duckdb()
+    table = _quote(sink.table)
+    conn = duckdb.connect(str(path))
+    try:
+        conn.begin()
+        if sink.mode == "replace":
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        exists = conn.execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = ?",
+            [sink.table],
+        ).fetchone()
+
+        columns = frame.collect_schema().names()
+        if not exists:
+            conn.register("batch", frame.clear().collect().to_arrow())
+            conn.execute(f"CREATE TABLE {table} AS SELECT * FROM batch")
+            conn.unregister("batch")
+        if exists and sink.upsert_key:
+            conn.execute(_index_sql(sink.table, sink.upsert_key, unique=True))
+            updates = ", ".join(
+                f"{_quote(c)} = excluded.{_quote(c)}"
+                for c in columns
+                if c != sink.upsert_key
+            )
+            insert = (
+                f"INSERT INTO {table} SELECT * FROM batch "
+                f"ON CONFLICT ({_quote(sink.upsert_key)}) "
+                + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+            )
+        else:
+            insert = f"INSERT INTO {table} SELECT * FROM batch"
+
+        def _insert(batch: pl.DataFrame) -> None:
+            conn.register("batch", batch.to_arrow())
+            conn.execute(insert)
+            conn.unregister("batch")
+
+        rows = _stream(frame, sink.batch_size, _insert)
+
+        if not exists:
+            _finish_fresh(conn, sink, optimistic=False)
+        conn.commit()
+    except BaseException:
+        # A failed commit has already ended the transaction.
+        with contextlib.suppress(duckdb.Error):
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return rows
+
+
+def database_kind(path: str | Path) -> DatabaseKind | None:
+    return DATABASE_SUFFIXES.get(Path(path).suffix.lower())
+
+
+def load_frame(
+    frame: pl.DataFrame | pl.LazyFrame,
+    path: str | Path,
+    sink: DatabaseSink | None = None,
+) -> int:
+    """
+    Stream `frame` into the SQLite (.db/.sqlite/.sqlite3) or DuckDB (.duckdb)
+    file at `path`. Returns the number of rows loaded.
+    """
+    target = Path(path)
+    kind = database_kind(target)
+    if kind is None:
+        raise UnsupportedFormatError(f"Not a database target: {target}")
+    options = sink or DatabaseSink()
+    if options.batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    loader = _load_sqlite if kind == "sqlite" else _load_duckdb
+    rows = loader(frame.lazy(), target, options)
+    logger.info(
+        {
+            "stage": "load_database",
+            "path": str(target),
+            "kind": kind,
+            "table": options.table,
+            "rows": rows,
+            "mode": options.mode,
+            "upsert_key": options.upsert_key,
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return rows
@@ -0,0 +1,193 @@
+"""
+Dtype compaction for cleaned frames.
+
+Sources arrive as all-Utf8 columns. compact_dtypes() looks at a sample of
+the cleaned rows and picks a cheaper type per string column, in order:
+
+- Int64 when every sampled value is a plain integer (no leading zeros or
+  "+"/"-0", at most 18 digits), so the cast round-trips exactly;
+- Datetime/Date when every sampled value parses with one ISO format;
+- Categorical when few distinct values repeat (Enum for columns whose
+  categories are passed explicitly).
+
+Casts are added to the lazy plan. A value the sample did not anticipate
+becomes null by default; `uncastable()` flags those rows so callers can
+quarantine them first. With `strict=True` such a value fails the query.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Mapping, Sequence, cast
+
+import polars as pl
+from polars._typing import PolarsDataType, PolarsTemporalType
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_ROWS = 100_000
+MAX_CATEGORIES = 10_000
+MAX_CARDINALITY_RATIO = 0.5
+# Tried in order; the first that parses the whole sample wins.
+DATETIME_FORMATS: tuple[tuple[str, PolarsTemporalType], ...] = (
+    ("%Y-%m-%dT%H:%M:%S%.f%z", pl.Datetime),
+    ("%Y-%m-%dT%H:%M:%S%.f", pl.Datetime),
+    ("%Y-%m-%d %H:%M:%S%.f", pl.Datetime),
+    ("%Y-%m-%d", pl.Date),
+)
+_INTEGER = r"^(0|-?[1-9][0-9]{0,17})$"
+
+
+@dataclass(frozen=True)
+class Compaction:
+    """One column's new dtype plus its in-memory size on the sample."""
+
+    column: str
+    target: PolarsDataType
+    format: str | None = None
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def _cast(
+    column: str, target: PolarsDataType, fmt: str | None, strict: bool
+) -> pl.Expr:
+    col = pl.col(column)
+    if fmt is not None:
+        temporal = cast(PolarsTemporalType, target)
+        return col.str.strptime(temporal, fmt, strict=strict).alias(column)
+    return col.cast(target, strict=strict).alias(column)
+
+
+def _infer(
+    values: pl.Series,
+    *,
+    max_categories: int,
+    max_cardinality_ratio: float,
+) -> tuple[PolarsDataType, str | None] | None:
+    if values.is_empty():
+        return None
+    if values.str.contains(_INTEGER).all():
+        return pl.Int64, None
+    for fmt, kind in DATETIME_FORMATS:
+        parsed = values.str.strptime(kind, fmt, strict=False)
+        if parsed.null_count() == 0:
+            return parsed.dtype, fmt
+    distinct = values.n_unique()
+    if distinct <= max_categories and distinct <= max_cardinality_ratio * len(values):
+        return pl.Categorical(), None
+    return None
+
+
+def infer_compaction(
+    sample: pl.DataFrame,
+    *,
+    keep: Sequence[str] = ("id",),
+    enums: Mapping[str, Sequence[str]] | None = None,
+    max_categories: int = MAX_CATEGORIES,
+    max_cardinality_ratio: float = MAX_CARDINALITY_RATIO,
+) -> list[Compaction]:
+    """
+    Compaction plan for the Utf8 columns of `sample` (columns in `keep` are
+    left alone). `enums` maps columns to their full category list.
+    """
+    plan = []
+    for column, dtype in sample.schema.items():
+        if column in keep or dtype != pl.Utf8:
+            continue
+        if enums and column in enums:
+            target: tuple[PolarsDataType, str | None] | None = (
+                pl.Enum(list(enums[column])),
+                None,
+            )
+        else:
+            target = _infer(
+                sample[column].drop_nulls(),
+                max_categories=max_categories,
+                max_cardinality_ratio=max_cardinality_ratio,
+            )
+        if target is None:
+            continue
+        after = sample.select(_cast(column, *target, strict=False))[column]
+        plan.append(
+            Compaction(
+                column,
+                after.dtype,
+                target[1],
+                bytes_before=int(sample[column].estimated_size()),
+                bytes_after=int(after.estimated_size()),
+            )
+        )
+    return plan
+
+
+def uncastable(plan: Sequence[Compaction]) -> pl.Expr:
+    """
+    `uncastable_<column>` for the first planned column whose non-null value
+    the cast would turn into null; null for rows every cast accepts.
+    """
+    rules = [
+        pl.when(
+            pl.col(c.column).is_not_null()
+            & _cast(c.column, c.target, c.format, strict=False).is_null()
+        ).then(pl.lit(f"uncastable_{c.column}"))
+        for c in plan
+    ]
+    return pl.coalesce(rules) if rules else pl.lit(None, dtype=pl.Utf8)
+
+
+def apply_compaction(
+    frame: pl.LazyFrame, plan: Sequence[Compaction], *, strict: bool = False
+) -> pl.LazyFrame:
+    """Add the casts in `plan` to `frame` (columns no longer Utf8 are skipped)."""
+    schema = frame.collect_schema()
+    exprs = [
+        _cast(c.column, c.target, c.format, strict)
+        for c in plan
+        if schema.get(c.column) == pl.Utf8
+    ]
+    return frame.with_columns(exprs) if exprs else frame
+
+
+def compact_dtypes(
+    frame: pl.LazyFrame,
+    *,
+    sample: pl.DataFrame | None = None,
+    keep: Sequence[str] = ("id",),
+    enums: Mapping[str, Sequence[str]] | None = None,
+    strict: bool = False,
+) -> tuple[pl.LazyFrame, list[Compaction]]:
+    """
+    Infer a plan from `sample` (default: the first SAMPLE_ROWS rows of
+    `frame`), apply it lazily and log the per-column memory saved.
+    """
+    t0 = time.perf_counter()
+    if sample is None:
+        sample = frame.limit(SAMPLE_ROWS).collect(engine="streaming")
+    plan = infer_compaction(sample, keep=keep, enums=enums)
+    before = sum(c.bytes_before for c in plan)
+    after = sum(c.bytes_after for c in plan)
+    logger.info(
+        {
+            "stage": "compact_dtypes",
+            "rows_sampled": sample.height,
+            "columns": {
+                c.column: {
+                    "dtype": str(c.target),
+                    "bytes_before": c.bytes_before,
+                    "bytes_after": c.bytes_after,
+                }
+                for c in plan
+            },
+            "bytes_saved_sampled": before - after,
+            "saved_pct": round(100 * (before - after) / before, 1) if before else 0.0,
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return apply_compaction(frame, plan, strict=strict), plan
@@ -32,3 +32,21 @@ class IngestionProfilerWarning(IngestionError):
     """Raised when profiling indicates excessive CPU or RAM."""
 
     pass
+
+
+class StaleIndexError(IngestionError):
+    """Raised when a sidecar index no longer matches its dataset."""
+
+    pass
+
+
+class UnsupportedFormatError(IngestionError):
+    """Raised when a file extension maps to no known reader or writer."""
+
+    pass
+
+
+class ShardManifestError(IngestionError):
+    """Raised when shard parts do not match their plan (missing, stale, corrupt)."""
+
+    pass
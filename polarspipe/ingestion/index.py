@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Iterable, Sequence, cast
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+
+from .exceptions import IngestionFileNotFound, StaleIndexError
+
+logger = logging.getLogger(__name__)
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 2
+DEFAULT_FPP = 0.01
+HASH_SEEDS = (0xB100, 0xF11E)
+
+
+def hash_id() -> str:
+    """Identifies the hash behind persisted filters (Polars may change it)."""
+    return f"polars-{pl.__version__}-seeds{HASH_SEEDS[0]:x}.{HASH_SEEDS[1]:x}"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter with double hashing over the Polars hash of the
+    values' string form, computed a whole Series at a time. That hash may
+    change between Polars versions, so indexes record `hash_id()` and are
+    rebuilt when it differs.
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: bytes | None = None):
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, num_hashes)
+        size = (self.num_bits + 7) // 8
+        self.bits = (
+            np.frombuffer(bits, dtype=np.uint8).copy()
+            if bits is not None
+            else np.zeros(size, dtype=np.uint8)
+        )
+
+    @classmethod
+    def for_capacity(cls, items: int, fpp: float = DEFAULT_FPP) -> BloomFilter:
+        n = max(1, items)
+        num_bits = math.ceil(-n * math.log(fpp) / (math.log(2) ** 2))
+        num_hashes = round(num_bits / n * math.log(2))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, values: pl.Series) -> np.ndarray:
+        """Bit positions, shape (num_hashes, len(values)); uint64 math wraps."""
+        text = values.cast(pl.Utf8)
+        h1 = text.hash(seed=HASH_SEEDS[0]).to_numpy()
+        h2 = text.hash(seed=HASH_SEEDS[1]).to_numpy() | np.uint64(1)
+        i = np.arange(self.num_hashes, dtype=np.uint64)[:, None]
+        return (h1 + i * h2) % np.uint64(self.num_bits)
+
+    def update(self, values: pl.Series) -> None:
+        """Add every non-null value of `values`."""
+        pos = self._positions(values.drop_nulls()).ravel()
+        masks = np.left_shift(np.uint8(1), (pos & 7).astype(np.uint8))
+        np.bitwise_or.at(self.bits, pos >> 3, masks)
+
+    def might_contain(self, values: pl.Series) -> np.ndarray:
+        """Boolean array: False where a value is certainly absent."""
+        pos = self._positions(values)
+        return ((self.bits[pos >> 3] >> (pos & 7)) & 1).all(axis=0)
+
+    def add(self, value: Any) -> None:
+        self.update(pl.Series([value]))
+
+    def __contains__(self, value: Any) -> bool:
+        return bool(self.might_contain(pl.Series([value]))[0])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "bits": base64.b64encode(self.bits.tobytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> BloomFilter:
+        return cls(data["num_bits"], data["num_hashes"], base64.b64decode(data["bits"]))
+
+
+def index_path(path: str | Path) -> Path:
+    p = Path(path)
+    return p.with_name(p.name + INDEX_SUFFIX)
+
+
+def _fingerprint(path: Path) -> dict[str, Any]:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _json_scalar(value: Any) -> Any:
+    return value if isinstance(value, (str, int, float, bool)) else None
+
+
+def build_index(
+    path: str | Path,
+    columns: Sequence[str] = ("id",),
+    *,
+    fpp: float = DEFAULT_FPP,
+) -> Path:
+    """
+    Write a sidecar index next to a Parquet dataset.
+
+    For each key column and row group it stores a Bloom filter of the distinct
+    values plus the footer min/max (when the column has usable statistics).
+    Row groups are read one at a time, one column at a time.
+    """
+    p = Path(path)
+    if not p.exists():
+        raise IngestionFileNotFound(f"File does not exist: {p}")
+
+    t0 = time.perf_counter()
+    parquet = pq.ParquetFile(p)
+    meta = parquet.metadata
+    names = parquet.schema_arrow.names
+    entries: dict[str, list[dict[str, Any]]] = {}
+
+    for col in columns:
+        col_idx = names.index(col)
+        groups: list[dict[str, Any]] = []
+        for rg in range(meta.num_row_groups):
+            column = parquet.read_row_group(rg, columns=[col]).column(0)
+            values = cast(pl.Series, pl.from_arrow(column)).unique()
+            bloom = BloomFilter.for_capacity(len(values), fpp)
+            bloom.update(values)
+
+            stats = meta.row_group(rg).column(col_idx).statistics
+            has_stats = stats is not None and stats.has_min_max
+            groups.append(
+                {
+                    "rows": meta.row_group(rg).num_rows,
+                    "min": _json_scalar(stats.min) if has_stats else None,
+                    "max": _json_scalar(stats.max) if has_stats else None,
+                    "bloom": bloom.to_dict(),
+                }
+            )
+        entries[col] = groups
+
+    target = index_path(p)
+    payload = {
+        "version": INDEX_VERSION,
+        "source": p.name,
+        "fingerprint": _fingerprint(p),
+        "hash": hash_id(),
+        "num_row_groups": meta.num_row_groups,
+        "columns": entries,
+    }
+    target.write_text(json.dumps(payload), encoding="utf-8")
+
+    logger.info(
+        {
+            "stage": "index_built",
+            "path": str(p),
+            "index": str(target),
+            "columns": list(columns),
+            "row_groups": meta.num_row_groups,
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return target
+
+
+def load_index(path: str | Path) -> dict[str, Any]:
+    """Load the sidecar for `path`, refusing it if the dataset changed since."""
+    p = Path(path)
+    target = index_path(p)
+    if not target.exists():
+        raise IngestionFileNotFound(f"Index does not exist: {target}")
+
+    index = json.loads(target.read_text(encoding="utf-8"))
+    fresh = index.get("fingerprint") == _fingerprint(p)
+    same_hash = index.get("hash") == hash_id()
+    if index.get("version") != INDEX_VERSION or not fresh or not same_hash:
+        raise StaleIndexError(f"Index {target} is stale; rebuild it.")
+    return index
+
+
+def candidate_row_groups(
+    index: dict[str, Any], column: str, values: Iterable[Any]
+) -> list[int]:
+    """Row groups that may contain any of `values` according to min/max + bloom."""
+    if column not in index["columns"]:
+        raise KeyError(f"Column '{column}' is not indexed.")
+
+    wanted = list(values)
+    groups: list[int] = []
+    for rg, entry in enumerate(index["columns"][column]):
+        lo, hi = entry["min"], entry["max"]
+        in_range = [
+            v
+            for v in wanted
+            if lo is None or hi is None or type(v) is not type(lo) or lo <= v <= hi
+        ]
+        if not in_range:
+            continue
+        bloom = BloomFilter.from_dict(entry["bloom"])
+        if bloom.might_contain(pl.Series(in_range, strict=False)).any():
+            groups.append(rg)
+    return groups
+
+
+def lookup(
+    path: str | Path,
+    values: Iterable[Any],
+    *,
+    column: str = "id",
+    columns: Sequence[str] | None = None,
+) -> pl.DataFrame:
+    """
+    Fetch rows whose `column` is in `values`, reading only candidate row groups.
+    """
+    p = Path(path)
+    wanted = list(values)
+    index = load_index(p)
+    groups = candidate_row_groups(index, column, wanted)
+
+    logger.info(
+        {
+            "stage": "index_lookup",
+            "path": str(p),
+            "column": column,
+            "keys": len(wanted),
+            "row_groups_read": len(groups),
+            "row_groups_total": index["num_row_groups"],
+        }
+    )
+
+    parquet = pq.ParquetFile(p)
+    projection = list(columns) if columns else None
+    if projection is not None and column not in projection:
+        projection.append(column)
+    if groups:
+        table = parquet.read_row_groups(groups, columns=projection)
+    else:
+        table = parquet.schema_arrow.empty_table()
+        if projection is not None:
+            table = table.select(projection)
+
+    frame = cast(pl.DataFrame, pl.from_arrow(table))
+    return frame.filter(pl.col(column).is_in(wanted))
+
+
+def contains(path: str | Path, value: Any, *, column: str = "id") -> bool:
+    """True when `value` is present in `column` of the indexed dataset."""
+    return lookup(path, [value], column=column, columns=[column]).height > 0
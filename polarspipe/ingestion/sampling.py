@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import io
+import logging
+import math
+import os
+import random
+import time
+from pathlib import Path
+from typing import Literal, cast
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from .reader import _assert_file_exists, scan_file
+
+logger = logging.getLogger(__name__)
+DEFAULT_SEED = 0
+BLOCK_BYTES = 256 * 1024  # bytes read per random offset for text formats
+_KEY = "__sample_key"
+
+SampleMethod = Literal["auto", "reservoir", "row_groups", "byte_ranges"]
+
+
+def reservoir_sample(
+    frame: pl.DataFrame | pl.LazyFrame, n: int, *, seed: int = DEFAULT_SEED
+) -> pl.DataFrame:
+    """
+    Uniform sample of `n` rows in one streaming pass with bounded memory.
+
+    Every row gets a seeded pseudo-random key (hash of its position); the rows
+    with the n smallest keys so far are kept, batch by batch.
+    """
+    lf = frame.lazy()
+    reservoir: pl.DataFrame | None = None
+    offset = 0
+    for batch in lf.collect_batches():
+        keyed = batch.with_columns(
+            pl.int_range(offset, offset + batch.height, dtype=pl.UInt64)
+            .hash(seed)
+            .alias(_KEY)
+        )
+        offset += batch.height
+        merged = keyed if reservoir is None else pl.concat([reservoir, keyed])
+        reservoir = merged.bottom_k(n, by=_KEY)
+
+    if reservoir is None:
+        return lf.limit(0).collect()
+    return reservoir.sort(_KEY).drop(_KEY)
+
+
+def row_group_sample(
+    path: str | Path, n: int, *, seed: int = DEFAULT_SEED
+) -> pl.DataFrame:
+    """Read randomly chosen Parquet row groups until they hold >= n rows."""
+    parquet = pq.ParquetFile(_assert_file_exists(Path(path)))
+    meta = parquet.metadata
+    order = list(range(meta.num_row_groups))
+    random.Random(seed).shuffle(order)
+
+    chosen: list[int] = []
+    rows = 0
+    for rg in order:
+        if rows >= n:
+            break
+        chosen.append(rg)
+        rows += meta.row_group(rg).num_rows
+
+    df = cast(pl.DataFrame, pl.from_arrow(parquet.read_row_groups(sorted(chosen))))
+    return df.sample(n, seed=seed) if df.height > n else df
+
+
+def _complete_lines(block: bytes, at_start: bool) -> bytes:
+    """Drop the partial first line (unless at file start) and partial last line."""
+    if not at_start:
+        first_nl = block.find(b"\n")
+        block = block[first_nl + 1 :] if first_nl >= 0 else b""
+    last_nl = block.rfind(b"\n")
+    return block[: last_nl + 1] if last_nl >= 0 else b""
+
+
+def byte_range_sample(
+    path: str | Path,
+    n: int,
+    *,
+    seed: int = DEFAULT_SEED,
+    block_bytes: int = BLOCK_BYTES,
+) -> pl.DataFrame:
+    """
+    Sample NDJSON/CSV by reading newline-aligned blocks at random offsets.
+
+    Only ~n rows worth of bytes are read. CSV blocks get the header prepended;
+    rows with embedded newlines inside quotes may be split and are skipped.
+    """
+    p = _assert_file_exists(Path(path))
+    is_csv = p.suffix.lower() == ".csv"
+    size = os.path.getsize(p)
+
+    with p.open("rb") as fh:
+        header = fh.readline() if is_csv else b""
+        probe = _complete_lines(fh.read(block_bytes), at_start=True)
+        avg_line = max(1.0, len(probe) / max(1, probe.count(b"\n")))
+        body = size - len(header)
+
+        blocks_needed = math.ceil(n * avg_line / block_bytes)
+        if blocks_needed * block_bytes >= body:
+            return reservoir_sample(scan_file(p), n, seed=seed)
+
+        candidates = range(len(header), size - block_bytes, block_bytes)
+        rng = random.Random(seed)
+        starts = sorted(rng.sample(candidates, min(blocks_needed, len(candidates))))
+        frames: list[pl.DataFrame] = []
+        for start in starts:
+            fh.seek(start)
+            lines = _complete_lines(fh.read(block_bytes), at_start=start == 0)
+            if not lines:
+                continue
+            try:
+                if is_csv:
+                    frames.append(pl.read_csv(io.BytesIO(header + lines)))
+                else:
+                    frames.append(pl.read_ndjson(io.BytesIO(lines)))
+            except pl.exceptions.PolarsError:
+                continue  # block split a quoted multi-line record
+
+    df = pl.concat(frames, how="diagonal_relaxed") if frames else pl.DataFrame()
+    return df.sample(n, seed=seed) if df.height > n else df
+
+
+def sample_file(
+    path: str | Path,
+    n: int,
+    *,
+    seed: int = DEFAULT_SEED,
+    method: SampleMethod = "auto",
+) -> pl.DataFrame:
+    """
+    Representative sample of up to `n` rows from a file.
+
+    auto: Parquet -> random row groups, NDJSON/CSV -> random byte ranges,
+    anything else -> streaming reservoir over scan_file.
+    """
+    p = Path(path)
+    suffix = p.suffix.lower()
+    if method == "auto":
+        if suffix == ".parquet":
+            method = "row_groups"
+        elif suffix in {".ndjson", ".jsonl", ".csv"}:
+            method = "byte_ranges"
+        else:
+            method = "reservoir"
+
+    t0 = time.perf_counter()
+    if method == "row_groups":
+        df = row_group_sample(p, n, seed=seed)
+    elif method == "byte_ranges":
+        df = byte_range_sample(p, n, seed=seed)
+    else:
+        df = reservoir_sample(scan_file(p), n, seed=seed)
+
+    logger.info(
+        {
+            "stage": "sample",
+            "path": str(p),
+            "method": method,
+            "rows": df.height,
+            "requested": n,
+            "seed": seed,
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return df
+
+
+def align_to_schema(sample: pl.DataFrame, schema: pl.Schema) -> pl.DataFrame:
+    """
+    Cast an independently parsed sample to the scan's schema (missing columns
+    become nulls), so sample-based metrics see the same dtypes as the data.
+    """
+    return sample.select(
+        [
+            (
+                pl.col(name).cast(dtype, strict=False)
+                if name in sample.columns
+                else pl.lit(None, dtype=dtype).alias(name)
+            )
+            for name, dtype in schema.items()
+        ]
+    )
@@ -0,0 +1,548 @@
+"""
+Approximate per-column profiles built in one streaming pass.
+
+Every column gets row/null counts, min/max and a HyperLogLog distinct
+count. Numeric columns also get a relative-error quantile sketch
+(DDSketch-style log buckets); string columns get the same sketch over
+their lengths plus a power-of-two length histogram; every column keeps
+Misra-Gries heavy hitters. All updates are vectorized per batch and each
+sketch has a fixed memory ceiling, so a profile costs one scan regardless
+of the row count.
+
+Profiles of separate inputs (files, shards) merge into the profile of
+their union with the same error bounds as one scan, and round-trip
+through JSON. HyperLogLog registers depend on the
+Polars hash, so profiles only merge when built with the same Polars
+version (recorded as `hash`).
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+import polars as pl
+from polars._typing import PolarsDataType
+
+from .reader import scan_file
+
+logger = logging.getLogger(__name__)
+
+HLL_PRECISION = 14  # 16384 registers, ~0.8% standard error
+HASH_SEED = 0x5EED
+QUANTILE_ACCURACY = 0.01
+QUANTILE_MAX_BUCKETS = 2048
+HEAVY_HITTERS = 256
+BATCH_ROWS = 100_000
+REPORTED_QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+PROFILE_VERSION = 1
+
+
+def hash_id() -> str:
+    return f"polars-{pl.__version__}-seed{HASH_SEED}"
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)  # dates, datetimes, decimals: ISO text orders correctly
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 2**precision 6-bit registers."""
+
+    def __init__(
+        self, precision: int = HLL_PRECISION, registers: pl.Series | None = None
+    ) -> None:
+        self.precision = precision
+        self.registers = (
+            registers
+            if registers is not None
+            else pl.zeros(1 << precision, dtype=pl.UInt8, eager=True)
+        )
+
+    def update(self, values: pl.Series) -> None:
+        width = 64 - self.precision
+        hashed = values.drop_nulls().hash(seed=HASH_SEED)
+        if hashed.is_empty():
+            return
+        tail = hashed % (1 << width)
+        batch = (
+            pl.DataFrame(
+                {
+                    "idx": hashed // (1 << width),
+                    # Position of the first 1 bit in the low `width` bits.
+                    "rank": tail.bitwise_leading_zeros() - self.precision + 1,
+                }
+            )
+            .group_by("idx")
+            .agg(pl.col("rank").max())
+        )
+        idx = batch["idx"].cast(pl.Int64)
+        current = self.registers.gather(idx)
+        rank = batch["rank"].cast(pl.UInt8)
+        self.registers = self.registers.scatter(
+            idx, current.zip_with(current >= rank, rank)
+        )
+
+    def merge(self, other: HyperLogLog) -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different sizes.")
+        mine, theirs = self.registers, other.registers
+        self.registers = mine.zip_with(mine >= theirs, theirs)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        total = (2.0 ** (-self.registers.cast(pl.Float64))).sum()
+        raw = alpha * m * m / total
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting
+        return round(raw)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def to_dict(self) -> dict[str, Any]:
+        raw = bytes(self.registers.to_list())
+        return {"p": self.precision, "registers": base64.b64encode(raw).decode()}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> HyperLogLog:
+        raw = base64.b64decode(data["registers"])
+        return cls(data["p"], pl.Series(list(raw), dtype=pl.UInt8))
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantiles with relative error `accuracy` (DDSketch). When
+    more than `max_buckets` are in use, the lowest buckets are folded
+    together, which only coarsens the smallest magnitudes.
+    """
+
+    def __init__(
+        self,
+        accuracy: float = QUANTILE_ACCURACY,
+        max_buckets: int = QUANTILE_MAX_BUCKETS,
+    ) -> None:
+        self.accuracy = accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.positive: dict[int, int] = {}
+        self.negative: dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _add(self, target: dict[int, int], magnitudes: pl.Series) -> None:
+        if magnitudes.is_empty():
+            return
+        keys = (magnitudes.log() / math.log(self.gamma)).ceil().cast(pl.Int64)
+        for key, n in keys.value_counts().iter_rows():
+            target[key] = target.get(key, 0) + n
+
+    def update(self, values: pl.Series) -> None:
+        x = values.drop_nulls().cast(pl.Float64)
+        x = x.filter(x.is_finite())
+        self.count += len(x)
+        self.zeros += int((x == 0).sum())
+        self._add(self.positive, x.filter(x > 0))
+        self._add(self.negative, -x.filter(x < 0))
+        self._collapse()
+
+    def _collapse(self) -> None:
+        for side in (self.negative, self.positive):
+            while len(side) > self.max_buckets:
+                # Fold the smallest magnitude into its neighbour.
+                low, nxt = sorted(side)[:2]
+                side[nxt] += side.pop(low)
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.accuracy != self.accuracy:
+            raise ValueError("Cannot merge quantile sketches of different accuracy.")
+        for mine, theirs in (
+            (self.positive, other.positive),
+            (self.negative, other.negative),
+        ):
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self._collapse()
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "accuracy": self.accuracy,
+            "max_buckets": self.max_buckets,
+            "positive": {str(k): n for k, n in self.positive.items()},
+            "negative": {str(k): n for k, n in self.negative.items()},
+            "zeros": self.zeros,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> QuantileSketch:
+        sketch = cls(data["accuracy"], data["max_buckets"])
+        sketch.positive = {int(k): n for k, n in data["positive"].items()}
+        sketch.negative = {int(k): n for k, n in data["negative"].items()}
+        sketch.zeros, sketch.count = data["zeros"], data["count"]
+        return sketch
+
+
+class HeavyHitters:
+    """
+    Misra-Gries summary with `k` counters: every value occurring more than
+    n / (k + 1) times is kept, and counts are low by at most that much.
+    """
+
+    def __init__(self, k: int = HEAVY_HITTERS) -> None:
+        self.k = k
+        self.counts: dict[str, int] = {}
+        self.seen = 0
+
+    def _reduce(self, counts: dict[str, int]) -> dict[str, int]:
+        if len(counts) <= self.k:
+            return counts
+        cut = sorted(counts.values(), reverse=True)[self.k]
+        return {v: n - cut for v, n in counts.items() if n > cut}
+
+    def update(self, values: pl.Series) -> None:
+        counts = values.drop_nulls().cast(pl.Utf8).value_counts(sort=True)
+        self.seen += int(counts["count"].sum())
+        if counts.height > self.k:
+            # The batch's own Misra-Gries reduction, done in Polars.
+            cut = counts["count"][self.k]
+            counts = counts.filter(pl.col("count") > cut).with_columns(
+                pl.col("count") - cut
+            )
+        merged = dict(self.counts)
+        for value, n in counts.iter_rows():
+            merged[value] = merged.get(value, 0) + n
+        self.counts = self._reduce(merged)
+
+    def merge(self, other: HeavyHitters) -> None:
+        merged = dict(self.counts)
+        for value, n in other.counts.items():
+            merged[value] = merged.get(value, 0) + n
+        self.counts = self._reduce(merged)
+        self.seen += other.seen
+
+    def top(self, n: int = 10) -> list[tuple[str, int]]:
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:n]
+
+    @property
+    def max_error(self) -> int:
+        return self.seen // (self.k + 1)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"k": self.k, "counts": self.counts, "seen": self.seen}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> HeavyHitters:
+        sketch = cls(data["k"])
+        sketch.counts, sketch.seen = dict(data["counts"]), data["seen"]
+        return sketch
+
+
+def _length_label(bucket: int) -> str:
+    """Bucket b holds lengths with bit length b: 0, 1, 2-3, 4-7, ..."""
+    if bucket == 0:
+        return "0"
+    low = 1 << (bucket - 1)
+    return f"{low}-{2 * low - 1}" if low > 1 else "1"
+
+
+@dataclass
+class ColumnSketch:
+    """All sketches for one column."""
+
+    dtype: str
+    kind: str  # "numeric", "string" or "other"
+    rows: int = 0
+    nulls: int = 0
+    min: Any = None
+    max: Any = None
+    distinct: HyperLogLog = field(default_factory=HyperLogLog)
+    heavy: HeavyHitters = field(default_factory=HeavyHitters)
+    quantiles: QuantileSketch | None = None
+    lengths: dict[int, int] = field(default_factory=dict)
+
+    @classmethod
+    def for_dtype(cls, dtype: PolarsDataType) -> ColumnSketch:
+        if dtype.is_numeric():
+            kind = "numeric"
+        elif dtype in (pl.Utf8, pl.Categorical, pl.Enum):
+            kind = "string"
+        else:
+            kind = "other"
+        return cls(
+            str(dtype),
+            kind,
+            quantiles=QuantileSketch() if kind != "other" else None,
+        )
+
+    @classmethod
+    def empty_like(cls, like: ColumnSketch) -> ColumnSketch:
+        """An empty sketch of the same column type as `like`."""
+        return cls(
+            like.dtype,
+            like.kind,
+            quantiles=QuantileSketch() if like.quantiles is not None else None,
+        )
+
+    def update(self, values: pl.Series) -> None:
+        self.rows += len(values)
+        self.nulls += values.null_count()
+        if self.kind == "string":
+            values = values.cast(pl.Utf8)
+        present = values.drop_nulls()
+        if present.is_empty() or values.dtype.is_nested():
+            return
+        lo, hi = _jsonable(present.min()), _jsonable(present.max())
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+        self.distinct.update(present)
+        self.heavy.update(present)
+        if self.kind == "numeric" and self.quantiles is not None:
+            self.quantiles.update(present)
+        elif self.kind == "string" and self.quantiles is not None:
+            lengths = present.str.len_chars()
+            self.quantiles.update(lengths)
+            # Bit length: 0 -> 0, 1 -> 1, 2-3 -> 2, 4-7 -> 3, ...
+            buckets = 32 - lengths.cast(pl.UInt32).bitwise_leading_zeros()
+            for bucket, n in buckets.value_counts().iter_rows():
+                self.lengths[bucket] = self.lengths.get(bucket, 0) + n
+
+    def check_mergeable(self, other: ColumnSketch) -> None:
+        """Raise ValueError unless `other` profiles the same kind of values."""
+        # Values and lengths do not mix, nor do min/max across unrelated types.
+        if other.kind != self.kind or (
+            self.kind == "other" and other.dtype != self.dtype
+        ):
+            raise ValueError(f"cannot merge {other.dtype} into {self.dtype}")
+
+    def merge(self, other: ColumnSketch) -> None:
+        self.check_mergeable(other)
+        self.rows += other.rows
+        self.nulls += other.nulls
+        for bound, pick in (("min", min), ("max", max)):
+            theirs = getattr(other, bound)
+            mine = getattr(self, bound)
+            if theirs is not None:
+                setattr(self, bound, theirs if mine is None else pick(mine, theirs))
+        self.distinct.merge(other.distinct)
+        self.heavy.merge(other.heavy)
+        if self.quantiles is not None and other.quantiles is not None:
+            self.quantiles.merge(other.quantiles)
+        for bucket, n in other.lengths.items():
+            self.lengths[bucket] = self.lengths.get(bucket, 0) + n
+
+    def summary(self, top: int = 10) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "dtype": self.dtype,
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "distinct_approx": self.distinct.estimate(),
+            "distinct_rel_error": round(self.distinct.relative_error, 4),
+            "min": self.min,
+            "max": self.max,
+            "top": self.heavy.top(top),
+            "top_max_error": self.heavy.max_error,
+        }
+        if self.quantiles is not None:
+            name = "length_quantiles" if self.kind == "string" else "quantiles"
+            out[name] = {
+                f"p{round(q * 100):02d}": self._reported(self.quantiles.quantile(q))
+                for q in REPORTED_QUANTILES
+            }
+        if self.lengths:
+            out["length_histogram"] = {
+                _length_label(b): n for b, n in sorted(self.lengths.items())
+            }
+        return out
+
+    def _reported(self, value: float | None) -> float | None:
+        if value is None:
+            return None
+        # Lengths are whole numbers; values keep the sketch's ~1% precision.
+        return round(value) if self.kind == "string" else float(f"{value:.4g}")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "dtype": self.dtype,
+            "kind": self.kind,
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "min": self.min,
+            "max": self.max,
+            "distinct": self.distinct.to_dict(),
+            "heavy": self.heavy.to_dict(),
+            "quantiles": self.quantiles.to_dict() if self.quantiles else None,
+            "lengths": {str(b): n for b, n in self.lengths.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> ColumnSketch:
+        return cls(
+            data["dtype"],
+            data["kind"],
+            rows=data["rows"],
+            nulls=data["nulls"],
+            min=data["min"],
+            max=data["max"],
+            distinct=HyperLogLog.from_dict(data["distinct"]),
+            heavy=HeavyHitters.from_dict(data["heavy"]),
+            quantiles=(
+                QuantileSketch.from_dict(data["quantiles"])
+                if data["quantiles"]
+                else None
+            ),
+            lengths={int(b): n for b, n in data["lengths"].items()},
+        )
+
+
+@dataclass
+class DatasetProfile:
+    """Column sketches plus the sources they were built from."""
+
+    columns: dict[str, ColumnSketch] = field(default_factory=dict)
+    sources: list[str] = field(default_factory=list)
+    hash: str = field(default_factory=hash_id)
+
+    @property
+    def rows(self) -> int:
+        return max((c.rows for c in self.columns.values()), default=0)
+
+    def update(self, batch: pl.DataFrame) -> None:
+        before = self.rows
+        for name, values in batch.to_dict().items():
+            if name not in self.columns:
+                self.columns[name] = ColumnSketch.for_dtype(values.dtype)
+                # Rows from earlier batches that lacked the column were nulls.
+                self.columns[name].rows = self.columns[name].nulls = before
+            self.columns[name].update(values)
+
+    def merge(self, other: DatasetProfile) -> DatasetProfile:
+        """Fold `other` into this profile (in place) and return it."""
+        if other.hash != self.hash:
+            raise ValueError(
+                f"Profiles hashed differently ({self.hash} vs {other.hash}); "
+                "rebuild them with the same Polars version."
+            )
+        for name in self.columns.keys() & other.columns.keys():
+            try:
+                self.columns[name].check_mergeable(other.columns[name])
+            except ValueError as e:
+                raise ValueError(f"Column '{name}': {e}.") from None
+        mine, theirs = self.rows, other.rows
+        for name in self.columns.keys() - other.columns.keys():
+            self.columns[name].rows += theirs
+            self.columns[name].nulls += theirs
+        for name, sketch in other.columns.items():
+            if name not in self.columns:
+                self.columns[name] = ColumnSketch.empty_like(sketch)
+                self.columns[name].rows = self.columns[name].nulls = mine
+            self.columns[name].merge(sketch)
+        self.sources.extend(other.sources)
+        return self
+
+    def summary(self, top: int = 10) -> dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "sources": self.sources,
+            "columns": {n: c.summary(top) for n, c in self.columns.items()},
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": PROFILE_VERSION,
+            "hash": self.hash,
+            "sources": self.sources,
+            "columns": {n: c.to_dict() for n, c in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> DatasetProfile:
+        if data.get("version") != PROFILE_VERSION:
+            raise ValueError(f"Unsupported profile version {data.get('version')}.")
+        return cls(
+            columns={n: ColumnSketch.from_dict(c) for n, c in data["columns"].items()},
+            sources=list(data["sources"]),
+            hash=data["hash"],
+        )
+
+    def save(self, path: str | Path) -> Path:
+        target = Path(path)
+        partial = target.with_name(target.name + ".part")
+        partial.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        partial.replace(target)
+        return target
+
+    @classmethod
+    def load(cls, path: str | Path) -> DatasetProfile:
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def profile_frame(
+    frame: pl.LazyFrame | pl.DataFrame,
+    *,
+    batch_rows: int = BATCH_ROWS,
+    source: str | None = None,
+) -> DatasetProfile:
+    """Sketch every column of `frame` in one streaming pass."""
+    t0 = time.perf_counter()
+    profile = DatasetProfile(sources=[source] if source else [])
+    lazy = frame.lazy() if isinstance(frame, pl.DataFrame) else frame
+    # sink_batches re-raises query errors; the callback runs on one thread.
+    lazy.sink_batches(profile.update, chunk_size=batch_rows, lazy=False)
+    logger.info(
+        {
+            "stage": "profile",
+            "source": source,
+            "rows": profile.rows,
+            "columns": len(profile.columns),
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return profile
+
+
+def profile_file(path: str | Path, *, batch_rows: int = BATCH_ROWS) -> DatasetProfile:
+    p = Path(path)
+    return profile_frame(scan_file(p), batch_rows=batch_rows, source=str(p))
+
+
+def merge_profiles(profiles: Iterable[DatasetProfile]) -> DatasetProfile:
+    merged = DatasetProfile()
+    for profile in profiles:
+        merged.merge(profile)
+    return merged
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from .exceptions import CorruptedFileError
+from .reader import _assert_file_exists, scan_file
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DatasetStats:
+    """
+    Row/null/min/max statistics for a dataset.
+
+    `provider` says where the numbers came from ("parquet_footer" costs a footer
+    read; "scan" read data). `rows_scanned` is 0 for metadata-only answers.
+    A None entry means the source could not answer for that column.
+    """
+
+    row_count: int | None
+    null_counts: dict[str, int | None]
+    min_values: dict[str, Any] = field(default_factory=dict)
+    max_values: dict[str, Any] = field(default_factory=dict)
+    provider: str = "scan"
+    rows_scanned: int = 0
+
+
+def parquet_stats(path: str | Path) -> DatasetStats:
+    """Answer from the Parquet footer only: no data pages are read."""
+    p = _assert_file_exists(Path(path))
+    try:
+        meta = pq.read_metadata(p)
+    except Exception as e:
+        raise CorruptedFileError(f"Unreadable Parquet footer: {p}") from e
+
+    nulls: dict[str, int | None] = {}
+    mins: dict[str, Any] = {}
+    maxs: dict[str, Any] = {}
+    for j in range(meta.num_columns):
+        name = meta.schema.column(j).path
+        if "." in name:
+            continue  # nested leaf; top-level stats only
+
+        null_total: int | None = 0
+        lo: Any = None
+        hi: Any = None
+        has_min_max = True
+        for rg in range(meta.num_row_groups):
+            stats = meta.row_group(rg).column(j).statistics
+            if stats is None or not stats.has_null_count:
+                null_total = None
+            elif null_total is not None:
+                null_total += stats.null_count
+            if stats is None or not stats.has_min_max:
+                has_min_max = False
+                continue
+            lo = stats.min if lo is None else min(lo, stats.min)
+            hi = stats.max if hi is None else max(hi, stats.max)
+
+        nulls[name] = null_total
+        mins[name] = lo if has_min_max else None
+        maxs[name] = hi if has_min_max else None
+
+    return DatasetStats(
+        row_count=meta.num_rows,
+        null_counts=nulls,
+        min_values=mins,
+        max_values=maxs,
+        provider="parquet_footer",
+    )
+
+
+def scan_stats(frame: pl.LazyFrame, *, limit: int | None = None) -> DatasetStats:
+    """
+    One streaming pass computing the same statistics from data.
+    `limit` caps the rows read (stats then describe that prefix only).
+    """
+    lf = frame.limit(limit) if limit is not None else frame
+    names = lf.collect_schema().names()
+    row = (
+        lf.select(
+            [pl.len().alias("__rows")]
+            + [pl.col(c).null_count().alias(f"nulls:{c}") for c in names]
+            + [pl.col(c).min().alias(f"min:{c}") for c in names]
+            + [pl.col(c).max().alias(f"max:{c}") for c in names]
+        )
+        .collect(engine="streaming")
+        .row(0, named=True)
+    )
+    return DatasetStats(
+        row_count=row["__rows"],
+        null_counts={c: row[f"nulls:{c}"] for c in names},
+        min_values={c: row[f"min:{c}"] for c in names},
+        max_values={c: row[f"max:{c}"] for c in names},
+        provider="scan",
+        rows_scanned=row["__rows"],
+    )
+
+
+# Suffix -> metadata-only provider. Formats without one fall back to a data scan.
+METADATA_PROVIDERS: dict[str, Callable[[Path], DatasetStats]] = {
+    ".parquet": parquet_stats,
+}
+
+
+def has_metadata_stats(path: str | Path) -> bool:
+    return Path(path).suffix.lower() in METADATA_PROVIDERS
+
+
+def dataset_stats(path: str | Path, *, limit: int | None = None) -> DatasetStats:
+    """
+    Statistics for `path`, from file metadata when the format carries it and
+    from a (optionally `limit`ed) streaming scan otherwise.
+    """
+    p = Path(path)
+    t0 = time.perf_counter()
+    provider = METADATA_PROVIDERS.get(p.suffix.lower())
+    stats = provider(p) if provider else scan_stats(scan_file(p), limit=limit)
+
+    logger.info(
+        {
+            "stage": "dataset_stats",
+            "path": str(p),
+            "provider": stats.provider,
+            "row_count": stats.row_count,
+            "rows_scanned": stats.rows_scanned,
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return stats
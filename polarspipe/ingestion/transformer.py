@@ -2,22 +2,97 @@ from __future__ import annotations
 
 import logging
 import time
+from pathlib import Path
 
 import polars as pl
 
+from .sampling import DEFAULT_SEED, align_to_schema, reservoir_sample, sample_file
+from .stats import dataset_stats, has_metadata_stats
+
 logger = logging.getLogger(__name__)
 SAMPLE_ROWS = 100_000  # sampling cap to keep metrics cheap
+SAMPLE_SEED = DEFAULT_SEED
 
 FrameLike = pl.DataFrame | pl.LazyFrame
+REJECT_REASON_COL = "reject_reason"
+# Part of the clean-cache key: bump whenever _clean_rows changes its output.
+CLEAN_RULES_VERSION = 1
+_WHITESPACE = " \n\r\t"
+
+
+def _normalize(frame: pl.LazyFrame) -> pl.LazyFrame:
+    return frame.with_columns(
+        [
+            pl.col("name")
+            .str.strip_chars(characters=_WHITESPACE)
+            .str.replace_all(r"\s+", " ")
+            .alias("name"),
+            pl.col("id")
+            .cast(pl.Utf8)
+            .str.strip_chars(characters=_WHITESPACE)
+            .alias("id"),
+        ]
+    )
+
+
+def _clean_rows(frame: pl.LazyFrame) -> pl.LazyFrame:
+    return _normalize(frame.drop_nulls()).filter(pl.col("id") != "")
+
+
+def clean_rows_eager(sample: pl.DataFrame) -> pl.DataFrame:
+    """The cleaning rules applied to an in-memory sample, without metrics."""
+    return _clean_rows(sample.lazy()).collect()
+
+
+def _reject_reason(columns: list[str]) -> pl.Expr:
+    """
+    First rule a row breaks, mirroring _clean_rows: a null in any column
+    (`null_<column>`), then an id that is empty once stripped (`empty_id`).
+    Null for rows that survive cleaning.
+    """
+    rules = [
+        pl.when(pl.col(col).is_null()).then(pl.lit(f"null_{col}")) for col in columns
+    ]
+    rules.append(
+        pl.when(
+            pl.col("id").cast(pl.Utf8).str.strip_chars(characters=_WHITESPACE) == ""
+        ).then(pl.lit("empty_id"))
+    )
+    return pl.coalesce(rules).alias(REJECT_REASON_COL)
 
 
-def clean(df: FrameLike) -> pl.LazyFrame:
+def _metrics_sample(
+    df: FrameLike, frame: pl.LazyFrame, source: str | Path | None
+) -> tuple[pl.DataFrame, str]:
+    """
+    Representative rows for metrics: random row groups / byte ranges of the
+    source file when known, a reservoir for in-memory frames, else the head.
+    """
+    if source is not None:
+        sample = sample_file(source, SAMPLE_ROWS, seed=SAMPLE_SEED)
+        return align_to_schema(sample, frame.collect_schema()), "file"
+    if isinstance(df, pl.DataFrame):
+        return reservoir_sample(df, SAMPLE_ROWS, seed=SAMPLE_SEED), "reservoir"
+    return frame.limit(SAMPLE_ROWS).collect(engine="streaming"), "head"
+
+
+def clean(df: FrameLike, *, source: str | Path | None = None) -> pl.LazyFrame:
+    """
+    Lazily drop incomplete rows and normalize `id`/`name`, logging metrics.
+
+    `source` is the file `df` was scanned from. When its format carries
+    statistics (Parquet footer), pre-clean metrics are answered from metadata
+    and no data is sampled.
+    """
     frame = df.lazy() if isinstance(df, pl.DataFrame) else df
 
     t0 = time.perf_counter()
 
+    if source is not None and has_metadata_stats(source):
+        return _clean_with_metadata_metrics(frame, Path(source), t0)
+
     # Pre-clean metrics sampled to avoid materializing the full dataset.
-    sample_before = frame.limit(SAMPLE_ROWS).collect(engine="streaming")
+    sample_before, sample_method = _metrics_sample(df, frame, source)
     null_counts = sample_before.null_count().to_dict(as_series=False)
     rows_sample_before = sample_before.height
     name_len_mean = (
@@ -32,47 +107,16 @@ def clean(df: FrameLike) -> pl.LazyFrame:
             "null_counts": null_counts,
             "rows_sampled": rows_sample_before,
             "sample_cap": SAMPLE_ROWS,
+            "sample_method": sample_method,
             "name_len_mean_sampled": name_len_mean,
         }
     )
 
     # Apply lazy cleaning across the full source without eager materialization.
-    cleaned = (
-        frame.drop_nulls()
-        .with_columns(
-            [
-                pl.col("name")
-                .str.strip_chars(characters=" \n\r\t")
-                .str.replace_all(r"\s+", " ")
-                .alias("name"),
-                pl.col("id")
-                .cast(pl.Utf8)
-                .str.strip_chars(characters=" \n\r\t")
-                .alias("id"),
-            ]
-        )
-        .filter(pl.col("id") != "")
-    )
+    cleaned = _clean_rows(frame)
 
     # Post-clean metrics computed only on the already collected sample.
-    sample_after = (
-        sample_before.lazy()
-        .drop_nulls()
-        .with_columns(
-            [
-                pl.col("name")
-                .str.strip_chars(characters=" \n\r\t")
-                .str.replace_all(r"\s+", " ")
-                .alias("name"),
-                pl.col("id")
-                .cast(pl.Utf8)
-                .str.strip_chars(characters=" \n\r\t")
-                .alias("id"),
-            ]
-        )
-        .filter(pl.col("id") != "")
-        .collect()
-    )
+    sample_after = _clean_rows(sample_before.lazy()).collect()
     rows_sample_after = sample_after.height
     name_len_mean_after = (
         sample_after.select(pl.col("name").str.len_chars().mean()).to_series()[0]
@@ -93,3 +137,54 @@ def clean(df: FrameLike) -> pl.LazyFrame:
     )
 
     return cleaned
+
+
+def _clean_with_metadata_metrics(
+    frame: pl.LazyFrame, source: Path, t0: float
+) -> pl.LazyFrame:
+    stats = dataset_stats(source)
+    logger.info(
+        {
+            "stage": "clean_pre",
+            "null_counts": stats.null_counts,
+            "rows_total": stats.row_count,
+            "rows_sampled": stats.rows_scanned,
+            "stats_provider": stats.provider,
+        }
+    )
+
+    cleaned = _clean_rows(frame)
+    logger.info(
+        {
+            "stage": "clean_post_schema",
+            "schema": cleaned.collect_schema(),
+            "stats_provider": stats.provider,
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return cleaned
+
+
+def clean_with_rejects(df: FrameLike) -> tuple[pl.LazyFrame, pl.LazyFrame]:
+    """
+    Split a source into (cleaned, rejected) LazyFrames that share one cached scan.
+
+    `cleaned` holds the same rows as clean(); `rejected` keeps the raw rows it
+    drops plus a `reject_reason` column. Collect both together (pl.collect_all or
+    writer.write_frames) so the source is read once.
+    """
+    frame = df.lazy() if isinstance(df, pl.DataFrame) else df
+    columns = frame.collect_schema().names()
+
+    tagged = frame.with_columns(_reject_reason(columns)).cache()
+    reason = pl.col(REJECT_REASON_COL)
+    cleaned = _normalize(tagged.filter(reason.is_null()).drop(REJECT_REASON_COL))
+    rejected = tagged.filter(reason.is_not_null())
+
+    logger.info(
+        {
+            "stage": "clean_split",
+            "reject_rules": [f"null_{col}" for col in columns] + ["empty_id"],
+        }
+    )
+    return cleaned, rejected
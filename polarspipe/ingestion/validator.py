@@ -71,7 +71,7 @@ def _is_dtype_compatible(actual: PolarsDataType, expected: PolarsDataType) -> bo
 
     Example heuristics:
         - Int8 / Int16 / Int32 / Int64 are mutually compatible.
-        - Utf8 is only compatible with Utf8.
+        - Utf8 also accepts Categorical / Enum (dtype compaction).
         - Boolean is exact.
     """
     numeric_types: set[PolarsDataType] = {
@@ -93,4 +93,7 @@ def _is_dtype_compatible(actual: PolarsDataType, expected: PolarsDataType) -> bo
     if actual in numeric_types and expected in numeric_types:
         return True
 
+    if expected == pl.Utf8 and actual in (pl.Categorical, pl.Enum):
+        return True
+
     return False
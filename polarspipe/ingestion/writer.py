@@ -1,14 +1,124 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal, Mapping
 
 import polars as pl
 
+from .database import DATABASE_SUFFIXES, DatabaseSink, load_frame
+from .exceptions import UnsupportedFormatError
+
 FrameLike = pl.DataFrame | pl.LazyFrame
+OutputFormat = Literal["parquet", "ndjson", "csv", "ipc", "sqlite", "duckdb"]
+IpcCompression = Literal["uncompressed", "lz4", "zstd"]
+
+# Extension -> writer. Anything else is an error, not a silent CSV.
+OUTPUT_FORMATS: dict[str, OutputFormat] = {
+    ".parquet": "parquet",
+    ".json": "ndjson",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+    ".arrow": "ipc",
+    ".ipc": "ipc",
+    ".feather": "ipc",
+    **DATABASE_SUFFIXES,
+}
+ParquetCompression = Literal[
+    "lz4", "uncompressed", "snappy", "gzip", "lzo", "brotli", "zstd"
+]
 
 
-def write_frame(frame: FrameLike, path: str | Path, *, streaming: bool = False) -> Path:
+@dataclass(frozen=True)
+class ParquetProfile:
+    """
+    Parquet layout knobs applied by write_frame.
+
+    sort_by clusters rows before writing so per-row-group min/max statistics
+    become selective and readers can skip row groups on point/range filters.
+    """
+
+    compression: ParquetCompression = "zstd"
+    compression_level: int | None = None
+    row_group_size: int | None = None
+    statistics: bool = True
+    sort_by: tuple[str, ...] = ()
+
+
+WRITER_PROFILES: dict[str, ParquetProfile] = {
+    "default": ParquetProfile(),
+    # Small row groups clustered on the key: `id == ...` touches one group.
+    "lookup": ParquetProfile(row_group_size=64_000, sort_by=("id",)),
+    # Time-ordered layout for `created_at` range scans.
+    "timeseries": ParquetProfile(row_group_size=128_000, sort_by=("created_at",)),
+    # Cold storage: slower to write, smallest on disk.
+    "archive": ParquetProfile(compression_level=19, row_group_size=1_000_000),
+}
+
+
+def resolve_profile(profile: str | ParquetProfile | None) -> ParquetProfile:
+    """Return a ParquetProfile from a registered name, an instance or None."""
+    if profile is None:
+        return WRITER_PROFILES["default"]
+    if isinstance(profile, ParquetProfile):
+        return profile
+    try:
+        return WRITER_PROFILES[profile]
+    except KeyError:
+        known = ", ".join(sorted(WRITER_PROFILES))
+        raise ValueError(
+            f"Unknown writer profile '{profile}' (known: {known})."
+        ) from None
+
+
+def _parquet_options(profile: ParquetProfile) -> dict[str, Any]:
+    return {
+        "compression": profile.compression,
+        "compression_level": profile.compression_level,
+        "row_group_size": profile.row_group_size,
+        "statistics": profile.statistics,
+    }
+
+
+def output_format(path: str | Path) -> OutputFormat:
+    """Writer for `path`'s extension; raises UnsupportedFormatError otherwise."""
+    suffix = Path(path).suffix.lower()
+    try:
+        return OUTPUT_FORMATS[suffix]
+    except KeyError:
+        known = ", ".join(sorted(OUTPUT_FORMATS))
+        raise UnsupportedFormatError(
+            f"Unsupported output extension '{suffix}' for {path} (known: {known})."
+        ) from None
+
+
+def _sink(
+    frame: pl.LazyFrame,
+    target: Path,
+    layout: ParquetProfile,
+    ipc_compression: IpcCompression = "uncompressed",
+) -> pl.LazyFrame:
+    """Deferred sink: nothing runs until the returned frame is collected."""
+    fmt = output_format(target)
+    if fmt == "parquet":
+        return frame.sink_parquet(target, lazy=True, **_parquet_options(layout))
+    if fmt == "ndjson":
+        return frame.sink_ndjson(target, lazy=True)
+    if fmt == "ipc":
+        return frame.sink_ipc(target, compression=ipc_compression, lazy=True)
+    return frame.sink_csv(target, lazy=True)
+
+
+def write_frame(
+    frame: FrameLike,
+    path: str | Path,
+    *,
+    streaming: bool = False,
+    profile: str | ParquetProfile | None = None,
+    ipc_compression: IpcCompression = "uncompressed",
+    database: DatabaseSink | None = None,
+) -> Path:
     """
     Persist a Polars frame to disk with minimal branching on extension.
 
@@ -16,21 +126,82 @@ def write_frame(frame: FrameLike, path: str | Path, *, streaming: bool = False)
         frame: DataFrame or LazyFrame to write.
         path: target path; extension chooses the writer.
         streaming: whether to allow Polars streaming execution when supported.
+            LazyFrames are sunk straight to disk instead of being collected.
+        profile: Parquet layout (name from WRITER_PROFILES or a ParquetProfile);
+            ignored for non-Parquet targets.
+        ipc_compression: codec for Arrow IPC (.arrow/.ipc/.feather) targets.
+            Keep "uncompressed" for files read back with memory mapping.
+        database: table/batching/upsert options for SQLite (.db/.sqlite/
+            .sqlite3) and DuckDB (.duckdb) targets, loaded in streaming
+            batches from the plan (see ingestion.database).
+
+    Raises:
+        UnsupportedFormatError: the extension has no writer.
     """
     target = Path(path)
+    fmt = output_format(target)
     target.parent.mkdir(parents=True, exist_ok=True)
+    if fmt in ("sqlite", "duckdb"):
+        load_frame(frame, target, database)
+        return target
+
+    layout = resolve_profile(profile)
+    if fmt == "parquet" and layout.sort_by:
+        frame = frame.sort(list(layout.sort_by))
+
+    if isinstance(frame, pl.LazyFrame) and streaming:
+        _sink(frame, target, layout, ipc_compression).collect(engine="streaming")
+        return target
 
     df = frame
     if isinstance(df, pl.LazyFrame):
         engine: Literal["auto", "streaming"] = "streaming" if streaming else "auto"
         df = df.collect(engine=engine)
 
-    suffix = target.suffix.lower()
-    if suffix in {".parquet"}:
-        df.write_parquet(target)
-    elif suffix in {".json", ".ndjson", ".jsonl"}:
+    if fmt == "parquet":
+        df.write_parquet(target, **_parquet_options(layout))
+    elif fmt == "ndjson":
         df.write_ndjson(target)
+    elif fmt == "ipc":
+        df.write_ipc(target, compression=ipc_compression)
     else:
         df.write_csv(target)
 
     return target
+
+
+def write_frames(
+    targets: Mapping[str | Path, pl.LazyFrame],
+    *,
+    profile: str | ParquetProfile | None = None,
+    ipc_compression: IpcCompression = "uncompressed",
+    database: DatabaseSink | None = None,
+) -> list[Path]:
+    """
+    Sink several LazyFrames in one streaming query.
+
+    Frames derived from a common `.cache()`d source (e.g. clean_with_rejects)
+    are multiplexed off a single scan instead of re-reading it per output.
+    Database targets cannot join that query; they are loaded afterwards.
+    """
+    layout = resolve_profile(profile)
+    paths: list[Path] = []
+    sinks: list[pl.LazyFrame] = []
+    loads: list[tuple[pl.LazyFrame, Path]] = []
+    for path, frame in targets.items():
+        target = Path(path)
+        fmt = output_format(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        paths.append(target)
+        if fmt in ("sqlite", "duckdb"):
+            loads.append((frame, target))
+            continue
+        if fmt == "parquet" and layout.sort_by:
+            frame = frame.sort(list(layout.sort_by))
+        sinks.append(_sink(frame, target, layout, ipc_compression))
+
+    if sinks:
+        pl.collect_all(sinks, engine="streaming")
+    for frame, target in loads:
+        load_frame(frame, target, database)
+    return paths
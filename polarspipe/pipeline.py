@@ -6,23 +6,36 @@ import os
 import pstats
 import time
 from pathlib import Path
-from typing import Any, Callable, TypeVar
+from typing import Any, Callable, Sequence, TypeVar
 
 import polars as pl
 
+from .ingestion.cache import CleanCache, cache_key, source_fingerprint
+from .ingestion.database import DatabaseSink
+from .ingestion.dtypes import apply_compaction, compact_dtypes, uncastable
 from .ingestion.exceptions import InvalidSchemaError
 from .ingestion.reader import scan_file
-from .ingestion.transformer import clean
+from .ingestion.sampling import align_to_schema, sample_file
+from .ingestion.transformer import (
+    CLEAN_RULES_VERSION,
+    REJECT_REASON_COL,
+    SAMPLE_ROWS,
+    SAMPLE_SEED,
+    clean,
+    clean_rows_eager,
+    clean_with_rejects,
+)
 from .ingestion.validator import validate_columns
+from .ingestion.writer import (
+    IpcCompression,
+    ParquetProfile,
+    write_frame,
+    write_frames,
+)
 
 logger = logging.getLogger(__name__)
 _warned_memory = False
 
-try:
-    from memory_profiler import memory_usage as _mem_usage
-except ImportError:
-    _mem_usage = None
-
 REQUIRED_SCHEMA = {
     "id": pl.Utf8,
     "name": pl.Utf8,
@@ -37,6 +50,11 @@ def _measure_memory_mb() -> float | None:
     Uses memory_profiler if available; falls back to psutil.
     """
     global _warned_memory
+    try:
+        from memory_profiler import memory_usage as _mem_usage
+    except ImportError:
+        _mem_usage = None
+
     if _mem_usage:
         usage = _mem_usage(max_iterations=1, interval=0.05, include_children=True)
         if usage:
@@ -109,15 +127,57 @@ def configure_logging(level: int = logging.INFO) -> None:
 
 def load_clean(
     path: str | Path = "generation-data/large/data_large.ndjson",
+    *,
+    cache: CleanCache | bool = False,
+    hash_content: bool = False,
+    compact: bool = False,
+    compact_strict: bool = False,
 ) -> pl.LazyFrame:
     """
     1. Lazily scan the file.
     2. Validate required schema without materializing data.
     3. Apply cleaning transforms.
     4. Return LazyFrame (fully lazy until .collect()).
+
+    With `cache` (True for the default CleanCache) the cleaned rows are
+    materialized once as Parquet and later calls scan that copy while the
+    source, REQUIRED_SCHEMA and CLEAN_RULES_VERSION are unchanged. A miss
+    runs the clean eagerly. `hash_content` keys on the file's bytes instead
+    of its mtime.
+
+    With `compact`, string columns are cast to cheaper dtypes inferred from a
+    sample of the source (see ingestion.dtypes); `id` stays Utf8. A value the
+    sample did not anticipate becomes null, or fails the query with
+    `compact_strict`.
     """
     p = Path(path)
+    if cache:
+        store = cache if isinstance(cache, CleanCache) else CleanCache()
+        fingerprint = source_fingerprint(p, hash_content=hash_content)
+        rules: int | str = CLEAN_RULES_VERSION
+        if compact:
+            rules = f"{rules}+compact{'-strict' if compact_strict else ''}"
+        key = cache_key(fingerprint, REQUIRED_SCHEMA, rules)
+        return store.get_or_build(
+            key,
+            lambda: load_clean(p, compact=compact, compact_strict=compact_strict),
+            source=fingerprint["path"],
+        )
+
     t0 = time.perf_counter()
+    lf = _scan_validated(p)
+
+    cleaned = clean(lf, source=p)
+    if compact:
+        cleaned, _ = _compacted(cleaned, lf, [p], strict=compact_strict)
+    duration_ms = (time.perf_counter() - t0) * 1000
+    logger.info({"stage": "clean_applied", "duration_ms": duration_ms})
+
+    return cleaned
+
+
+def _scan_validated(p: Path) -> pl.LazyFrame:
+    """Lazily scan `p` and check REQUIRED_SCHEMA without materializing data."""
     logger.info({"stage": "load_start", "path": str(p)})
 
     try:
@@ -149,12 +209,114 @@ def load_clean(
             "schema": lf.collect_schema(),
         }
     )
+    return lf
 
-    cleaned = clean(lf)
-    duration_ms = (time.perf_counter() - t0) * 1000
-    logger.info({"stage": "clean_applied", "duration_ms": duration_ms})
 
-    return cleaned
+def _compacted(
+    cleaned: pl.LazyFrame,
+    lf: pl.LazyFrame,
+    paths: Sequence[Path],
+    *,
+    strict: bool = False,
+    rejected: pl.LazyFrame | None = None,
+) -> tuple[pl.LazyFrame, pl.LazyFrame | None]:
+    """
+    Compact `cleaned` using a cleaned sample of the source file (the head of
+    the union for several inputs), then re-check REQUIRED_SCHEMA.
+
+    Returns (compacted, rejected). Unless `strict`, rows with a value a cast
+    would null are moved to `rejected` (tagged `uncastable_<column>`) when
+    one is given, so the quarantine keeps the original string.
+    """
+    sample = None
+    if len(paths) == 1:
+        raw = sample_file(paths[0], SAMPLE_ROWS, seed=SAMPLE_SEED)
+        sample = clean_rows_eager(align_to_schema(raw, lf.collect_schema()))
+    compacted, plan = compact_dtypes(cleaned, sample=sample, keep=["id"], strict=strict)
+    if rejected is not None and plan and not strict:
+        tagged = cleaned.with_columns(uncastable(plan).alias(REJECT_REASON_COL)).cache()
+        reason = pl.col(REJECT_REASON_COL)
+        compacted = apply_compaction(
+            tagged.filter(reason.is_null()).drop(REJECT_REASON_COL), plan
+        )
+        rejected = pl.concat(
+            [rejected, tagged.filter(reason.is_not_null())], how="diagonal_relaxed"
+        )
+    validate_columns(compacted, REQUIRED_SCHEMA, allow_subtypes=True)
+    return compacted, rejected
+
+
+def write_clean(
+    path: str | Path | Sequence[str | Path],
+    output: str | Path,
+    *,
+    quarantine: str | Path | None = None,
+    profile: str | ParquetProfile | None = None,
+    streaming: bool = True,
+    on_batch: Callable[[pl.DataFrame], pl.DataFrame] | None = None,
+    ipc_compression: IpcCompression = "uncompressed",
+    database: DatabaseSink | None = None,
+    compact: bool = False,
+    compact_strict: bool = False,
+) -> list[Path]:
+    """
+    Clean one or more sources into `output` (multiple inputs are unioned).
+
+    With `quarantine`, rows rejected by the cleaning rules are written there
+    (tagged with `reject_reason`) from the same scan as the clean output; this
+    always runs on the streaming engine.
+    `on_batch` sees every cleaned batch on its way to the sink (progress taps).
+    `ipc_compression` applies to Arrow IPC (.arrow/.ipc/.feather) outputs.
+    `database` configures SQLite/DuckDB outputs (table, batch size, upsert).
+    `compact` casts the cleaned columns to cheaper dtypes (see load_clean);
+    with `quarantine`, rows holding a value a cast would null go there.
+    """
+    paths = [Path(path)] if isinstance(path, (str, Path)) else [Path(p) for p in path]
+    t0 = time.perf_counter()
+    frames = [_scan_validated(p) for p in paths]
+    lf = frames[0] if len(frames) == 1 else pl.concat(frames, how="diagonal_relaxed")
+
+    if quarantine is None:
+        cleaned = clean(lf, source=paths[0] if len(paths) == 1 else None)
+        if compact:
+            cleaned, _ = _compacted(cleaned, lf, paths, strict=compact_strict)
+        if on_batch is not None:
+            cleaned = cleaned.map_batches(on_batch, streamable=True)
+        written = [
+            write_frame(
+                cleaned,
+                output,
+                streaming=streaming,
+                profile=profile,
+                ipc_compression=ipc_compression,
+                database=database,
+            )
+        ]
+    else:
+        cleaned, rejected = clean_with_rejects(lf)
+        if compact:
+            cleaned, quarantined = _compacted(
+                cleaned, lf, paths, strict=compact_strict, rejected=rejected
+            )
+            rejected = quarantined if quarantined is not None else rejected
+        if on_batch is not None:
+            cleaned = cleaned.map_batches(on_batch, streamable=True)
+        written = write_frames(
+            {output: cleaned, quarantine: rejected},
+            profile=profile,
+            ipc_compression=ipc_compression,
+            database=database,
+        )
+
+    logger.info(
+        {
+            "stage": "write_clean_done",
+            "paths": [str(p) for p in paths],
+            "outputs": [str(w) for w in written],
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return written
 
 
 def main() -> None:
@@ -0,0 +1,102 @@
+"""Throughput counters and a periodic progress reporter for long-running sinks."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    import polars as pl
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process (stdlib `resource`, POSIX only)."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> float | None:
+    try:
+        import psutil
+
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class ThroughputMeter:
+    """
+    Thread-safe row/byte counters fed from streaming batches.
+
+    `observe` returns its input unchanged, so it can be attached as a
+    `LazyFrame.map_batches(..., streamable=True)` tap on the hot path.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.bytes: float = 0
+
+    def observe(self, df: pl.DataFrame) -> pl.DataFrame:
+        size = df.estimated_size()
+        with self._lock:
+            self.rows += df.height
+            self.bytes += size
+        return df
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            rows, nbytes = self.rows, self.bytes
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        mb = nbytes / (1024 * 1024)
+        return {
+            "rows": rows,
+            "mb": mb,
+            "elapsed_s": elapsed,
+            "rows_per_s": rows / elapsed,
+            "mb_per_s": mb / elapsed,
+            "rss_mb": current_rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+class ProgressReporter:
+    """
+    Calls `render(meter.snapshot())` every `interval` seconds on a daemon thread
+    until the context exits (one final render on exit).
+    """
+
+    def __init__(
+        self,
+        meter: ThroughputMeter,
+        render: Callable[[dict[str, Any]], None],
+        *,
+        interval: float = 0.5,
+    ) -> None:
+        self.meter = meter
+        self.render = render
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.render(self.meter.snapshot())
+
+    def __enter__(self) -> ProgressReporter:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.render(self.meter.snapshot())
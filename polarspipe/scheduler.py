@@ -0,0 +1,338 @@
+"""Fan independent ingestion jobs out across a process pool."""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import wait as wait_futures
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Job:
+    """One input file cleaned into one output (optionally with quarantine)."""
+
+    input: str
+    output: str
+    quarantine: str | None = None
+    profile: str | None = None
+
+
+@dataclass
+class JobResult:
+    job: Job
+    ok: bool
+    attempts: int
+    duration_ms: float
+    rows: int | None = None
+    # Peak RSS of the worker process so far, not of this job alone: a warm
+    # worker that ran a large job earlier keeps reporting that peak.
+    worker_peak_rss_mb: float | None = None
+    error: str | None = None
+    logs: list[Any] = field(default_factory=list)
+
+
+def threads_per_worker(workers: int, cpus: int | None = None) -> int:
+    """Split the machine's cores across workers so Polars does not oversubscribe."""
+    total = cpus or os.cpu_count() or 1
+    return max(1, total // max(1, workers))
+
+
+def order_jobs(jobs: Sequence[Job]) -> list[Job]:
+    """Largest inputs first, so stragglers start early and the tail stays short."""
+
+    def _size(job: Job) -> int:
+        try:
+            return os.path.getsize(job.input)
+        except OSError:
+            return 0
+
+    return sorted(jobs, key=_size, reverse=True)
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(logging.INFO)
+        self.records: list[Any] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        msg = record.msg if isinstance(record.msg, dict) else record.getMessage()
+        # Schemas and paths are not all picklable/JSON-safe; keep a plain copy.
+        self.records.append(json.loads(json.dumps(msg, default=str)))
+
+
+def _init_worker(threads: int, warm: bool = False) -> None:
+    # Runs before the worker imports polars, so the pool size takes effect.
+    os.environ["POLARS_MAX_THREADS"] = str(threads)
+    logging.getLogger("polarspipe").setLevel(logging.INFO)
+    if warm:
+        # Pay the polars/pipeline imports now rather than in the first job.
+        from . import pipeline  # noqa: F401
+
+
+def _noop() -> None:
+    return None
+
+
+def worker_pool(workers: int, *, warm: bool = False) -> ProcessPoolExecutor:
+    """
+    Spawn-based pool whose workers split the cores (see threads_per_worker)
+    and log pipeline stages at INFO. With `warm`, all workers are spawned up
+    front and import the pipeline as they start, ahead of the first job.
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads_per_worker(workers), warm),
+    )
+    if warm:
+        # Each submit with no idle worker spawns one, up to max_workers.
+        wait_futures([pool.submit(_noop) for _ in range(workers)])
+    return pool
+
+
+class RetryingPool:
+    """
+    worker_pool() that resubmits failed jobs up to `retries` times.
+
+    A worker that dies (e.g. killed by the OOM killer) breaks the whole
+    ProcessPoolExecutor and fails every job in flight, so the pool is
+    replaced with a fresh one and those jobs are retried on it. `task` is
+    a picklable callable taking the attempt number; `tag` is handed back
+    with the job's final result.
+    """
+
+    def __init__(self, workers: int, *, retries: int = 1, warm: bool = False) -> None:
+        self.workers = workers
+        self.retries = retries
+        self.warm = warm
+        self._pool = worker_pool(workers, warm=warm)
+        self._generation = 0
+        self._running: dict[
+            Future[JobResult], tuple[Job, Callable[[int], JobResult], int, Any, int]
+        ] = {}
+
+    def __enter__(self) -> RetryingPool:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.shutdown()
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+    def _replace(self, generation: int) -> None:
+        # Every future of a broken pool fails; only the first replaces it.
+        if generation != self._generation:
+            return
+        logger.warning({"stage": "pool_replaced", "workers": self.workers})
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = worker_pool(self.workers, warm=self.warm)
+        self._generation += 1
+
+    def submit(
+        self,
+        job: Job,
+        task: Callable[[int], JobResult],
+        *,
+        attempt: int = 1,
+        tag: Any = None,
+    ) -> None:
+        try:
+            fut = self._pool.submit(task, attempt)
+        except BrokenProcessPool:
+            self._replace(self._generation)
+            fut = self._pool.submit(task, attempt)
+        self._running[fut] = (job, task, attempt, tag, self._generation)
+
+    def collect(self, timeout: float | None = None) -> list[tuple[JobResult, Any]]:
+        """
+        Wait up to `timeout` seconds (None: until a job finishes) and return
+        (result, tag) for jobs that are finished for good; failed attempts
+        with retries left are resubmitted instead.
+        """
+        if not self._running:
+            return []
+        done, _ = wait_futures(
+            self._running, timeout=timeout, return_when="FIRST_COMPLETED"
+        )
+        finished: list[tuple[JobResult, Any]] = []
+        for fut in done:
+            job, task, attempt, tag, generation = self._running.pop(fut)
+            try:
+                result = fut.result()
+            except Exception as e:  # worker crashed (e.g. killed by OOM)
+                if isinstance(e, BrokenProcessPool):
+                    self._replace(generation)
+                result = JobResult(
+                    job, False, attempt, 0.0, error=f"{type(e).__name__}: {e}"
+                )
+            if not result.ok and attempt <= self.retries:
+                logger.warning(
+                    {
+                        "stage": "job_retry",
+                        "input": job.input,
+                        "attempt": attempt,
+                        "error": result.error,
+                    }
+                )
+                self.submit(job, task, attempt=attempt + 1, tag=tag)
+                continue
+            finished.append((result, tag))
+        return finished
+
+
+def run_logged(job: Job, attempt: int, work: Callable[[], int | None]) -> JobResult:
+    """
+    Run `work` (which returns the rows written) in this worker, capturing
+    the pipeline's log records; an exception becomes a failed JobResult.
+    """
+    from .progress import peak_rss_mb
+
+    handler = _ListHandler()
+    root = logging.getLogger("polarspipe")
+    root.addHandler(handler)
+    t0 = time.perf_counter()
+    rows, error = None, None
+    try:
+        rows = work()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        root.removeHandler(handler)
+
+    return JobResult(
+        job=job,
+        ok=error is None,
+        attempts=attempt,
+        duration_ms=(time.perf_counter() - t0) * 1000,
+        rows=rows,
+        worker_peak_rss_mb=peak_rss_mb(),
+        error=error,
+        logs=handler.records,
+    )
+
+
+def _run_job(job: Job, attempt: int) -> JobResult:
+    from .pipeline import write_clean
+    from .progress import ThroughputMeter
+
+    def _work() -> int:
+        meter = ThroughputMeter()
+        write_clean(
+            job.input,
+            job.output,
+            quarantine=job.quarantine,
+            profile=job.profile,
+            on_batch=meter.observe,
+        )
+        return meter.rows
+
+    return run_logged(job, attempt, _work)
+
+
+def run_jobs(
+    jobs: Sequence[Job],
+    *,
+    workers: int | None = None,
+    retries: int = 1,
+    on_result: Callable[[JobResult], None] | None = None,
+) -> list[JobResult]:
+    """
+    Run jobs on a spawn-based process pool, largest input first.
+
+    Each worker gets cpu_count // workers Polars threads. A failed job is
+    resubmitted up to `retries` times, on a fresh pool if a worker died
+    (see RetryingPool); `on_result` sees every final result.
+    """
+    n_workers = workers or os.cpu_count() or 1
+    threads = threads_per_worker(n_workers)
+    ordered = order_jobs(jobs)
+    results: list[JobResult] = []
+    t0 = time.perf_counter()
+
+    logger.info(
+        {
+            "stage": "scheduler_start",
+            "jobs": len(ordered),
+            "workers": n_workers,
+            "threads_per_worker": threads,
+        }
+    )
+
+    with RetryingPool(n_workers, retries=retries) as pool:
+        for job in ordered:
+            pool.submit(job, partial(_run_job, job))
+        while pool.running:
+            for result, _ in pool.collect():
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+
+    logger.info(
+        {
+            "stage": "scheduler_done",
+            **summarize(results),
+            "wall_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return results
+
+
+def summarize(results: Sequence[JobResult]) -> dict[str, Any]:
+    """Aggregate metrics across job results."""
+    ok = [r for r in results if r.ok]
+    return {
+        "jobs": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "retried": sum(1 for r in results if r.attempts > 1),
+        "rows": sum(r.rows or 0 for r in ok),
+        "job_ms_total": sum(r.duration_ms for r in results),
+        "job_ms_max": max((r.duration_ms for r in results), default=0.0),
+        "worker_peak_rss_mb_max": max(
+            (r.worker_peak_rss_mb for r in results if r.worker_peak_rss_mb is not None),
+            default=None,
+        ),
+    }
+
+
+def jobs_for_inputs(
+    inputs: Sequence[str | Path],
+    output_dir: str | Path,
+    *,
+    suffix: str = ".parquet",
+    quarantine: bool = False,
+    profile: str | None = None,
+) -> list[Job]:
+    """One job per input, writing `<output_dir>/<stem><suffix>`."""
+    out = Path(output_dir)
+    stems = [Path(p).stem for p in inputs]
+    duplicates = sorted({s for s in stems if stems.count(s) > 1})
+    if duplicates:
+        raise ValueError(f"Inputs share output names: {', '.join(duplicates)}")
+
+    return [
+        Job(
+            input=str(p),
+            output=str(out / f"{stem}{suffix}"),
+            quarantine=str(out / f"{stem}.rejects.ndjson") if quarantine else None,
+            profile=profile,
+        )
+        for p, stem in zip(inputs, stems)
+    ]
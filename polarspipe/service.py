@@ -0,0 +1,352 @@
+"""
+Local HTTP service for the pipeline and agent (stdlib only).
+
+One long-lived process keeps the compiled agent graph, the OpenAI client,
+the compiled-plan cache and a worker pool warm, so a request pays none of the
+CLI's start-up. Jobs are queued on a bounded executor; when `max_queue` jobs
+are waiting, new submissions get 429.
+
+    POST /specs              {"spec": {...}, "output_path"?}   -> 202 {"id"}
+    POST /runs               {"instruction": "...", "local"?, "prestage"?,
+                              "output_path"?}                  -> 202 {"id"}
+    GET  /jobs/<id>[?wait=s] status; waits up to `s` seconds for completion
+    GET  /jobs/<id>/artifact the output file, streamed in chunks
+    GET  /metrics            queue depth, counters, latency percentiles
+    GET  /healthz
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_DIR = Path(".polarspipe/service")
+MAX_BODY_BYTES = 1024 * 1024
+MAX_JOBS = 10_000  # finished jobs (and artifacts) kept, oldest dropped first
+MAX_WAIT_S = 60.0
+STREAM_CHUNK_BYTES = 1024 * 1024
+LATENCY_WINDOW = 1000
+
+
+class QueueFull(Exception):
+    """The service already has `max_queue` jobs waiting."""
+
+
+@dataclass
+class ServiceJob:
+    id: str
+    kind: str
+    request: Dict[str, Any]
+    output_path: str
+    status: str = "queued"
+    submitted: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    result: Dict[str, Any] | None = None
+    error: str | None = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "output_path": self.output_path,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "duration_ms": (
+                (self.finished - self.submitted) * 1000 if self.finished else None
+            ),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def _run_spec_job(job: ServiceJob) -> Dict[str, Any]:
+    from .agent.compiler import run_spec
+
+    execution = run_spec(job.request["spec"], output_path=job.output_path)
+    if execution["exit_code"] != 0:
+        raise RuntimeError(execution["stderr"])
+    return {"rows": execution.get("rows"), "spans": execution["spans"]}
+
+
+def _run_agent_job(job: ServiceJob) -> Dict[str, Any]:
+    from .agent.graph import get_graph
+
+    state = {
+        "instruction": job.request["instruction"],
+        "preferred_output_path": job.output_path,
+        "local": bool(job.request.get("local", False)),
+        "prestage": bool(job.request.get("prestage", False)),
+    }
+    final = get_graph().invoke(state)
+    execution = final.get("execution") or {}
+    if execution.get("exit_code") != 0:
+        raise RuntimeError(execution.get("stderr") or "execution failed")
+    artifact = execution.get("artifact_local_path")
+    if artifact and Path(artifact).resolve() != Path(job.output_path).resolve():
+        Path(artifact).replace(job.output_path)
+    return {"spec": final.get("etl_spec"), "spans": final.get("spans", [])}
+
+
+RUNNERS: Dict[str, Callable[[ServiceJob], Dict[str, Any]]] = {
+    "spec": _run_spec_job,
+    "agent": _run_agent_job,
+}
+
+
+class PipelineService:
+    """Job registry plus a bounded worker pool; the HTTP layer sits on top."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 4,
+        max_queue: int = 64,
+        artifacts_dir: str | Path = ARTIFACTS_DIR,
+    ) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.artifacts_dir = Path(artifacts_dir)
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="polarspipe-svc")
+        self._jobs: OrderedDict[str, ServiceJob] = OrderedDict()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.counters = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0}
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def warm(self) -> None:
+        """Compile the agent graph before serving (the client follows on first use)."""
+        from .agent.graph import get_graph
+
+        get_graph()
+
+    def submit(self, kind: str, request: Dict[str, Any]) -> ServiceJob:
+        if kind not in RUNNERS:
+            raise ValueError(f"Unknown job kind '{kind}'.")
+        job_id = uuid4().hex
+        # Outputs always land in artifacts_dir; a requested path picks the format.
+        spec = request.get("spec")
+        requested = request.get("output_path") or (
+            spec.get("output_path") if isinstance(spec, dict) else None
+        )
+        suffix = Path(requested or "out.parquet").suffix
+        job = ServiceJob(
+            id=job_id,
+            kind=kind,
+            request=request,
+            output_path=str(self.artifacts_dir / f"{job_id}{suffix or '.parquet'}"),
+        )
+        evicted: list[ServiceJob] = []
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise QueueFull(f"{self._queued} jobs already queued")
+            self._queued += 1
+            self.counters["submitted"] += 1
+            self._jobs[job_id] = job
+            while len(self._jobs) > MAX_JOBS:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.done.is_set():
+                    break
+                evicted.append(self._jobs.popitem(last=False)[1])
+        for old in evicted:
+            # Nobody can fetch it any more once the record is gone.
+            Path(old.output_path).unlink(missing_ok=True)
+        self._pool.submit(self._execute, job)
+        return job
+
+    def _execute(self, job: ServiceJob) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        job.status, job.started = "running", time.time()
+        try:
+            job.result = RUNNERS[job.kind](job)
+            job.status = "done"
+        except Exception as exc:
+            job.status, job.error = "error", f"{type(exc).__name__}: {exc}"
+        job.finished = time.time()
+        with self._lock:
+            self._running -= 1
+            self.counters["succeeded" if job.status == "done" else "failed"] += 1
+            self._latencies.append(job.finished - job.submitted)
+        logger.info(
+            {
+                "stage": "service_job",
+                "id": job.id,
+                "kind": job.kind,
+                "status": job.status,
+                "duration_ms": (job.finished - job.submitted) * 1000,
+                "error": job.error,
+            }
+        )
+        job.done.set()
+
+    def get(self, job_id: str) -> ServiceJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self._latencies)
+            snapshot: Dict[str, Any] = {
+                **self.counters,
+                "queued": self._queued,
+                "running": self._running,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+            }
+        for name, q in (("p50", 0.5), ("p99", 0.99)):
+            snapshot[f"latency_ms_{name}"] = (
+                ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+                if ordered
+                else None
+            )
+        return snapshot
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: ServiceHTTPServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug({"stage": "service_http", "request": format % args})
+
+    def _json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large.")
+        data = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object.")
+        return data
+
+    def do_POST(self) -> None:
+        service = self.server.service
+        kinds = {"/specs": ("spec", "spec"), "/runs": ("agent", "instruction")}
+        route = urlparse(self.path).path
+        if route not in kinds:
+            self._json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        kind, required = kinds[route]
+        try:
+            request = self._body()
+            if not request.get(required):
+                raise ValueError(f"Missing '{required}'.")
+            if kind == "spec" and not isinstance(request["spec"], dict):
+                raise ValueError("'spec' must be a JSON object.")
+            job = service.submit(kind, request)
+        except QueueFull as exc:
+            self._json(HTTPStatus.TOO_MANY_REQUESTS, {"error": str(exc)})
+            return
+        except ValueError as exc:  # includes JSONDecodeError
+            self._json(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+            return
+        self._json(HTTPStatus.ACCEPTED, {"id": job.id, "status": job.status})
+
+    def do_GET(self) -> None:
+        service = self.server.service
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["healthz"]:
+            self._json(HTTPStatus.OK, {"ok": True})
+        elif parts == ["metrics"]:
+            self._json(HTTPStatus.OK, service.metrics())
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = service.get(parts[1])
+            if job is None:
+                self._json(HTTPStatus.NOT_FOUND, {"error": "unknown job"})
+            elif len(parts) == 2:
+                try:
+                    wait = float(parse_qs(url.query).get("wait", ["0"])[0] or 0)
+                except ValueError:
+                    wait = math.nan
+                if not wait >= 0:
+                    self._json(
+                        HTTPStatus.BAD_REQUEST,
+                        {"error": "'wait' must be a non-negative number of seconds."},
+                    )
+                    return
+                job.done.wait(min(wait, MAX_WAIT_S))
+                self._json(HTTPStatus.OK, job.to_dict())
+            elif parts[2] == "artifact":
+                self._artifact(job)
+            else:
+                self._json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+        else:
+            self._json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def _artifact(self, job: ServiceJob) -> None:
+        target = Path(job.output_path)
+        if job.status != "done" or not target.is_file():
+            self._json(HTTPStatus.CONFLICT, {"error": f"job is {job.status}"})
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(target.stat().st_size))
+        self.send_header("Content-Disposition", f'attachment; filename="{target.name}"')
+        self.end_headers()
+        with target.open("rb") as fh:
+            shutil.copyfileobj(fh, self.wfile, STREAM_CHUNK_BYTES)
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: PipelineService) -> None:
+        super().__init__(address, _Handler)
+        self.service = service
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    *,
+    workers: int = 4,
+    max_queue: int = 64,
+    artifacts_dir: str | Path = ARTIFACTS_DIR,
+    warm: bool = True,
+) -> ServiceHTTPServer:
+    """
+    Build (but do not start) the server; `port=0` picks a free port. With
+    `warm` the agent graph is compiled here rather than on the first run.
+    """
+    service = PipelineService(
+        workers=workers, max_queue=max_queue, artifacts_dir=artifacts_dir
+    )
+    if warm:
+        service.warm()
+    return ServiceHTTPServer((host, port), service)
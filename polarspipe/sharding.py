@@ -0,0 +1,415 @@
+"""
+Split one large NDJSON/CSV file into byte ranges cleaned independently.
+
+    plan  -> <out>/manifest.json (+ _schema.arrow): newline-aligned ranges
+    run   -> <out>/part-00007.parquet + part-00007.json receipt per shard
+    merge -> checks every receipt against the plan and its part file
+
+Ranges end on a newline; for CSV the planner also tracks quote parity so a
+quoted field with embedded newlines is never cut (this costs one sequential
+read of the file, at memory-count speed). Every shard is parsed with the
+schema the planner inferred, so parts line up.
+
+Workers only need the output directory: several processes (run_shards) or
+several machines sharing it (`node`/`nodes` striping) can work on one plan.
+A shard with a receipt is skipped, so an interrupted run resumes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import time
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Sequence
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from .ingestion.cache import content_hash, source_fingerprint
+from .ingestion.exceptions import ShardManifestError, UnsupportedFormatError
+from .ingestion.reader import scan_file
+from .ingestion.transformer import clean
+from .ingestion.validator import validate_columns
+from .ingestion.writer import write_frame
+from .pipeline import REQUIRED_SCHEMA
+from .scheduler import Job, JobResult, RetryingPool, run_logged
+
+logger = logging.getLogger(__name__)
+
+SHARD_MB = 256.0
+MANIFEST = "manifest.json"
+SCHEMA_FILE = "_schema.arrow"
+SCAN_CHUNK_BYTES = 8 * 1024 * 1024
+FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Bytes [start, end) of the source; always whole lines (records)."""
+
+    index: int
+    start: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+
+def part_path(out_dir: str | Path, index: int) -> Path:
+    return Path(out_dir) / f"part-{index:05d}.parquet"
+
+
+def receipt_path(out_dir: str | Path, index: int) -> Path:
+    return Path(out_dir) / f"part-{index:05d}.json"
+
+
+def _format(path: Path) -> str:
+    try:
+        return FORMATS[path.suffix.lower()]
+    except KeyError:
+        raise UnsupportedFormatError(
+            f"Cannot shard '{path.suffix}' files; expected one of {sorted(FORMATS)}."
+        ) from None
+
+
+def _line_cuts(fh: BinaryIO, targets: Sequence[int]) -> list[int]:
+    """For each target offset, the offset just past the next newline."""
+    cuts = []
+    for target in targets:
+        fh.seek(target - 1)
+        cuts.append(target - 1 + len(fh.readline()))
+    return cuts
+
+
+def _csv_cuts(fh: BinaryIO, start: int, targets: Sequence[int]) -> list[int]:
+    """
+    Like _line_cuts, but only newlines outside quoted fields count. Quote
+    parity is carried from `start` (the first record), so escaped quotes
+    ("") cancel out and multi-line fields are stepped over.
+    """
+    cuts: list[int] = []
+    pending = sorted(targets)
+    quoted = False
+    pos = start
+    fh.seek(start)
+    while pending and (chunk := fh.read(SCAN_CHUNK_BYTES)):
+        i = 0
+        while pending and pending[0] < pos + len(chunk):
+            target = max(pending[0] - pos, i)
+            quoted ^= chunk.count(b'"', i, target) % 2 == 1
+            i = target
+            nl = chunk.find(b"\n", i)
+            while nl >= 0:
+                quoted ^= chunk.count(b'"', i, nl) % 2 == 1
+                i = nl + 1
+                if not quoted:
+                    break
+                nl = chunk.find(b"\n", i)
+            if nl < 0:
+                break  # keep looking in the next chunk
+            cuts.append(pos + i)
+            pending = [t for t in pending if t > pos + i]
+        quoted ^= chunk.count(b'"', i) % 2 == 1
+        pos += len(chunk)
+    return cuts
+
+
+def _header_bytes(fh: BinaryIO, fmt: str) -> int:
+    fh.seek(0)
+    return len(fh.readline()) if fmt == "csv" else 0
+
+
+def plan_shards(
+    path: str | Path,
+    *,
+    shards: int | None = None,
+    shard_mb: float = SHARD_MB,
+    quote_aware: bool = True,
+) -> list[Shard]:
+    """
+    Cut `path` into about `shards` ranges (default: one per `shard_mb`). With
+    `quote_aware=False` CSV is cut at the next newline like NDJSON, which is
+    only safe when no field contains a newline.
+    """
+    p = Path(path)
+    fmt = _format(p)
+    size = p.stat().st_size
+    with p.open("rb") as fh:
+        body = _header_bytes(fh, fmt)
+        n = shards or max(1, math.ceil((size - body) / (shard_mb * 1024 * 1024)))
+        step = (size - body) / n
+        targets = [body + round(step * k) for k in range(1, n)]
+        targets = [t for t in targets if body < t < size]
+        if fmt == "csv" and quote_aware:
+            cuts = _csv_cuts(fh, body, targets)
+        else:
+            cuts = _line_cuts(fh, targets)
+
+    bounds = sorted({body, *[c for c in cuts if c < size], size})
+    return [Shard(k, lo, hi) for k, (lo, hi) in enumerate(zip(bounds, bounds[1:]))]
+
+
+def write_plan(
+    path: str | Path,
+    out_dir: str | Path,
+    *,
+    shards: int | None = None,
+    shard_mb: float = SHARD_MB,
+    quote_aware: bool = True,
+    profile: str | None = None,
+) -> dict[str, Any]:
+    """Plan the shards of `path` and write the manifest into `out_dir`."""
+    t0 = time.perf_counter()
+    p = Path(path)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    plan = plan_shards(p, shards=shards, shard_mb=shard_mb, quote_aware=quote_aware)
+    # An empty Arrow file keeps the exact dtypes for every worker.
+    empty = scan_file(p).clear().collect()
+    empty.write_ipc(out / SCHEMA_FILE)
+    with p.open("rb") as fh:
+        header = _header_bytes(fh, _format(p))
+
+    manifest: dict[str, Any] = {
+        "source": source_fingerprint(p),
+        "format": _format(p),
+        "header_bytes": header,
+        "schema": {name: str(dtype) for name, dtype in empty.schema.items()},
+        "profile": profile,
+        "shards": [asdict(s) for s in plan],
+        "created": time.time(),
+    }
+    _write_json(out / MANIFEST, manifest)
+    logger.info(
+        {
+            "stage": "shard_plan",
+            "path": str(p),
+            "shards": len(plan),
+            "bytes": manifest["source"]["size"],
+            "quote_aware": quote_aware,
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return manifest
+
+
+def _write_json(path: Path, payload: dict[str, Any]) -> None:
+    partial = path.with_name(path.name + ".part")
+    partial.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    partial.replace(path)
+
+
+def read_manifest(out_dir: str | Path) -> dict[str, Any]:
+    path = Path(out_dir) / MANIFEST
+    if not path.exists():
+        raise ShardManifestError(f"No shard manifest in {out_dir}.")
+    manifest: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+    return manifest
+
+
+def _check_source(manifest: dict[str, Any]) -> Path:
+    planned = manifest["source"]
+    source = Path(planned["path"])
+    if not source.exists():
+        raise ShardManifestError(f"Source {source} is gone.")
+    current = source_fingerprint(source)
+    if current != planned:
+        raise ShardManifestError(
+            f"Source {source} changed since it was planned; re-run the plan."
+        )
+    return source
+
+
+def read_shard(out_dir: str | Path, index: int) -> tuple[pl.DataFrame, str]:
+    """
+    Rows of shard `index` as a DataFrame with the planned schema, plus a
+    digest of its raw bytes.
+    """
+    manifest = read_manifest(out_dir)
+    source = _check_source(manifest)
+    shard = Shard(**manifest["shards"][index])
+    schema = pl.read_ipc_schema(Path(out_dir) / SCHEMA_FILE)
+
+    with source.open("rb") as fh:
+        header = fh.read(manifest["header_bytes"])
+        fh.seek(shard.start)
+        data = fh.read(shard.size)
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if manifest["format"] == "csv":
+        df = pl.read_csv(io.BytesIO(header + data), schema=schema)
+    else:
+        df = pl.read_ndjson(io.BytesIO(data), schema=schema)
+    return df, digest
+
+
+def run_shard(out_dir: str | Path, index: int) -> dict[str, Any]:
+    """Validate, clean and write one shard, then its receipt (last, atomically)."""
+    t0 = time.perf_counter()
+    out = Path(out_dir)
+    manifest = read_manifest(out)
+    df, digest = read_shard(out, index)
+    validate_columns(df, REQUIRED_SCHEMA)
+
+    target = part_path(out, index)
+    partial = target.with_name(f".{target.name}")  # dotfile: invisible to globs
+    write_frame(clean(df), partial, profile=manifest.get("profile"))
+    partial.replace(target)
+
+    receipt = {
+        **manifest["shards"][index],
+        "rows_in": df.height,
+        "rows": pl.scan_parquet(target).select(pl.len()).collect().item(),
+        "source_blake2b": digest,
+        "part": target.name,
+        "bytes": target.stat().st_size,
+        "blake2b": content_hash(target),
+        "host": platform.node(),
+        "duration_ms": (time.perf_counter() - t0) * 1000,
+    }
+    _write_json(receipt_path(out, index), receipt)
+    logger.info({"stage": "shard_done", **receipt})
+    return receipt
+
+
+def _shard_job(out_dir: str, index: int) -> Job:
+    return Job(input=f"{out_dir}#{index}", output=str(part_path(out_dir, index)))
+
+
+def _run_shard_job(out_dir: str, index: int, attempt: int) -> JobResult:
+    return run_logged(
+        _shard_job(out_dir, index),
+        attempt,
+        lambda: int(run_shard(out_dir, index)["rows"]),
+    )
+
+
+def run_shards(
+    out_dir: str | Path,
+    *,
+    workers: int | None = None,
+    node: int = 0,
+    nodes: int = 1,
+    retries: int = 1,
+    on_result: Callable[[JobResult], None] | None = None,
+) -> list[JobResult]:
+    """
+    Process this node's shards (index % nodes == node) on a local process
+    pool, skipping shards that already have a receipt. Run the same command
+    with node=0..nodes-1 on machines sharing `out_dir` to spread one file.
+    """
+    if not 0 <= node < nodes:
+        raise ValueError(f"node must be in [0, {nodes}), got {node}.")
+    out = str(out_dir)
+    manifest = read_manifest(out)
+    todo = [
+        s["index"]
+        for s in manifest["shards"]
+        if s["index"] % nodes == node and not receipt_path(out, s["index"]).exists()
+    ]
+    n_workers = min(workers or os.cpu_count() or 1, max(1, len(todo)))
+    logger.info(
+        {
+            "stage": "shard_run_start",
+            "out_dir": out,
+            "node": node,
+            "nodes": nodes,
+            "shards": len(todo),
+            "workers": n_workers,
+        }
+    )
+    results: list[JobResult] = []
+    if not todo:
+        return results
+
+    with RetryingPool(n_workers, retries=retries) as pool:
+        for index in todo:
+            pool.submit(_shard_job(out, index), partial(_run_shard_job, out, index))
+        while pool.running:
+            for result, _ in pool.collect():
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+    return results
+
+
+def merge_shards(
+    out_dir: str | Path,
+    *,
+    output: str | Path | None = None,
+    profile: str | None = None,
+) -> dict[str, Any]:
+    """
+    Check that the receipts cover the source exactly once and match their
+    part files (row count, checksum), then record them in the manifest.
+    With `output`, the parts are also concatenated into one file.
+
+    Raises:
+        ShardManifestError: a shard is missing, stale or corrupted.
+    """
+    t0 = time.perf_counter()
+    out = Path(out_dir)
+    manifest = read_manifest(out)
+    _check_source(manifest)
+
+    problems: list[str] = []
+    receipts: list[dict[str, Any]] = []
+    expected_start = manifest["header_bytes"]
+    for planned in manifest["shards"]:
+        index = planned["index"]
+        if planned["start"] != expected_start:
+            problems.append(f"shard {index}: gap or overlap at byte {expected_start}")
+        expected_start = planned["end"]
+
+        path = receipt_path(out, index)
+        if not path.exists():
+            problems.append(f"shard {index}: no receipt")
+            continue
+        receipt = json.loads(path.read_text(encoding="utf-8"))
+        part = out / receipt["part"]
+        if (receipt["start"], receipt["end"]) != (planned["start"], planned["end"]):
+            problems.append(f"shard {index}: receipt is for another plan")
+        elif not part.exists():
+            problems.append(f"shard {index}: {part.name} is missing")
+        elif content_hash(part) != receipt["blake2b"]:
+            problems.append(f"shard {index}: {part.name} checksum mismatch")
+        elif pq.read_metadata(part).num_rows != receipt["rows"]:
+            problems.append(f"shard {index}: {part.name} row count mismatch")
+        receipts.append(receipt)
+    if expected_start != manifest["source"]["size"]:
+        problems.append(f"shards end at byte {expected_start}, not at end of file")
+    if problems:
+        raise ShardManifestError("; ".join(problems))
+
+    manifest["parts"] = receipts
+    manifest["rows_in"] = sum(r["rows_in"] for r in receipts)
+    manifest["rows"] = sum(r["rows"] for r in receipts)
+    manifest["merged"] = time.time()
+    if output is not None:
+        parts = [out / r["part"] for r in receipts]
+        written = write_frame(
+            pl.scan_parquet(parts), output, streaming=True, profile=profile
+        )
+        manifest["output"] = str(written)
+    _write_json(out / MANIFEST, manifest)
+
+    logger.info(
+        {
+            "stage": "shard_merge",
+            "out_dir": str(out),
+            "shards": len(receipts),
+            "rows_in": manifest["rows_in"],
+            "rows": manifest["rows"],
+            "output": manifest.get("output"),
+            "duration_ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return manifest
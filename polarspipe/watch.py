@@ -0,0 +1,322 @@
+"""
+Watch a landing directory and clean files as they arrive.
+
+Files are found by polling the directory; when the optional `watchdog`
+package is installed its inotify/FSEvents notifications wake the scan early,
+so a landed file is picked up in milliseconds instead of a poll interval.
+A file is dispatched once it is complete: unchanged in size and mtime for
+`settle_s`, which also covers writers that rename a finished file in.
+Temporary names (dotfiles, *.part, *.tmp) are never picked up.
+
+Jobs run on a warm worker pool from the scheduler, with at most
+`max_in_flight` submitted at a time; the rest wait on disk (backpressure).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from .scheduler import Job, JobResult, RetryingPool, _run_job
+
+logger = logging.getLogger(__name__)
+
+TEMP_SUFFIXES = (".part", ".tmp", ".partial", ".crdownload")
+LATENCY_WINDOW = 1000
+
+
+def _is_temp(name: str) -> bool:
+    return name.startswith(".") or name.endswith(TEMP_SUFFIXES)
+
+
+@dataclass
+class _Pending:
+    size: int
+    mtime_ns: int
+    first_seen: float
+    changed: float
+
+
+class FileTracker:
+    """
+    Stability check over repeated directory scans.
+
+    `scan` returns files whose size and mtime have not changed for `settle_s`
+    and that were not returned before in that same state; a file rewritten
+    later is returned again. State is kept only for files still listed.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        patterns: Sequence[str] = ("*",),
+        *,
+        settle_s: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.directory = Path(directory)
+        self.patterns = tuple(patterns)
+        self.settle_s = settle_s
+        self.clock = clock
+        self._pending: dict[Path, _Pending] = {}
+        self._done: dict[Path, tuple[int, int]] = {}
+
+    def _listing(self) -> dict[Path, os.stat_result]:
+        found: dict[Path, os.stat_result] = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if _is_temp(entry.name) or not entry.is_file():
+                    continue
+                if any(fnmatch(entry.name, p) for p in self.patterns):
+                    try:
+                        found[Path(entry.path)] = entry.stat()
+                    except FileNotFoundError:  # renamed away mid-scan
+                        continue
+        return found
+
+    def scan(self) -> list[tuple[Path, float]]:
+        """Newly complete files as (path, first_seen), oldest first."""
+        now = self.clock()
+        listing = self._listing()
+        for gone in set(self._pending) - set(listing):
+            del self._pending[gone]
+        for gone in set(self._done) - set(listing):
+            del self._done[gone]
+
+        ready: list[tuple[Path, float]] = []
+        for path, stat in listing.items():
+            state = (stat.st_size, stat.st_mtime_ns)
+            if self._done.get(path) == state:
+                continue
+            seen = self._pending.get(path)
+            if seen is None or (seen.size, seen.mtime_ns) != state:
+                first = seen.first_seen if seen else now
+                self._pending[path] = _Pending(*state, first_seen=first, changed=now)
+                if self.settle_s > 0:
+                    continue
+                seen = self._pending[path]
+            if now - seen.changed >= self.settle_s:
+                del self._pending[path]
+                self._done[path] = state
+                ready.append((path, seen.first_seen))
+        return sorted(ready, key=lambda r: r[1])
+
+    @property
+    def settling(self) -> int:
+        return len(self._pending)
+
+
+@dataclass
+class WatchMetrics:
+    """Counters and landing -> output latencies (seconds) of recent jobs."""
+
+    detected: int = 0
+    dispatched: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    queue_depth: int = 0
+    in_flight: int = 0
+    settling: int = 0
+    latencies: deque[float] = field(
+        default_factory=lambda: deque(maxlen=LATENCY_WINDOW)
+    )
+
+    def snapshot(self) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def _pct(q: float) -> float | None:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+        return {
+            "detected": self.detected,
+            "dispatched": self.dispatched,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "settling": self.settling,
+            "latency_s_p50": _pct(0.5),
+            "latency_s_p95": _pct(0.95),
+            "latency_s_max": round(ordered[-1], 3) if ordered else None,
+        }
+
+
+def _wake_on_events(directory: Path, wake: threading.Event) -> Any:
+    """
+    Start a watchdog observer that sets `wake` on any change in `directory`.
+    Returns the observer, or None when watchdog is not installed.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class _Wake(FileSystemEventHandler):  # type: ignore[misc]
+        def on_any_event(self, event: Any) -> None:
+            wake.set()
+
+    observer = Observer()
+    observer.schedule(_Wake(), str(directory), recursive=False)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+class Watcher:
+    """
+    Poll `directory`, dispatch complete files to warm workers and write
+    `<output_dir>/<name><suffix>` for each (plus rejects with `quarantine`).
+    The full file name is kept, so `a.csv` and `a.ndjson` do not overwrite
+    each other. `output_dir` may not be, or sit inside, `directory`: outputs
+    would be picked up again as inputs.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        output_dir: str | Path,
+        *,
+        patterns: Sequence[str] = ("*.ndjson", "*.jsonl", "*.csv", "*.parquet"),
+        suffix: str = ".parquet",
+        quarantine: bool = False,
+        profile: str | None = None,
+        workers: int = 2,
+        max_in_flight: int | None = None,
+        retries: int = 1,
+        settle_s: float = 1.0,
+        poll_s: float = 0.5,
+        on_result: Callable[[JobResult], None] | None = None,
+    ) -> None:
+        watched, out = Path(directory).resolve(), Path(output_dir).resolve()
+        if out == watched or watched in out.parents:
+            raise ValueError("output_dir must not be the watched directory.")
+        self.tracker = FileTracker(directory, patterns, settle_s=settle_s)
+        self.output_dir = Path(output_dir)
+        self.suffix = suffix
+        self.quarantine = quarantine
+        self.profile = profile
+        self.workers = workers
+        self.max_in_flight = max_in_flight or 2 * workers
+        self.retries = retries
+        self.poll_s = poll_s
+        self.on_result = on_result
+        self.metrics = WatchMetrics()
+        self._queue: deque[tuple[Job, float]] = deque()
+        self._wake = threading.Event()
+
+    def _job(self, path: Path) -> Job:
+        name = path.name
+        return Job(
+            input=str(path),
+            output=str(self.output_dir / f"{name}{self.suffix}"),
+            quarantine=(
+                str(self.output_dir / f"{name}.rejects.ndjson")
+                if self.quarantine
+                else None
+            ),
+            profile=self.profile,
+        )
+
+    def _reap(self, pool: RetryingPool, timeout: float = 0) -> None:
+        for result, landed in pool.collect(timeout):
+            job = result.job
+            if result.ok:
+                self.metrics.succeeded += 1
+                self.metrics.latencies.append(time.monotonic() - landed)
+            else:
+                self.metrics.failed += 1
+            logger.info(
+                {
+                    "stage": "watch_done",
+                    "input": job.input,
+                    "ok": result.ok,
+                    "latency_s": time.monotonic() - landed,
+                    "error": result.error,
+                }
+            )
+            if self.on_result is not None:
+                self.on_result(result)
+
+    def step(self, pool: RetryingPool) -> None:
+        """One scan / dispatch / reap round."""
+        self._reap(pool)
+        for path, landed in self.tracker.scan():
+            self._queue.append((self._job(path), landed))
+            self.metrics.detected += 1
+        while self._queue and pool.running < self.max_in_flight:
+            job, landed = self._queue.popleft()
+            pool.submit(job, partial(_run_job, job), tag=landed)
+            self.metrics.dispatched += 1
+        self.metrics.queue_depth = len(self._queue)
+        self.metrics.in_flight = pool.running
+        self.metrics.settling = self.tracker.settling
+
+    def run(
+        self,
+        *,
+        stop: threading.Event | None = None,
+        max_files: int | None = None,
+        metrics_path: str | Path | None = None,
+        metrics_every_s: float = 10.0,
+    ) -> WatchMetrics:
+        """
+        Watch until `stop` is set (or `max_files` have finished), then wait
+        for running jobs. Metrics are logged, and written to `metrics_path`,
+        every `metrics_every_s`.
+        """
+        stop = stop or threading.Event()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        observer = _wake_on_events(self.tracker.directory, self._wake)
+        logger.info(
+            {
+                "stage": "watch_start",
+                "directory": str(self.tracker.directory),
+                "workers": self.workers,
+                "max_in_flight": self.max_in_flight,
+                "notify": "watchdog" if observer else "poll",
+            }
+        )
+        last_report = time.monotonic()
+        # A worker killed mid-job breaks its pool; RetryingPool replaces it.
+        with RetryingPool(self.workers, retries=self.retries, warm=True) as pool:
+            try:
+                while not stop.is_set():
+                    self.step(pool)
+                    finished = self.metrics.succeeded + self.metrics.failed
+                    if max_files is not None and finished >= max_files:
+                        break
+                    if time.monotonic() - last_report >= metrics_every_s:
+                        self._report(metrics_path)
+                        last_report = time.monotonic()
+                    # Settling files need another look soon, events or not.
+                    self._wake.wait(self.poll_s)
+                    self._wake.clear()
+            finally:
+                while pool.running:
+                    self._reap(pool, timeout=0.05)
+                self.metrics.in_flight = 0
+                if observer is not None:
+                    observer.stop()
+        self._report(metrics_path)
+        return self.metrics
+
+    def _report(self, metrics_path: str | Path | None) -> None:
+        snapshot = self.metrics.snapshot()
+        logger.info({"stage": "watch_metrics", **snapshot})
+        if metrics_path:
+            target = Path(metrics_path)
+            partial = target.with_name(target.name + ".part")
+            partial.write_text(json.dumps(snapshot), encoding="utf-8")
+            partial.replace(target)
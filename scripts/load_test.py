@@ -0,0 +1,209 @@
+"""
+Load test for `polarspipe serve` with local stand-ins for OpenAI and E2B.
+
+Starts a fake OpenAI-compatible endpoint (OPENAI_BASE_URL) that answers the
+parse call with a spec for a generated dataset, runs sandbox jobs through
+LocalSandbox (patched in for this process only), starts the service
+in-process and fires concurrent requests. Prints requests/s and latency
+percentiles as JSON.
+
+    python scripts/load_test.py --mode spec --requests 200 --concurrency 16
+    python scripts/load_test.py --mode agent --requests 50 --llm-latency-ms 100
+    python scripts/load_test.py --mode sandbox --requests 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """POST /v1/chat/completions: the spec for JSON calls, a stub plan otherwise."""
+
+    server: Any
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.server.latency_s)
+        wants_json = (request.get("response_format") or {}).get("type") == "json_object"
+        content = json.dumps(self.server.spec) if wants_json else "1. scan 2. filter"
+        body = json.dumps(
+            {
+                "id": "chatcmpl-load",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 100,
+                    "completion_tokens": 20,
+                    "total_tokens": 120,
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve(server: ThreadingHTTPServer) -> None:
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def _request(base: str, path: str, body: Any = None) -> tuple[int, Any]:
+    data = json.dumps(body).encode() if body is not None else None
+    url = base + path  # always the local service
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=120) as resp:  # nosec
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def _one(base: str, route: str, payload: dict[str, Any]) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    rejected = 0
+    while True:
+        status, body = _request(base, route, payload)
+        if status != 429:
+            break
+        rejected += 1
+        time.sleep(0.05)
+    job = body
+    while status == 202 or job.get("status") in ("queued", "running"):
+        status, job = _request(base, f"/jobs/{body['id']}?wait=30")
+    return {
+        "ok": job.get("status") == "done",
+        "latency_s": time.perf_counter() - t0,
+        "rejected": rejected,
+        "error": job.get("error"),
+    }
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["spec", "agent", "sandbox"], default="spec")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="polarspipe-load-"))
+    fake = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    fake.latency_s = args.llm_latency_ms / 1000  # type: ignore[attr-defined]
+    _serve(fake)
+    os.environ.update(
+        OPENAI_BASE_URL=f"http://127.0.0.1:{fake.server_port}/v1",
+        OPENAI_API_KEY="load-test",
+    )
+
+    # Imported after the environment is set: the client reads it on first use.
+    import polars as pl
+
+    from polarspipe.agent import tools
+    from polarspipe.agent.local_sandbox import LocalSandbox
+    from polarspipe.service import make_server
+
+    # Test-only injection: generated scripts run on this host, unisolated.
+    tools._create_sandbox = LocalSandbox.create  # type: ignore[assignment]
+
+    source = workdir / "people.parquet"
+    pl.DataFrame(
+        {
+            "id": [str(i) for i in range(args.rows)],
+            "age": [i % 90 for i in range(args.rows)],
+        }
+    ).write_parquet(source)
+    spec = {
+        "input_path": str(source),
+        "filters": [{"column": "age", "op": ">", "value": 30}],
+        "group_by": ["age"],
+        "aggs": [{"op": "count", "alias": "n"}],
+    }
+    fake.spec = spec  # type: ignore[attr-defined]
+
+    server = make_server(
+        port=0,
+        workers=args.workers,
+        max_queue=args.max_queue,
+        artifacts_dir=workdir / "artifacts",
+    )
+    _serve(server)
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    payload: dict[str, Any]
+    if args.mode == "spec":
+        route, payload = "/specs", {"spec": spec}
+    else:
+        route = "/runs"
+        payload = {
+            "instruction": "count people over 30 by age",
+            "local": args.mode == "agent",
+        }
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(
+            pool.map(lambda _: _one(base, route, payload), range(args.requests))
+        )
+    wall = time.perf_counter() - t0
+
+    latencies = [r["latency_s"] * 1000 for r in results]
+    failures = [r["error"] for r in results if not r["ok"]]
+    print(
+        json.dumps(
+            {
+                "mode": args.mode,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "workers": args.workers,
+                "requests_per_s": round(args.requests / wall, 1),
+                "latency_ms_p50": round(_pct(latencies, 0.5), 1),
+                "latency_ms_p99": round(_pct(latencies, 0.99), 1),
+                "rejected_429": sum(r["rejected"] for r in results),
+                "failed": len(failures),
+                "first_error": failures[0] if failures else None,
+                "server": server.service.metrics(),
+            },
+            indent=2,
+        )
+    )
+    server.shutdown()
+    server.service.close()
+    fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
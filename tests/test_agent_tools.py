@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+import polars as pl
+import pytest
+
+from polarspipe.agent import tools
+
+
+class _Result:
+    exit_code = 0
+
+
+class FakeSandbox:
+    """Minimal stand-in that echoes command output through the callbacks."""
+
+    def __init__(self) -> None:
+        self.files = self
+        self.commands = self
+        self.written: dict[str, Any] = {}
+
+    @classmethod
+    def create(cls) -> FakeSandbox:
+        return cls()
+
+    def write(self, path: str, data: Any) -> None:
+        self.written[path] = data
+
+    def read(self, path: str, format: str = "text") -> bytes:
+        return b"artifact"
+
+    def run(
+        self,
+        cmd: str,
+        cwd: str | None = None,
+        on_stdout: Callable[[str], None] | None = None,
+        on_stderr: Callable[[str], None] | None = None,
+    ) -> _Result:
+        if on_stdout is not None:
+            for _ in range(3):
+                on_stdout("x" * 40_000)
+        return _Result()
+
+    def kill(self) -> None:
+        pass
+
+
+def test_execute_streams_output_and_bounds_logs(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(tools, "_create_sandbox", FakeSandbox.create)
+    events: list[tuple[str, str]] = []
+
+    result = tools.execute_in_e2b(
+        "print(1)",
+        output_path="outputs/out.parquet",
+        on_output=lambda stream, text: events.append((stream, text)),
+    )
+
+    assert events[0][0] == "trace"
+    assert sum(1 for stream, _ in events if stream == "stdout") == 6
+    assert len(result["stdout"]) == tools.MAX_LOG_CHARS
+
+
+def test_generated_script_reports_progress(tmp_path: Path) -> None:
+    source = tmp_path / "data.ndjson"
+    pl.DataFrame({"id": ["1", "", "3"], "name": ["a", "b", "c"]}).write_ndjson(source)
+    spec = {
+        "input_path": str(source),
+        "output_path": str(tmp_path / "out.parquet"),
+        "columns": ["id"],
+        "filters": [{"column": "id", "op": "!=", "value": ""}],
+    }
+    script = tmp_path / "code.py"
+    script.write_text(tools.generate_polars_code(spec), encoding="utf-8")
+
+    proc = subprocess.run(  # nosec B603 - runs the generated script under test
+        [sys.executable, "-u", str(script)], capture_output=True, text=True, check=True
+    )
+
+    assert "[progress]" in proc.stdout
+    assert pl.read_parquet(tmp_path / "out.parquet").height == 2
+
+
+def _run_script(tmp_path: Path, spec: dict[str, Any]) -> pl.DataFrame:
+    script = tmp_path / "code.py"
+    script.write_text(tools.generate_polars_code(spec), encoding="utf-8")
+    subprocess.run(  # nosec B603 - runs the generated script under test
+        [sys.executable, str(script)], capture_output=True, text=True, check=True
+    )
+    return pl.read_parquet(spec["output_path"])
+
+
+def test_generated_script_aggregates_and_ranks(tmp_path: Path) -> None:
+    source = tmp_path / "data.csv"
+    companies = ["a"] * 5 + ["b"] * 3 + ["c"] * 7 + ["d"]
+    pl.DataFrame(
+        {"company": companies, "amount": list(range(len(companies)))}
+    ).write_csv(source)
+    base = {"input_path": str(source), "columns": ["company"]}
+
+    top = _run_script(
+        tmp_path,
+        {
+            **base,
+            "output_path": str(tmp_path / "top.parquet"),
+            "group_by": ["company"],
+            "top_k": {"k": 2, "by": "count"},
+        },
+    )
+    assert top.rows() == [("c", 7), ("a", 5)]
+
+    totals = _run_script(
+        tmp_path,
+        {
+            **base,
+            "output_path": str(tmp_path / "sum.parquet"),
+            "group_by": ["company"],
+            "aggs": [{"column": "amount", "op": "sum", "alias": "total"}],
+            "sort": [{"column": "total", "descending": True}],
+            "limit": 1,
+        },
+    )
+    assert totals.rows() == [("c", sum(range(8, 15)))]
+
+
+def test_input_columns_cover_grouping_and_ordering() -> None:
+    spec = {
+        "columns": ["id"],
+        "group_by": ["company"],
+        "aggs": [{"column": "amount", "op": "mean"}, {"column": "x", "op": "bogus"}],
+    }
+    assert tools.input_columns(spec) == ["id", "company", "amount"]
+    assert tools.agg_specs(spec) == [
+        {"column": "amount", "op": "mean", "alias": "amount_mean"}
+    ]
+    assert tools.input_columns({"columns": ["id"], "sort": ["ts"]}) == ["id", "ts"]
+    assert not tools.reduces_rows({"limit": 5})
+
+
+def test_malformed_reduction_entries_are_skipped() -> None:
+    spec = {
+        "aggs": ["sum", {"column": "amount", "op": "sum"}],
+        "sort": [["ts"], 3, {"column": "ts", "descending": True}],
+        "top_k": ["amount", 5],
+    }
+    assert tools.agg_specs(spec) == [
+        {"column": "amount", "op": "sum", "alias": "amount_sum"}
+    ]
+    assert tools.sort_keys(spec) == [("ts", True)]
+    assert tools.top_k_spec(spec) is None
+    assert tools.join_specs({"joins": ["other.csv"]}) == []
+
+
+@pytest.mark.parametrize("broadcast_bytes", [tools.BROADCAST_BYTES, 0])
+def test_generated_script_joins_lookup_tables(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, broadcast_bytes: int
+) -> None:
+    monkeypatch.setattr(tools, "BROADCAST_BYTES", broadcast_bytes)
+    orders = tmp_path / "orders.csv"
+    companies = tmp_path / "companies.csv"
+    blocked = tmp_path / "blocked.csv"
+    pl.DataFrame(
+        {"id": ["1", "2", "3", "4"], "company_id": [1, 2, 2, 9], "qty": [5, 1, 2, 7]}
+    ).write_csv(orders)
+    pl.DataFrame(
+        {"company_id": [1, 2, 3], "country": ["AR", "UY", "CL"], "x": [0, 0, 0]}
+    ).write_csv(companies)
+    pl.DataFrame({"company_id": [1]}).write_csv(blocked)
+    spec = {
+        "input_path": str(orders),
+        "output_path": str(tmp_path / "out.parquet"),
+        "columns": ["id", "country"],
+        "joins": [
+            {
+                "path": str(companies),
+                "on": "company_id",
+                "how": "inner",
+                "columns": ["country"],
+            },
+            {"path": str(blocked), "on": "company_id", "how": "anti"},
+        ],
+        "group_by": ["country"],
+        "aggs": [{"column": "qty", "op": "sum", "alias": "qty"}],
+    }
+    strategies = {j["strategy"] for j in tools.join_specs(spec)}
+    assert strategies == {"broadcast" if broadcast_bytes else "stream"}
+    assert tools.input_columns(spec) == ["id", "company_id", "qty"]
+
+    assert _run_script(tmp_path, spec).rows() == [("UY", 3)]
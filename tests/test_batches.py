@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import gc
+from pathlib import Path
+
+import polars as pl
+import pyarrow as pa
+import pytest
+
+from polarspipe.ingestion import CleanBatches, iter_batches
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / "data.ndjson"
+    pl.DataFrame(
+        {
+            "id": [str(i) if i % 10 else "" for i in range(1_000)],
+            "name": [f"name {i}" for i in range(1_000)],
+        }
+    ).write_ndjson(path)
+    return path
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_batches_cover_cleaned_rows(source: Path, prefetch: int) -> None:
+    with iter_batches(source, 128, columns=["id"], prefetch=prefetch) as batches:
+        frames = list(batches)
+
+    assert all(df.height <= 128 and df.columns == ["id"] for df in frames)
+    assert sum(df.height for df in frames) == batches.position == 900
+
+
+def test_position_resumes_where_the_consumer_stopped(source: Path) -> None:
+    first = iter_batches(source, 100)
+    seen = [next(first), next(first)]
+    first.close()
+
+    rest = list(iter_batches(source, 100, offset=first.position, as_arrow=True))
+
+    assert all(isinstance(t, pa.Table) for t in rest)
+    ids = pl.concat(seen)["id"].to_list()
+    ids += [i for t in rest for i in t.column("id").to_pylist()]
+    assert len(ids) == len(set(ids)) == 900
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_query_errors_reach_the_consumer(prefetch: int) -> None:
+    frame = pl.LazyFrame({"n": ["1", "x"]}).select(pl.col("n").cast(pl.Int64))
+    batches = CleanBatches(frame, batch_size=1, prefetch=prefetch)
+    with pytest.raises(pl.exceptions.InvalidOperationError):
+        list(batches)
+    # The error is terminal: later calls re-raise it instead of blocking.
+    with pytest.raises(pl.exceptions.InvalidOperationError):
+        next(batches)
+
+
+def test_closed_iterator_is_exhausted() -> None:
+    batches = CleanBatches(pl.LazyFrame({"n": range(1000)}), batch_size=10)
+    next(batches)
+    batches.close()
+    with pytest.raises(StopIteration):
+        next(batches)
+    with pytest.raises(StopIteration):
+        next(batches)
+
+
+def test_abandoned_iterator_stops_its_thread() -> None:
+    batches = CleanBatches(pl.LazyFrame({"n": range(100_000)}), batch_size=10)
+    next(batches)
+    thread = batches._thread
+    assert thread is not None and thread.is_alive()
+
+    del batches
+    gc.collect()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
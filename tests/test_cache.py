@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from polarspipe import pipeline
+from polarspipe.cli import cli
+from polarspipe.ingestion.cache import CleanCache, cache_key, source_fingerprint
+from polarspipe.ingestion.transformer import CLEAN_RULES_VERSION, clean_rows_eager
+
+RAW = {"id": ["1", " ", "3", " 4 "], "name": ["a", "b", "c", "d"]}
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / "raw.ndjson"
+    pl.DataFrame(RAW).write_ndjson(path)
+    return path
+
+
+def test_second_load_scans_the_cached_copy(
+    source: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = CleanCache(tmp_path / "cache")
+    first = pipeline.load_clean(source, cache=store).collect()
+    assert first["id"].to_list() == ["1", "3", "4"]
+    assert len(store.entries()) == 1
+
+    def _fail(*_: object) -> None:
+        raise AssertionError("source re-cleaned on a cache hit")
+
+    monkeypatch.setattr(pipeline, "_scan_validated", _fail)
+    assert pipeline.load_clean(source, cache=store).collect().equals(first)
+
+
+def test_key_follows_source_schema_and_rules(source: Path) -> None:
+    schema = pipeline.REQUIRED_SCHEMA
+    key = cache_key(source_fingerprint(source), schema, 1)
+
+    assert cache_key(source_fingerprint(source), schema, 2) != key
+    assert cache_key(source_fingerprint(source), {**schema, "x": pl.Int64}, 1) != key
+
+    hashed = cache_key(source_fingerprint(source, hash_content=True), schema, 1)
+    os.utime(source, ns=(0, 0))
+    assert cache_key(source_fingerprint(source), schema, 1) != key
+    assert cache_key(source_fingerprint(source, hash_content=True), schema, 1) == hashed
+
+
+def test_eviction_drops_least_recently_used(tmp_path: Path) -> None:
+    store = CleanCache(tmp_path)
+    frame = pl.LazyFrame({"v": pl.int_range(10_000, eager=True)})
+    for age, key in enumerate(("c", "b", "a")):
+        os.utime(store.put(key, frame), (1_000 - age, 1_000 - age))
+    store.get("a")  # now the most recently used
+
+    store.max_bytes = store.total_bytes() - 1
+    assert store.evict() == ["b"]
+    assert [e["key"] for e in store.entries()] == ["a", "c"]
+
+
+def test_cache_cli_lists_and_purges(source: Path, tmp_path: Path) -> None:
+    root = tmp_path / "cache"
+    pipeline.load_clean(source, cache=CleanCache(root))
+    runner = CliRunner()
+
+    listed = json.loads(runner.invoke(cli, ["cache", "ls", "--dir", str(root)]).output)
+    assert [e["source"] for e in listed["entries"]] == [str(source.resolve())]
+    assert listed["entries"][0]["rows"] == 3
+
+    result = runner.invoke(
+        cli, ["cache", "purge", "--dir", str(root), "--source", str(source)]
+    )
+    assert result.exit_code == 0 and "Removed 1 cache entry" in result.output
+    assert CleanCache(root).entries() == []
+
+
+def test_clean_rules_version_tracks_clean_output() -> None:
+    # Cached entries are keyed on CLEAN_RULES_VERSION. If this fails, the
+    # cleaning rules changed: bump the version and update the expected rows.
+    raw = pl.DataFrame(
+        {
+            "id": [" 1 ", "", "\t", None, "5", 6],
+            "name": ["  a   b ", "x", "y", "z", None, "f\n g"],
+        },
+        schema={"id": pl.Utf8, "name": pl.Utf8},
+        strict=False,
+    )
+    expected = {1: [("1", "a b"), ("6", "f g")]}
+
+    assert clean_rows_eager(raw).rows() == expected.get(CLEAN_RULES_VERSION)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import polars as pl
+from click.testing import CliRunner
+
+from polarspipe.cli import cli
+
+
+def test_etl_writes_output_and_summary(tmp_path: Path) -> None:
+    source = tmp_path / "raw.ndjson"
+    pl.DataFrame({"id": ["1", " ", "3"], "name": ["a", "b", "c"]}).write_ndjson(source)
+    target = tmp_path / "clean.parquet"
+
+    result = CliRunner().invoke(
+        cli, ["etl", str(source), "-o", str(target), "--no-progress"]
+    )
+
+    assert result.exit_code == 0, result.output
+    summary = json.loads(result.output.strip().splitlines()[-1])
+    assert summary["rows"] == 2
+    assert pl.read_parquet(target)["id"].to_list() == ["1", "3"]
+
+    bad = CliRunner().invoke(
+        cli, ["etl", str(source), "-o", str(target), "--profile", "nope"]
+    )
+    assert bad.exit_code == 2 and "Invalid value for --profile" in bad.output
+
+
+def test_etl_streams_inputs_above_the_threshold(tmp_path: Path) -> None:
+    source = tmp_path / "raw.ndjson"
+    pl.DataFrame({"id": ["1", "2"], "name": ["a", "b"]}).write_ndjson(source)
+    args = ["etl", str(source), "-o", str(tmp_path / "clean.parquet")]
+    args += ["--engine", "in-memory", "--no-progress", "--stream-above-mb", "1e-6"]
+
+    result = CliRunner().invoke(cli, args)
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output.strip().splitlines()[-1])["engine"] == "streaming"
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+import pytest
+
+from polarspipe.agent import compiler, tools
+from polarspipe.ingestion.exceptions import InvalidSchemaError
+
+
+@pytest.fixture
+def sources(tmp_path: Path) -> dict[str, Any]:
+    orders = tmp_path / "orders.csv"
+    companies = tmp_path / "companies.parquet"
+    pl.DataFrame(
+        {
+            "id": ["1", "2", "3", "4", "5"],
+            "company_id": [1, 2, 2, 3, 9],
+            "qty": [5, 1, 2, 7, 4],
+        }
+    ).write_csv(orders)
+    pl.DataFrame(
+        {"company_id": [1, 2, 3], "country": ["AR", "UY", "AR"]}
+    ).write_parquet(companies)
+    return {
+        "input_path": str(orders),
+        "output_path": str(tmp_path / "out.parquet"),
+        "columns": ["id"],
+        "filters": [{"column": "qty", "op": ">", "value": 1}],
+        "joins": [{"path": str(companies), "on": "company_id", "columns": ["country"]}],
+        "group_by": ["country"],
+        "aggs": [{"column": "qty", "op": "sum", "alias": "qty"}],
+        "top_k": {"k": 1, "by": "qty"},
+    }
+
+
+def test_compiled_plan_matches_spec_and_is_memoized(sources: dict[str, Any]) -> None:
+    first = compiler.run_spec(sources)
+    second = compiler.run_spec({**sources, "instruction_raw": "ignored"})
+
+    assert first["exit_code"] == 0, first["stderr"]
+    assert pl.read_parquet(sources["output_path"]).rows() == [("AR", 12)]
+    assert not first["spans"][0]["cache_hit"]
+    assert second["spans"][0]["cache_hit"]
+
+
+def test_filter_values_are_data_not_code(sources: dict[str, Any]) -> None:
+    spec = {
+        "input_path": sources["joins"][0]["path"],
+        "filters": [{"column": "country", "op": "==", "value": "AR') | (pl.lit(True)"}],
+    }
+    assert compiler.compile_spec(spec).collect().height == 0
+
+
+def test_unknown_columns_fail_before_running(sources: dict[str, Any]) -> None:
+    with pytest.raises(InvalidSchemaError):
+        compiler.compile_spec({**sources, "columns": ["id", "nope"]})
+
+    result = compiler.run_spec({**sources, "columns": ["nope"]})
+    assert result["exit_code"] == 1 and "nope" in result["stderr"]
+
+
+FILTER_VALUES = {"in": ["a.c", "b"], "not in": ["a.c", "b"]}
+
+
+@pytest.mark.parametrize("op", [*tools.FILTER_OPS, "bogus"])
+def test_script_and_compiled_plan_agree_on_every_filter_op(
+    op: str, tmp_path: Path
+) -> None:
+    source = tmp_path / "data.csv"
+    pl.DataFrame({"s": ["a.c", "abc", "b", "ca.c", "a.cd"]}).write_csv(source)
+    fspec = {"column": "s", "op": op, "value": FILTER_VALUES.get(op, "a.c")}
+    spec = {"input_path": str(source), "filters": [fspec]}
+
+    namespace: dict[str, Any] = {"__name__": "script"}
+    exec(tools.generate_polars_code(spec), namespace)  # nosec B102 - generated in-test
+    rendered = namespace["_build_plan"]().collect()
+
+    assert rendered.equals(compiler.compile_spec(spec).collect())
+
+
+def test_filters_on_joined_columns_run_after_the_join(
+    sources: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(tools, "BROADCAST_BYTES", 0)  # stream + key prefilter
+    spec = {
+        **sources,
+        "filters": [
+            {"column": "qty", "op": ">", "value": 1},
+            {"column": "country", "op": "==", "value": "UY"},
+        ],
+    }
+    assert tools.split_filters(spec) == (spec["filters"][:1], spec["filters"][1:])
+
+    namespace: dict[str, Any] = {"__name__": "script"}
+    exec(tools.generate_polars_code(spec), namespace)  # nosec B102 - generated in-test
+    rendered = namespace["_build_plan"]().collect()
+
+    assert rendered.rows() == [("UY", 2)]
+    assert compiler.compile_spec(spec).collect().rows() == [("UY", 2)]
+
+
+@pytest.mark.parametrize(
+    "ordering",
+    [
+        {"sort": [{"column": "qty", "descending": True}]},
+        {"top_k": {"k": 2, "by": "qty"}},
+    ],
+)
+def test_ordering_keys_are_not_written(
+    sources: dict[str, Any], ordering: dict[str, Any]
+) -> None:
+    spec = {"input_path": sources["input_path"], "columns": ["id"], **ordering}
+
+    namespace: dict[str, Any] = {"__name__": "script"}
+    exec(tools.generate_polars_code(spec), namespace)  # nosec B102 - generated in-test
+    rendered = namespace["_build_plan"]().collect()
+    compiled = compiler.compile_spec(spec).collect()
+
+    assert rendered.columns == compiled.columns == ["id"]
+    assert compiled["id"].to_list()[:2] == [4, 1]
+
+
+def test_columns_come_from_the_table_that_has_them(sources: dict[str, Any]) -> None:
+    # The join lists no `columns`: `country` must come from the join table's
+    # schema, and the join key must not leak into the output.
+    spec = {
+        "input_path": sources["input_path"],
+        "columns": ["id", "country"],
+        "joins": [{"path": sources["joins"][0]["path"], "on": "company_id"}],
+        "filters": [{"column": "country", "op": "==", "value": "AR"}],
+        "sort": ["id"],
+    }
+    assert tools.input_columns(spec) == ["id", "company_id"]
+
+    namespace: dict[str, Any] = {"__name__": "script"}
+    exec(tools.generate_polars_code(spec), namespace)  # nosec B102 - generated in-test
+    rendered = namespace["_build_plan"]().collect()
+    compiled = compiler.compile_spec(spec).collect()
+
+    assert rendered.equals(compiled)
+    assert compiled.rows() == [(1, "AR"), (4, "AR")]
+
+
+def test_rewritten_eager_source_is_not_served_from_the_cache(tmp_path: Path) -> None:
+    source = tmp_path / "data.json"
+    pl.DataFrame({"id": [1, 2]}).write_json(source)
+    spec = {"input_path": str(source)}
+    assert compiler.compile_spec(spec).collect()["id"].to_list() == [1, 2]
+
+    pl.DataFrame({"id": [7, 8, 9]}).write_json(source)
+    assert compiler.compile_spec(spec).collect()["id"].to_list() == [7, 8, 9]
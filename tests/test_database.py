@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from polarspipe.cli import cli
+from polarspipe.ingestion.database import DatabaseSink, load_frame
+from polarspipe.ingestion.writer import write_frame
+
+FRAME = pl.DataFrame(
+    {
+        "id": [str(i) for i in range(1_000)],
+        "n": list(range(1_000)),
+        "created_at": [datetime(2024, 1, 1)] * 1_000,
+    }
+)
+
+
+def _rows(path: Path, sql: str) -> list[tuple]:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_sqlite_load_in_batches(tmp_path: Path) -> None:
+    target = tmp_path / "out.db"
+    write_frame(
+        FRAME.lazy(),
+        target,
+        database=DatabaseSink(batch_size=128, indexes=("created_at",)),
+    )
+
+    assert _rows(target, "SELECT COUNT(*), SUM(n) FROM records") == [(1_000, 499_500)]
+    assert _rows(target, "SELECT created_at FROM records LIMIT 1") == [
+        ("2024-01-01 00:00:00.000000",)
+    ]
+    indexes = {r[0] for r in _rows(target, "SELECT name FROM sqlite_master")}
+    assert {"ix_records_id", "ix_records_created_at"} <= indexes
+
+
+def test_sqlite_upsert_by_id(tmp_path: Path) -> None:
+    target = tmp_path / "out.sqlite"
+    duplicated = pl.DataFrame({"id": ["a", "b", "a"], "n": [1, 2, 3]})
+    load_frame(duplicated, target)
+    assert _rows(target, "SELECT id, n FROM records ORDER BY id") == [
+        ("a", 3),
+        ("b", 2),
+    ]
+
+    load_frame(pl.DataFrame({"id": ["b", "c"], "n": [20, 30]}), target)
+    assert _rows(target, "SELECT id, n FROM records ORDER BY id") == [
+        ("a", 3),
+        ("b", 20),
+        ("c", 30),
+    ]
+
+    load_frame(
+        pl.DataFrame({"id": ["z"], "n": [0]}), target, DatabaseSink(mode="replace")
+    )
+    assert _rows(target, "SELECT id FROM records") == [("z",)]
+
+
+def test_failed_load_leaves_table_untouched(tmp_path: Path) -> None:
+    target = tmp_path / "out.db"
+    load_frame(pl.DataFrame({"id": ["a"], "n": [1]}), target)
+    bad = (
+        pl.DataFrame({"id": ["b"], "n": ["x"]})
+        .lazy()
+        .select(pl.col("id"), pl.col("n").cast(pl.Int64, strict=True))
+    )
+    with pytest.raises(pl.exceptions.PolarsError):
+        load_frame(bad, target)
+    assert _rows(target, "SELECT id, n FROM records") == [("a", 1)]
+
+
+def test_duckdb_load(tmp_path: Path) -> None:
+    duckdb = pytest.importorskip("duckdb")
+    target = tmp_path / "out.duckdb"
+    load_frame(pl.concat([FRAME, FRAME]).lazy(), target, DatabaseSink(batch_size=300))
+    load_frame(
+        pl.DataFrame({"id": ["0"], "n": [-1]}).with_columns(
+            created_at=pl.lit(datetime(2024, 1, 2))
+        ),
+        target,
+    )
+
+    with duckdb.connect(str(target)) as conn:
+        assert conn.execute("SELECT COUNT(*), MIN(n) FROM records").fetchone() == (
+            1_000,
+            -1,
+        )
+
+
+def test_duckdb_output_without_duckdb_names_the_extra(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setitem(sys.modules, "duckdb", None)  # import fails
+    source = tmp_path / "in.ndjson"
+    FRAME.write_ndjson(source)
+    result = CliRunner().invoke(
+        cli, ["etl", str(source), "-o", str(tmp_path / "out.duckdb"), "--no-progress"]
+    )
+    assert result.exit_code == 2
+    assert "polarspipe[duckdb]" in result.output
+    assert not (tmp_path / "out.duckdb").exists()
+
+
+def test_etl_cli_loads_sqlite(tmp_path: Path) -> None:
+    source = tmp_path / "in.ndjson"
+    raw = {"id": ["1", " ", "3", "1"], "name": ["a", "b", "c", "d"]}
+    pl.DataFrame(raw).write_ndjson(source)
+    target = tmp_path / "clean.db"
+    result = CliRunner().invoke(
+        cli,
+        ["etl", str(source), "-o", str(target), "--table", "t", "--no-progress"],
+    )
+    assert result.exit_code == 0, result.output
+    assert _rows(target, "SELECT id, name FROM t ORDER BY id") == [
+        ("1", "d"),
+        ("3", "c"),
+    ]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from polarspipe import pipeline
+from polarspipe.ingestion.dtypes import compact_dtypes, infer_compaction, uncastable
+
+ROWS = 200
+RAW = {
+    "id": [str(i) for i in range(ROWS)],
+    "name": [f"name {i}" for i in range(ROWS)],
+    "company": [f"company {i % 5}" for i in range(ROWS)],
+    "created_at": [f"2024-01-{i % 28 + 1:02d}T10:00:00.{i:06d}" for i in range(ROWS)],
+    "day": [f"2024-02-{i % 28 + 1:02d}" for i in range(ROWS)],
+    "count": [str(i * 7) for i in range(ROWS)],
+    "zip": [f"0{i:04d}" for i in range(ROWS)],  # leading zeros: stays a string
+}
+
+
+def test_infer_picks_cheaper_types_only_where_lossless() -> None:
+    plan = {c.column: c for c in infer_compaction(pl.DataFrame(RAW))}
+
+    assert plan["company"].target == pl.Categorical
+    assert plan["created_at"].target == pl.Datetime("us")
+    assert plan["day"].target == pl.Date
+    assert plan["count"].target == pl.Int64
+    assert not {"id", "name", "zip"} & plan.keys()
+    assert plan["company"].bytes_saved > 0
+
+
+def test_compaction_is_lazy_and_lenient_by_default() -> None:
+    frame = pl.LazyFrame(RAW)
+    compacted, _ = compact_dtypes(frame, sample=pl.DataFrame(RAW))
+    df = compacted.collect()
+
+    assert df["created_at"][0] == datetime(2024, 1, 1, 10, 0)
+    assert df["day"][0] == date(2024, 2, 1)
+    assert df["company"].cast(pl.Utf8).equals(pl.Series("company", RAW["company"]))
+
+    unseen = pl.concat([frame, pl.LazyFrame({**RAW, "count": ["x"] * ROWS})])
+    lenient, plan = compact_dtypes(unseen, sample=pl.DataFrame(RAW))
+    assert lenient.collect()["count"].null_count() == ROWS
+    reasons = unseen.select(uncastable(plan)).collect().to_series()
+    assert reasons.null_count() == ROWS
+    assert set(reasons.drop_nulls()) == {"uncastable_count"}
+    strict, _ = compact_dtypes(unseen, sample=pl.DataFrame(RAW), strict=True)
+    with pytest.raises(pl.exceptions.InvalidOperationError):
+        strict.collect()
+
+
+def test_enum_categories_can_be_given_explicitly() -> None:
+    df = pl.DataFrame({"status": ["new", "done", "new"]})
+    (plan,) = infer_compaction(df, enums={"status": ["new", "done", "failed"]})
+    assert plan.target == pl.Enum(["new", "done", "failed"])
+
+
+def test_load_clean_compact_keeps_required_schema(tmp_path: Path) -> None:
+    source = tmp_path / "raw.ndjson"
+    pl.DataFrame(RAW).write_ndjson(source)
+
+    df = pipeline.load_clean(source, compact=True).collect()
+
+    assert df.schema["id"] == pl.Utf8
+    assert df.schema["company"] == pl.Categorical
+    assert df.height == ROWS
+
+
+def test_unanticipated_values_are_quarantined(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(pipeline, "SAMPLE_ROWS", 20)  # the sample misses the bad row
+    raw = {k: v * 10 for k, v in RAW.items()}
+    raw["id"] = [str(i) for i in range(10 * ROWS)]
+    raw["created_at"][-1] = "unknown"
+    source = tmp_path / "raw.ndjson"
+    pl.DataFrame(raw).write_ndjson(source)
+    out, rejects = tmp_path / "clean.parquet", tmp_path / "rejects.ndjson"
+
+    pipeline.write_clean(source, out, quarantine=rejects, compact=True)
+
+    df = pl.read_parquet(out)
+    assert df.schema["created_at"] == pl.Datetime("us")
+    assert df.height == 10 * ROWS - 1
+    quarantined = pl.read_ndjson(rejects)
+    assert quarantined["created_at"].to_list() == ["unknown"]
+    assert quarantined["reject_reason"].to_list() == ["uncastable_created_at"]
+    with pytest.raises(pl.exceptions.InvalidOperationError):
+        pipeline.write_clean(source, out, compact=True, compact_strict=True)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Generous budgets (cumulative microseconds from `-X importtime`) that still catch
+# an eager import of polars/pandas/openai creeping back into the startup path.
+# Override on slow machines with POLARSPIPE_IMPORT_BUDGET_SCALE.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BUDGET_SCALE = float(os.getenv("POLARSPIPE_IMPORT_BUDGET_SCALE", "1"))
+BUDGETS_US = {
+    "polarspipe.cli": 250_000,
+    "polarspipe.pipeline": 600_000,
+}
+FORBIDDEN = {
+    "polarspipe.cli": {"polars", "pandas", "openai", "langgraph", "e2b", "langsmith"},
+    "polarspipe.pipeline": {"pandas", "openai", "langgraph", "e2b", "memory_profiler"},
+}
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """Cumulative import time (us) per top-level module for a fresh interpreter."""
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    env.pop("OPENAI_API_KEY", None)
+    proc = subprocess.run(  # nosec B603 - fixed interpreter + module name
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        cumulative[name] = int(cum)
+    return cumulative
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_US))
+def test_import_budget(module: str) -> None:
+    profile = import_profile(module)
+
+    eager = FORBIDDEN[module] & set(profile)
+    assert not eager, f"{module} eagerly imports {sorted(eager)}"
+    assert profile[module] <= BUDGETS_US[module] * BUDGET_SCALE
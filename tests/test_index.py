@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from polarspipe.ingestion import build_index, contains, lookup
+from polarspipe.ingestion.exceptions import StaleIndexError
+from polarspipe.ingestion.index import candidate_row_groups, index_path, load_index
+from polarspipe.ingestion.writer import ParquetProfile, write_frame
+
+ROWS = 50_000
+ROW_GROUP = 5_000
+
+
+@pytest.fixture()
+def dataset(tmp_path: Path) -> tuple[Path, list[str]]:
+    ids = [str(uuid.uuid4()) for _ in range(ROWS)]
+    df = pl.DataFrame({"id": ids, "name": [f"n{i}" for i in range(ROWS)]})
+    path = write_frame(
+        df, tmp_path / "clean.parquet", profile=ParquetProfile(row_group_size=ROW_GROUP)
+    )
+    build_index(path, ["id"])
+    return path, ids
+
+
+def test_lookup_reads_few_row_groups(dataset: tuple[Path, list[str]]) -> None:
+    path, ids = dataset
+    wanted = ids[:3]
+
+    groups = candidate_row_groups(load_index(path), "id", wanted)
+    result = lookup(path, wanted)
+
+    assert len(groups) <= 3
+    assert sorted(result["id"].to_list()) == sorted(wanted)
+
+
+def test_contains(dataset: tuple[Path, list[str]]) -> None:
+    path, ids = dataset
+    assert contains(path, ids[-1])
+    assert not contains(path, "not-a-real-id")
+
+
+def test_stale_index_rejected(dataset: tuple[Path, list[str]]) -> None:
+    path, ids = dataset
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    with pytest.raises(StaleIndexError):
+        lookup(path, ids[:1])
+
+
+def test_index_from_another_hash_is_rejected(dataset: tuple[Path, list[str]]) -> None:
+    path, ids = dataset
+    target = index_path(path)
+    payload = json.loads(target.read_text())
+    target.write_text(json.dumps({**payload, "hash": "polars-0.0.0"}))
+    with pytest.raises(StaleIndexError):
+        lookup(path, ids[:1])
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import polars as pl
+import pytest
+from click.testing import CliRunner
+
+from polarspipe.cli import cli
+from polarspipe.ingestion.exceptions import UnsupportedFormatError
+from polarspipe.ingestion.reader import read_ipc, scan_file
+from polarspipe.ingestion.writer import write_frame
+
+FRAME = pl.DataFrame({"id": [str(i) for i in range(1_000)], "n": list(range(1_000))})
+
+
+@pytest.mark.parametrize("compression", ["uncompressed", "lz4", "zstd"])
+@pytest.mark.parametrize("streaming", [False, True])
+def test_ipc_round_trip(tmp_path: Path, compression: str, streaming: bool) -> None:
+    target = tmp_path / "out.arrow"
+    write_frame(
+        FRAME.lazy(),
+        target,
+        streaming=streaming,
+        ipc_compression=compression,  # type: ignore[arg-type]
+    )
+
+    assert read_ipc(target).equals(FRAME)
+    assert read_ipc(target, columns=["n"]).columns == ["n"]
+    assert scan_file(target).select(pl.col("n").sum()).collect().item() == 499_500
+
+
+def test_unknown_extension_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(UnsupportedFormatError):
+        write_frame(FRAME, tmp_path / "out.xlsx")
+    assert not (tmp_path / "out.xlsx").exists()
+
+    source = tmp_path / "in.ndjson"
+    FRAME.write_ndjson(source)
+    result = CliRunner().invoke(
+        cli, ["etl", str(source), "-o", str(tmp_path / "out.txt"), "--no-progress"]
+    )
+    assert result.exit_code == 2 and "Unsupported output extension" in result.output
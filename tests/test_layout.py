@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+import pyarrow.parquet as pq
+import pytest
+
+from polarspipe.ingestion.compact import compact
+from polarspipe.ingestion.writer import ParquetProfile, write_frame
+
+ROWS = 200_000
+ROW_GROUP = 10_000
+
+
+@pytest.fixture(scope="module")
+def records() -> pl.DataFrame:
+    start = datetime(2024, 1, 1)
+    return pl.DataFrame(
+        {
+            "id": [str(uuid.UUID(int=i * 7919 + 1)) for i in range(ROWS)],
+            "name": [f"name {i}" for i in range(ROWS)],
+            "created_at": [
+                (start + timedelta(seconds=i * 37)).isoformat() for i in range(ROWS)
+            ],
+        }
+    ).sample(fraction=1.0, shuffle=True, seed=0)
+
+
+@pytest.fixture(scope="module")
+def layouts(records: pl.DataFrame, tmp_path_factory: Any) -> dict[str, Path]:
+    base = tmp_path_factory.mktemp("layouts")
+    return {
+        "unsorted": write_frame(
+            records,
+            base / "unsorted.parquet",
+            profile=ParquetProfile(row_group_size=ROW_GROUP),
+        ),
+        "id": write_frame(
+            records,
+            base / "by_id.parquet",
+            profile=ParquetProfile(row_group_size=ROW_GROUP, sort_by=("id",)),
+        ),
+        "created_at": write_frame(
+            records,
+            base / "by_created_at.parquet",
+            profile=ParquetProfile(row_group_size=ROW_GROUP, sort_by=("created_at",)),
+        ),
+    }
+
+
+def lookup_id(path: Path, key: str) -> pl.DataFrame:
+    return pl.scan_parquet(path).filter(pl.col("id") == key).collect()
+
+
+def created_between(path: Path, lo: str, hi: str) -> pl.DataFrame:
+    return (
+        pl.scan_parquet(path)
+        .filter(pl.col("created_at").is_between(pl.lit(lo), pl.lit(hi)))
+        .collect()
+    )
+
+
+def test_profile_sorts_and_sizes_row_groups(layouts: dict[str, Path]) -> None:
+    meta = pq.ParquetFile(layouts["id"]).metadata
+    assert meta.num_row_groups == ROWS // ROW_GROUP
+    first = meta.row_group(0).column(0).statistics
+    second = meta.row_group(1).column(0).statistics
+    assert first.max <= second.min
+
+
+def test_unknown_profile_rejected(records: pl.DataFrame, tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        write_frame(records, tmp_path / "x.parquet", profile="nope")
+
+
+def test_compact_merges_parts(records: pl.DataFrame, tmp_path: Path) -> None:
+    parts = tmp_path / "parts"
+    for i, chunk in enumerate(records.iter_slices(n_rows=5_000)):
+        write_frame(chunk, parts / f"part-{i:05d}.parquet")
+
+    written = compact(parts, tmp_path / "compacted", target_mb=1)
+
+    assert 1 <= len(written) < len(list(parts.glob("*.parquet")))
+    assert pl.scan_parquet(written).select(pl.len()).collect().item() == ROWS
+
+
+@pytest.mark.benchmark(group="parquet_id_lookup")
+@pytest.mark.parametrize("layout", ["unsorted", "id"])
+def test_id_lookup_benchmark(
+    benchmark: Any, layouts: dict[str, Path], records: pl.DataFrame, layout: str
+) -> None:
+    key = records["id"][ROWS // 2]
+    result = benchmark(lookup_id, layouts[layout], key)
+    assert result.height == 1
+
+
+@pytest.mark.benchmark(group="parquet_created_at_range")
+@pytest.mark.parametrize("layout", ["unsorted", "created_at"])
+def test_created_at_range_benchmark(
+    benchmark: Any, layouts: dict[str, Path], layout: str
+) -> None:
+    result = benchmark(
+        created_between, layouts[layout], "2024-01-02T00:00:00", "2024-01-02T06:00:00"
+    )
+    assert result.height > 0
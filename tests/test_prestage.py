@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import polars as pl
+
+from polarspipe.agent.prestage import filter_expr, prestage_input, staged_spec
+from polarspipe.agent.tools import generate_polars_code
+
+
+def test_prestage_prunes_and_reuses(tmp_path: Path) -> None:
+    source = tmp_path / "data.ndjson"
+    pl.DataFrame(
+        {
+            "id": [str(i) for i in range(5_000)],
+            "name": [f"name {i}" for i in range(5_000)],
+            "company": ["Acme" if i % 10 == 0 else "Other" for i in range(5_000)],
+        }
+    ).write_ndjson(source)
+    spec = {
+        "input_path": str(source),
+        "columns": ["id", "company"],
+        "filters": [{"column": "company", "op": "==", "value": "Acme"}],
+    }
+
+    staged = prestage_input(spec, tmp_path / "staging")
+    again = prestage_input(spec, tmp_path / "staging")
+
+    assert staged is not None and again is not None
+    assert staged["path"] == again["path"]
+    assert staged["bytes_out"] < staged["bytes_in"] / 10
+    df = pl.read_parquet(staged["path"])
+    assert df.columns == ["id", "company"] and df.height == 500
+    assert staged_spec(spec, staged)["format"] == "parquet"
+
+
+def test_limit_waits_for_aggregation(tmp_path: Path) -> None:
+    source = tmp_path / "data.csv"
+    pl.DataFrame(
+        {"company": ["a", "b", "a", "c"], "id": ["1", "2", "3", "4"]}
+    ).write_csv(source)
+    spec = {"input_path": str(source), "group_by": ["company"], "limit": 1}
+
+    staged = prestage_input(spec, tmp_path / "staging")
+
+    assert staged is not None and pl.read_parquet(staged["path"]).height == 4
+
+
+def test_missing_input_is_not_staged(tmp_path: Path) -> None:
+    assert prestage_input({"input_path": str(tmp_path / "nope.csv")}) is None
+
+
+def test_filter_expr_ops() -> None:
+    df = pl.DataFrame({"n": [1, 2, 3], "s": ["ab", "bc", "cd"]})
+    cases = [
+        ("n", ">=", 2, 2),
+        ("n", "not in", [1, 3], 1),
+        ("s", "contains", "c", 2),
+        ("s", "startswith", "a", 1),
+        ("s", "bogus", "x", 3),
+    ]
+    for column, op, value, expected in cases:
+        fspec = {"column": column, "op": op, "value": value}
+        assert df.filter(filter_expr(fspec)).height == expected
+
+
+def _script_rows(spec: dict) -> pl.DataFrame:
+    namespace: dict = {"__name__": "script"}
+    exec(generate_polars_code(spec), namespace)  # nosec B102 - generated in-test
+    return namespace["_build_plan"]().collect()
+
+
+def test_staged_script_matches_raw_script(tmp_path: Path) -> None:
+    source = tmp_path / "data.csv"
+    pl.DataFrame(
+        {"id": [str(i) for i in range(10)], "s": ["a.c"] * 3 + ["abc"] * 7}
+    ).write_csv(source)
+    for fspec in (
+        {"column": "s", "op": "not in", "value": ["a.c"]},
+        {"column": "s", "op": "contains", "value": "a.c"},
+    ):
+        spec = {"input_path": str(source), "filters": [fspec], "limit": 5}
+        staged = prestage_input(spec, tmp_path / "staging")
+        assert staged is not None
+
+        raw = _script_rows(spec)
+        assert raw.height == (5 if fspec["op"] == "not in" else 3)
+        assert _script_rows(staged_spec(spec, staged)).equals(raw)
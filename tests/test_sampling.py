@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from polarspipe.ingestion.sampling import (
+    byte_range_sample,
+    reservoir_sample,
+    row_group_sample,
+    sample_file,
+)
+
+ROWS = 50_000
+
+
+@pytest.fixture(scope="module")
+def ordered(tmp_path_factory: pytest.TempPathFactory) -> pl.DataFrame:
+    # Time-ordered data: a head sample would only ever see small `seq` values.
+    return pl.DataFrame(
+        {"seq": range(ROWS), "name": [f"name {i}" for i in range(ROWS)]}
+    )
+
+
+def test_reservoir_is_seeded_and_spread(ordered: pl.DataFrame) -> None:
+    first = reservoir_sample(ordered, 500, seed=7)
+    again = reservoir_sample(ordered.lazy(), 500, seed=7)
+
+    assert first.height == 500
+    assert first.equals(again)
+    assert first.select(pl.col("seq").max()).item() > ROWS * 0.9
+
+
+@pytest.mark.parametrize("suffix", [".ndjson", ".csv"])
+def test_byte_ranges_cover_file(
+    ordered: pl.DataFrame, tmp_path: Path, suffix: str
+) -> None:
+    path = tmp_path / f"data{suffix}"
+    if suffix == ".csv":
+        ordered.write_csv(path)
+    else:
+        ordered.write_ndjson(path)
+
+    sample = byte_range_sample(path, 1_000, block_bytes=4_096)
+
+    assert 0 < sample.height <= 1_000
+    assert set(sample.columns) == {"seq", "name"}
+    assert sample.select(pl.col("seq").max()).item() > ROWS // 2
+
+
+def test_row_groups_read_subset(ordered: pl.DataFrame, tmp_path: Path) -> None:
+    path = tmp_path / "data.parquet"
+    ordered.write_parquet(path, row_group_size=5_000)
+
+    sample = row_group_sample(path, 2_000, seed=1)
+
+    assert sample.height == 2_000
+    assert sample_file(path, 2_000, seed=1).equals(sample)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+from functools import partial
+from pathlib import Path
+
+import polars as pl
+
+from polarspipe.scheduler import (
+    Job,
+    JobResult,
+    RetryingPool,
+    jobs_for_inputs,
+    order_jobs,
+    run_jobs,
+    summarize,
+    threads_per_worker,
+)
+
+
+def write_source(path: Path, rows: int) -> Path:
+    pl.DataFrame(
+        {"id": [str(i) for i in range(rows)], "name": ["x"] * rows}
+    ).write_ndjson(path)
+    return path
+
+
+def test_threads_and_ordering(tmp_path: Path) -> None:
+    small = write_source(tmp_path / "small.ndjson", 10)
+    big = write_source(tmp_path / "big.ndjson", 1_000)
+
+    assert threads_per_worker(4, cpus=16) == 4
+    assert threads_per_worker(32, cpus=16) == 1
+    ordered = order_jobs(jobs_for_inputs([small, big], tmp_path / "out"))
+    assert [Path(j.input).name for j in ordered] == ["big.ndjson", "small.ndjson"]
+
+
+def test_run_jobs_retries_failures(tmp_path: Path) -> None:
+    good = write_source(tmp_path / "good.ndjson", 100)
+    bad = tmp_path / "bad.ndjson"
+    pl.DataFrame({"other": ["1"]}).write_ndjson(bad)
+    jobs = jobs_for_inputs([good, bad], tmp_path / "out")
+
+    results = {Path(r.job.input).name: r for r in run_jobs(jobs, workers=2)}
+
+    assert results["good.ndjson"].ok and results["good.ndjson"].rows == 100
+    assert results["good.ndjson"].logs
+    assert not results["bad.ndjson"].ok
+    assert results["bad.ndjson"].attempts == 2
+    assert summarize(list(results.values()))["failed"] == 1
+    assert isinstance(results["good.ndjson"].job, Job)
+
+
+def _crash_first_attempt(job: Job, attempt: int) -> JobResult:
+    if job.input == "in0" and attempt == 1:
+        os._exit(1)  # like an OOM kill: breaks the pool for every job in flight
+    return JobResult(job, True, attempt, 0.0)
+
+
+def test_pool_is_replaced_after_a_worker_dies() -> None:
+    jobs = [Job(input=f"in{i}", output=f"out{i}") for i in range(3)]
+
+    with RetryingPool(2, retries=1) as pool:
+        for job in jobs:
+            pool.submit(job, partial(_crash_first_attempt, job), tag=job.input)
+        finished = []
+        while pool.running:
+            finished += pool.collect()
+
+    results = {tag: r for r, tag in finished}
+    assert sorted(results) == ["in0", "in1", "in2"]
+    assert all(r.ok for r in results.values()) and results["in0"].attempts == 2
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Iterator
+
+import polars as pl
+import pytest
+
+from polarspipe import service
+from polarspipe.agent import graph
+from polarspipe.service import ServiceHTTPServer, make_server
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[ServiceHTTPServer]:
+    srv = make_server(port=0, workers=2, artifacts_dir=tmp_path / "artifacts")
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    srv.service.close()
+
+
+def _call(srv: ServiceHTTPServer, path: str, body: Any = None) -> tuple[int, bytes]:
+    url = f"http://127.0.0.1:{srv.server_port}{path}"
+    data = json.dumps(body).encode() if body is not None else None
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=30) as resp:  # nosec
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / "people.csv"
+    pl.DataFrame({"id": ["1", "2", "3"], "age": [30, 15, 40]}).write_csv(path)
+    return path
+
+
+def test_spec_job_runs_and_streams_its_artifact(
+    server: ServiceHTTPServer, source: Path
+) -> None:
+    spec = {
+        "input_path": str(source),
+        "filters": [{"column": "age", "op": ">", "value": 18}],
+    }
+    status, body = _call(server, "/specs", {"spec": spec})
+    assert status == 202
+    job_id = json.loads(body)["id"]
+
+    status, body = _call(server, f"/jobs/{job_id}?wait=30")
+    job = json.loads(body)
+    assert job["status"] == "done", job["error"]
+    assert job["result"]["rows"] == 2
+
+    status, body = _call(server, f"/jobs/{job_id}/artifact")
+    assert status == 200
+    artifact = Path(job["output_path"])
+    assert body == artifact.read_bytes()
+
+    metrics = json.loads(_call(server, "/metrics")[1])
+    assert metrics["succeeded"] == 1 and metrics["latency_ms_p99"] is not None
+    assert _call(server, f"/jobs/{job_id}?wait=abc")[0] == 400
+
+
+def test_evicted_jobs_take_their_artifacts(
+    server: ServiceHTTPServer, source: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(service, "MAX_JOBS", 1)
+    first = server.service.submit("spec", {"spec": {"input_path": str(source)}})
+    assert first.done.wait(30) and Path(first.output_path).is_file()
+
+    server.service.submit("spec", {"spec": {"input_path": str(source)}})
+
+    assert server.service.get(first.id) is None
+    assert not Path(first.output_path).exists()
+
+
+def test_agent_run_reuses_the_compiled_graph(
+    server: ServiceHTTPServer, source: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    spec = {"input_path": str(source), "columns": ["id"]}
+    monkeypatch.setattr(
+        graph,
+        "_chat",
+        lambda messages, response_format=None, **_: (
+            json.dumps(spec) if response_format else "plan"
+        ),
+    )
+    status, body = _call(
+        server, "/runs", {"instruction": "ids of people", "local": True}
+    )
+    job = json.loads(_call(server, f"/jobs/{json.loads(body)['id']}?wait=30")[1])
+
+    assert job["status"] == "done", job["error"]
+    assert pl.read_parquet(job["output_path"]).columns == ["id"]
+
+
+def test_bad_requests_and_backpressure(server: ServiceHTTPServer) -> None:
+    assert _call(server, "/specs", {"nope": 1})[0] == 400
+    assert _call(server, "/jobs/missing")[0] == 404
+
+    server.service.max_queue = 0
+    status, _ = _call(server, "/specs", {"spec": {"input_path": "x.csv"}})
+    assert status == 429
+    assert server.service.metrics()["rejected"] == 1
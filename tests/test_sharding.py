@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from polarspipe.ingestion.exceptions import ShardManifestError
+from polarspipe.sharding import (
+    merge_shards,
+    plan_shards,
+    receipt_path,
+    run_shard,
+    run_shards,
+    write_plan,
+)
+
+ROWS = 300
+RAW = {
+    "id": [str(i) if i % 50 else "" for i in range(ROWS)],
+    "name": [f'name "{i}"' for i in range(ROWS)],
+    "address": [f"{i} Main St\nSpringfield, {i % 7}" for i in range(ROWS)],
+}
+
+
+@pytest.fixture
+def csv_source(tmp_path: Path) -> Path:
+    path = tmp_path / "raw.csv"
+    pl.DataFrame(RAW).write_csv(path)
+    return path
+
+
+def test_csv_cuts_never_split_quoted_newlines(csv_source: Path) -> None:
+    shards = plan_shards(csv_source, shards=7)
+    data = csv_source.read_bytes()
+    header = data[: data.index(b"\n") + 1]
+
+    assert len(shards) == 7
+    assert shards[0].start == len(header) and shards[-1].end == len(data)
+    total = 0
+    for shard in shards:
+        chunk = pl.read_csv(header + data[shard.start : shard.end])
+        assert chunk["address"].str.contains("Springfield").all()
+        total += chunk.height
+    assert total == ROWS
+
+    naive = plan_shards(csv_source, shards=7, quote_aware=False)
+    assert {s.start for s in naive} != {s.start for s in shards}
+
+
+def test_run_and_merge_match_a_single_clean(csv_source: Path, tmp_path: Path) -> None:
+    out = tmp_path / "shards"
+    write_plan(csv_source, out, shards=4)
+
+    results = run_shards(out, workers=2)
+    manifest = merge_shards(out, output=tmp_path / "clean.parquet")
+
+    assert all(r.ok for r in results) and len(results) == 4
+    assert manifest["rows_in"] == ROWS and manifest["rows"] == ROWS - 6
+    merged = pl.read_parquet(tmp_path / "clean.parquet")
+    assert sorted(merged["id"].to_list()) == sorted(i for i in RAW["id"] if i)
+    assert run_shards(out, workers=2) == []  # every shard has a receipt
+
+
+def test_merge_rejects_missing_or_tampered_parts(tmp_path: Path) -> None:
+    source = tmp_path / "raw.ndjson"
+    pl.DataFrame(RAW).write_ndjson(source)
+    out = tmp_path / "shards"
+    write_plan(source, out, shards=3)
+    run_shard(out, 0)
+    run_shard(out, 2)
+
+    with pytest.raises(ShardManifestError, match="shard 1: no receipt"):
+        merge_shards(out)
+
+    run_shard(out, 1)
+    first = json.loads(receipt_path(out, 0).read_text())
+    pl.DataFrame({"id": ["x"], "name": ["y"]}).write_parquet(out / first["part"])
+    with pytest.raises(ShardManifestError, match="shard 0: .* checksum mismatch"):
+        merge_shards(out)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+
+import polars as pl
+from click.testing import CliRunner
+
+from polarspipe.cli import cli
+from polarspipe.ingestion.sketches import (
+    DatasetProfile,
+    HeavyHitters,
+    HyperLogLog,
+    QuantileSketch,
+    profile_frame,
+)
+
+ROWS = 50_000
+
+
+def _frame() -> pl.DataFrame:
+    rng = random.Random(7)
+    return pl.DataFrame(
+        {
+            "id": [f"u{i}" for i in range(ROWS)],
+            "company": [
+                f"c{min(int(rng.paretovariate(1.0)), 500)}" for _ in range(ROWS)
+            ],
+            "score": [rng.gauss(100, 15) for _ in range(ROWS)],
+            "note": [None if i % 10 == 0 else "x" * (i % 20) for i in range(ROWS)],
+        }
+    )
+
+
+def test_sketches_track_exact_answers() -> None:
+    df = _frame()
+    hll, quantiles, heavy = HyperLogLog(), QuantileSketch(), HeavyHitters(k=32)
+    for batch in df.iter_slices(7_000):
+        hll.update(batch["id"])
+        quantiles.update(batch["score"])
+        heavy.update(batch["company"])
+
+    assert abs(hll.estimate() - ROWS) < 4 * hll.relative_error * ROWS
+    for q in (0.01, 0.5, 0.99):
+        exact = df["score"].quantile(q, interpolation="lower")
+        approx = quantiles.quantile(q)
+        assert exact is not None and approx is not None
+        assert abs(approx - exact) <= 0.01 * abs(exact)
+    exact_top = df["company"].value_counts(sort=True).row(0)
+    value, count = heavy.top(1)[0]
+    assert value == exact_top[0]
+    assert exact_top[1] - heavy.max_error <= count <= exact_top[1]
+
+
+def test_profiles_merge_like_a_single_pass(tmp_path: Path) -> None:
+    df = _frame()
+    whole = profile_frame(df, batch_rows=10_000)
+    left = profile_frame(df.head(20_000)).save(tmp_path / "left.json")
+    right = profile_frame(df.tail(ROWS - 20_000).drop("note"))
+
+    merged = DatasetProfile.load(left).merge(right)
+
+    for name in ("id", "company", "score"):
+        a, b = whole.columns[name], merged.columns[name]
+        assert (a.rows, a.nulls, a.min, a.max) == (b.rows, b.nulls, b.min, b.max)
+        assert a.distinct.estimate() == b.distinct.estimate()
+    assert merged.columns["note"].rows == ROWS
+    note = whole.summary()["columns"]["note"]
+    assert note["nulls"] == ROWS // 10
+    assert note["length_histogram"]["8-15"] == sum(
+        1 for i in range(ROWS) if i % 10 and 8 <= i % 20 <= 15
+    )
+
+
+def test_profile_command_merges_files_and_saved_profiles(tmp_path: Path) -> None:
+    df = _frame()
+    df.head(ROWS // 2).write_parquet(tmp_path / "a.parquet")
+    df.tail(ROWS // 2).write_ndjson(tmp_path / "b.ndjson")
+    runner = CliRunner()
+
+    first = runner.invoke(
+        cli, ["profile", str(tmp_path / "a.parquet"), "-o", str(tmp_path / "a.json")]
+    )
+    second = runner.invoke(
+        cli, ["profile", str(tmp_path / "a.json"), str(tmp_path / "b.ndjson")]
+    )
+
+    assert first.exit_code == 0 and second.exit_code == 0, second.output
+    summary = json.loads(second.output)
+    assert summary["rows"] == ROWS
+    assert summary["columns"]["score"]["quantiles"]["p50"] is not None
+
+
+def test_profiles_with_mismatched_dtypes_do_not_merge(tmp_path: Path) -> None:
+    pl.DataFrame({"id": [1, 2]}).write_parquet(tmp_path / "a.parquet")
+    pl.DataFrame({"id": ["x", "y"]}).write_ndjson(tmp_path / "b.ndjson")
+
+    result = CliRunner().invoke(
+        cli, ["profile", str(tmp_path / "a.parquet"), str(tmp_path / "b.ndjson")]
+    )
+
+    assert result.exit_code == 1, result.output  # an error message, no traceback
+    assert "Column 'id': cannot merge String into Int64" in result.output
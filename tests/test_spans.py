@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from polarspipe.agent.spans import (
+    Span,
+    add_usage,
+    span,
+    summary_table,
+    write_spans_json,
+)
+
+
+def test_span_records_usage_errors_and_exports(tmp_path: Path) -> None:
+    spans: list[Span] = []
+    usage = SimpleNamespace(
+        prompt_tokens=120,
+        completion_tokens=30,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=100),
+    )
+    with span("parse", spans) as record:
+        add_usage(record, usage)
+        add_usage(record, None)
+    with pytest.raises(RuntimeError):
+        with span("upload", spans, kind="sandbox", parent="execute", bytes=10):
+            raise RuntimeError("boom")
+
+    parse, upload = spans
+    assert parse["llm_calls"] == 2 and parse["cached_tokens"] == 100
+    assert parse["cache_hit"] and parse["status"] == "ok"
+    assert upload["status"] == "error" and "boom" in upload["error"]
+
+    table = summary_table(spans)
+    assert "  upload" in table and "120/30" in table
+
+    payload = json.loads(write_spans_json(spans, tmp_path / "spans.json").read_text())
+    assert payload["totals"]["bytes"] == 10
+    assert payload["totals"]["prompt_tokens"] == 120
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import polars as pl
+
+from polarspipe.ingestion.stats import dataset_stats
+
+
+def test_parquet_and_scan_providers_agree(tmp_path: Path) -> None:
+    df = pl.DataFrame({"id": ["b", None, "a", "c"], "n": [3, 1, None, 2]})
+    df.write_parquet(tmp_path / "d.parquet", row_group_size=2)
+    df.write_ndjson(tmp_path / "d.ndjson")
+
+    footer = dataset_stats(tmp_path / "d.parquet")
+    scanned = dataset_stats(tmp_path / "d.ndjson")
+
+    assert footer.provider == "parquet_footer" and footer.rows_scanned == 0
+    assert scanned.provider == "scan" and scanned.rows_scanned == 4
+    for stats in (footer, scanned):
+        assert stats.row_count == 4
+        assert stats.null_counts == {"id": 1, "n": 1}
+        assert stats.min_values == {"id": "a", "n": 1}
+        assert stats.max_values == {"id": "c", "n": 3}
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Sequence
+
+import pytest
+
+from polarspipe.agent import tracing
+
+
+class _SlowBackend:
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.batches: list[list[dict[str, Any]]] = []
+
+    def send(self, batch: Sequence[dict[str, Any]]) -> None:
+        self.release.wait(5)
+        self.batches.append(list(batch))
+
+
+def test_payloads_lose_binary_and_oversized_values() -> None:
+    payload, truncated = tracing.sanitize_payload(
+        {"execution": {"artifact_bytes": b"x" * 100, "stdout": "y" * 50, "rc": 0}},
+        max_chars=10,
+    )
+    assert truncated
+    assert payload == {"execution": {"stdout": "y" * 10 + "...[+40 chars]", "rc": 0}}
+
+    stub, truncated = tracing.sanitize_payload({"plan": "z" * 500}, max_bytes=100)
+    assert truncated and stub["truncated"] and stub["keys"] == ["plan"]
+
+
+def test_full_queue_drops_instead_of_blocking() -> None:
+    backend = _SlowBackend()
+    exporter = tracing.TraceExporter([backend], max_queue=2, batch_size=10)
+    try:
+        results = [exporter.submit({"run_id": str(i)}) for i in range(6)]
+        assert not all(results)
+        assert exporter.stats()["dropped"] >= 3
+    finally:
+        backend.release.set()
+        exporter.close()
+    stats = exporter.stats()
+    assert stats["exported"] == stats["enqueued"]
+    assert stats["queued"] == 0
+
+
+def test_runs_are_exported_to_jsonl(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    trace_file = tmp_path / "traces.jsonl"
+    monkeypatch.delenv("LANGSMITH_API_KEY", raising=False)
+    monkeypatch.setenv("POLARSPIPE_TRACE_FILE", str(trace_file))
+    monkeypatch.setattr(tracing, "_exporter", None)
+
+    run_id = tracing.start_run("test", {"instruction": "x"})
+    tracing.finish_run(run_id, {"execution": {"artifact_bytes": b"..."}})
+    exporter = tracing.get_exporter()
+    assert exporter is not None
+    exporter.close()
+
+    events = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert [e["type"] for e in events] == ["start", "finish"]
+    assert {e["run_id"] for e in events} == {run_id}
+    assert events[1]["payload"] == {"execution": {}}
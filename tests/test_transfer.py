@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+import pytest
+
+from polarspipe.agent import tools
+from polarspipe.agent.local_sandbox import LocalSandbox
+from polarspipe.agent.transfer import SandboxTransfer
+
+
+def _payload(path: Path, size: int) -> bytes:
+    data = (b"id,name\n" + b"1,alpha\n" * (size // 8)) + os.urandom(1024)
+    path.write_bytes(data)
+    return data
+
+
+def test_round_trip_in_chunks(tmp_path: Path) -> None:
+    source = tmp_path / "input.csv"
+    data = _payload(source, 200_000)
+    sandbox = LocalSandbox()
+    try:
+        transfer = SandboxTransfer(sandbox, sandbox.workdir, chunk_bytes=64 * 1024)
+        up = transfer.upload(source, "data/input.csv")
+        down = transfer.download("data/input.csv", tmp_path / "back.csv")
+
+        assert up["chunks"] == down["chunks"] == 4
+        assert up["bytes_sent"] < up["bytes_raw"]
+        assert (sandbox.root / "data/input.csv").read_bytes() == data
+        assert (tmp_path / "back.csv").read_bytes() == data
+        assert not list((sandbox.root / ".transfer").glob("*/part-*"))
+    finally:
+        sandbox.kill()
+
+
+def test_remote_paths_are_not_shell_code(tmp_path: Path) -> None:
+    source = tmp_path / "input.csv"
+    data = _payload(source, 10_000)
+    sandbox = LocalSandbox()
+    try:
+        transfer = SandboxTransfer(sandbox, sandbox.workdir)
+        remote = "data/my input; touch pwned.csv"
+        transfer.upload(source, remote)
+        transfer.download(remote, tmp_path / "back.csv")
+
+        assert (sandbox.root / remote).read_bytes() == data
+        assert (tmp_path / "back.csv").read_bytes() == data
+        assert not list(sandbox.root.rglob("pwned.csv"))
+    finally:
+        sandbox.kill()
+
+
+def test_unchanged_input_is_not_uploaded_twice(tmp_path: Path) -> None:
+    source = tmp_path / "input.csv"
+    _payload(source, 10_000)
+    sandbox = LocalSandbox()
+    try:
+        first = SandboxTransfer(sandbox, sandbox.workdir).upload(source, "in.csv")
+        # A fresh client finds the hash marker the helper left behind.
+        second = SandboxTransfer(sandbox, sandbox.workdir).upload(source, "in.csv")
+        _payload(source, 12_000)
+        third = SandboxTransfer(sandbox, sandbox.workdir).upload(source, "in.csv")
+
+        assert not first["skipped"]
+        assert second["skipped"] and second["bytes_sent"] == 0
+        assert not third["skipped"]
+    finally:
+        sandbox.kill()
+
+
+def test_execute_streams_artifact_to_local_output(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    Path("data").mkdir()
+    pl.DataFrame({"id": ["1", "", "3"], "name": ["a", "b", "c"]}).write_ndjson(
+        "data/in.ndjson"
+    )
+    spec: dict[str, Any] = {
+        "input_path": "data/in.ndjson",
+        "output_path": "outputs/out.parquet",
+        "filters": [{"column": "id", "op": "!=", "value": ""}],
+    }
+    sandbox = LocalSandbox()
+    try:
+        runs = [
+            tools.execute_in_e2b(
+                tools.generate_polars_code(spec),
+                output_path=spec["output_path"],
+                input_path=spec["input_path"],
+                sandbox=sandbox,
+            )
+            for _ in range(2)
+        ]
+    finally:
+        sandbox.kill()
+
+    assert [r["exit_code"] for r in runs] == [0, 0]
+    assert runs[1]["transfer"]["uploads"][0]["skipped"]
+    phases = [s["name"] for s in runs[0]["spans"]]
+    assert phases == ["create", "install", "upload", "run", "download"]
+    assert runs[0]["spans"][0]["cache_hit"]  # caller-provided sandbox
+    assert runs[0]["artifact_local_path"] == "outputs/out.parquet"
+    assert pl.read_parquet("outputs/out.parquet")["id"].to_list() == ["1", "3"]
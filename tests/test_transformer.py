@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+
+from polarspipe.ingestion.transformer import (
+    REJECT_REASON_COL,
+    clean,
+    clean_with_rejects,
+)
+from polarspipe.pipeline import write_clean
+
+
+def raw_frame() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "id": ["1", "  ", None, "4", " 5 "],
+            "name": ["a  b", "b", "c", None, " e "],
+        }
+    )
+
+
+def test_clean_with_rejects_partitions_rows() -> None:
+    cleaned, rejected = clean_with_rejects(raw_frame())
+    cleaned_df, rejected_df = pl.collect_all([cleaned, rejected])
+
+    assert cleaned_df.equals(clean(raw_frame()).collect())
+    assert cleaned_df.height + rejected_df.height == raw_frame().height
+    assert sorted(rejected_df[REJECT_REASON_COL].to_list()) == [
+        "empty_id",
+        "null_id",
+        "null_name",
+    ]
+
+
+def test_write_clean_with_quarantine(tmp_path: Path) -> None:
+    source = tmp_path / "raw.ndjson"
+    raw_frame().write_ndjson(source)
+
+    out, bad = write_clean(
+        source, tmp_path / "clean.parquet", quarantine=tmp_path / "rejects.ndjson"
+    )
+
+    assert pl.read_parquet(out)["id"].to_list() == ["1", "5"]
+    assert pl.read_ndjson(bad).height == 3
+
+
+def test_parquet_metrics_come_from_footer(tmp_path: Path, caplog: Any) -> None:
+    source = tmp_path / "raw.parquet"
+    raw_frame().write_parquet(source)
+
+    with caplog.at_level(logging.INFO, logger="polarspipe"):
+        clean(pl.scan_parquet(source), source=source).collect()
+
+    pre = next(r.msg for r in caplog.records if r.msg["stage"] == "clean_pre")
+    assert pre["stats_provider"] == "parquet_footer"
+    assert pre["rows_sampled"] == 0
+    assert pre["null_counts"] == {"id": 1, "name": 1}
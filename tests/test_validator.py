@@ -19,3 +19,13 @@ def test_missing_column() -> None:
 def test_lazy_schema_validation() -> None:
     df = pl.DataFrame({"id": ["1", "2"], "name": ["a", "b"]}).lazy()
     assert validate_columns(df, {"id": pl.Utf8, "name": pl.Utf8})
+
+
+def test_compacted_string_dtypes_pass_with_subtypes() -> None:
+    df = pl.DataFrame(
+        {"id": ["1", "2"], "name": ["a", "b"]},
+        schema={"id": pl.Utf8, "name": pl.Categorical},
+    )
+    assert validate_columns(df, {"id": pl.Utf8, "name": pl.Utf8}, allow_subtypes=True)
+    with pytest.raises(InvalidSchemaError):
+        validate_columns(df, {"id": pl.Utf8, "name": pl.Utf8})
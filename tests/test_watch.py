@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from polarspipe.scheduler import JobResult
+from polarspipe.watch import FileTracker, Watcher
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_tracker_waits_for_stable_files(tmp_path: Path) -> None:
+    clock = Clock()
+    tracker = FileTracker(tmp_path, ["*.ndjson"], settle_s=1.0, clock=clock)
+    landing = tmp_path / "a.ndjson"
+    landing.write_text('{"id": "1"}\n')
+    (tmp_path / "b.ndjson.part").write_text("partial")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    assert tracker.scan() == [] and tracker.settling == 1
+    clock.now = 0.5
+    with landing.open("a") as fh:  # still being written
+        fh.write('{"id": "2"}\n')
+    assert tracker.scan() == []
+    clock.now = 1.2
+    assert tracker.scan() == []
+    clock.now = 1.6
+    assert tracker.scan() == [(landing, 0.0)]
+    assert tracker.scan() == []
+
+    (tmp_path / "b.ndjson.part").rename(tmp_path / "b.ndjson")
+    assert tracker.scan() == []
+    clock.now = 3.0
+    assert [p.name for p, _ in tracker.scan()] == ["b.ndjson"]
+
+
+def test_tracker_forgets_removed_files(tmp_path: Path) -> None:
+    clock = Clock()
+    tracker = FileTracker(tmp_path, settle_s=0.0, clock=clock)
+    landing = tmp_path / "a.ndjson"
+    landing.write_text('{"id": "1"}\n')
+    stat = landing.stat()
+    assert [p for p, _ in tracker.scan()] == [landing]
+
+    landing.unlink()
+    assert tracker.scan() == []
+    # The same name, size and mtime landing again is a new file.
+    landing.write_text('{"id": "1"}\n')
+    os.utime(landing, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert [p for p, _ in tracker.scan()] == [landing]
+
+
+def test_watcher_cleans_landed_files(tmp_path: Path) -> None:
+    inbox, out = tmp_path / "inbox", tmp_path / "out"
+    inbox.mkdir()
+    frame = pl.DataFrame({"id": ["1", " ", "3"], "name": ["a", "b", "c"]})
+    frame.write_ndjson(inbox / "first.ndjson")
+    frame.write_ndjson(inbox / "second.ndjson")
+    results: list[JobResult] = []
+
+    watcher = Watcher(
+        inbox,
+        out,
+        workers=1,
+        max_in_flight=1,
+        settle_s=0.05,
+        poll_s=0.05,
+        on_result=results.append,
+    )
+    metrics = watcher.run(stop=threading.Event(), max_files=2)
+
+    assert sorted(p.name for p in out.iterdir()) == [
+        "first.ndjson.parquet",
+        "second.ndjson.parquet",
+    ]
+    assert pl.read_parquet(out / "first.ndjson.parquet")["id"].to_list() == ["1", "3"]
+    snapshot = metrics.snapshot()
+    assert snapshot["succeeded"] == 2 and snapshot["in_flight"] == 0
+    assert snapshot["latency_s_max"] is not None and len(results) == 2
+
+
+def test_watcher_keeps_outputs_apart_from_inputs(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        Watcher(tmp_path, tmp_path)
+    with pytest.raises(ValueError):
+        Watcher(tmp_path, tmp_path / "clean")
+
+    watcher = Watcher(tmp_path / "inbox", tmp_path / "out")
+    outputs = {
+        watcher._job(tmp_path / "inbox" / n).output for n in ("a.csv", "a.ndjson")
+    }
+    assert len(outputs) == 2